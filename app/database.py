@@ -1,14 +1,90 @@
+import threading
+import time
+
+from fastapi import Depends
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.vector_codec import register_vector_codecs
 
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# Time spent obtaining a connection from each engine's pool, by engine name
+_pool_waits = {}
+_pool_waits_lock = threading.Lock()
+SLOW_WAIT_SECONDS = 0.1
+
+
+def _record_wait(name: str, seconds: float, timed_out: bool = False):
+    with _pool_waits_lock:
+        stats = _pool_waits.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "slow": 0, "timeouts": 0})
+        stats["count"] += 1
+        stats["total"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+        stats["slow"] += seconds >= SLOW_WAIT_SECONDS
+        stats["timeouts"] += timed_out
+
+
+def _timed_pool(name: str):
+    """Queue pool class that records checkout wait times under `name`."""
+
+    class TimedPool(AsyncAdaptedQueuePool):
+        def _do_get(self):
+            # Covers waiting for a free connection and opening a new one
+            start = time.perf_counter()
+            timed_out = False
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                timed_out = True
+                raise
+            finally:
+                _record_wait(name, time.perf_counter() - start, timed_out)
+
+    return TimedPool
+
+
+def _register_codecs(dbapi_connection, connection_record):
+    # Vectors travel in binary and decode straight to NumPy arrays
+    dbapi_connection.run_async(register_vector_codecs)
+
+
+def _create_engine(url: str, name: str):
+    # Sizes are per process: multiply by WEB_CONCURRENCY (plus workers and
+    # the job runner) to get the connections a node can open
+    new_engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=_timed_pool(name),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # SQLAlchemy's prepared statement cache and asyncpg's own; 0 for pgbouncer transaction pooling
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+    event.listen(new_engine.sync_engine, "connect", _register_codecs)
+    return new_engine
+
+
+engine = _create_engine(DATABASE_URL, "primary")
+# Read-only queries (feed, top articles, daily summary lookups) go to the
+# replica when READ_DATABASE_URL is set; results may lag the primary slightly
+read_engine = _create_engine(settings.READ_DATABASE_URL, "replica") if settings.READ_DATABASE_URL else engine
 
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
+AsyncReadSessionLocal = sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False
+) if read_engine is not engine else AsyncSessionLocal
 
 Base = declarative_base()
 
@@ -18,3 +94,37 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+async def get_read_db(db: AsyncSession = Depends(get_db)):
+    """Session for read-only work: the replica if configured, else the request's primary session."""
+    if read_engine is engine:
+        yield db
+        return
+    async with AsyncReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+def get_pool_stats() -> dict:
+    """Pool occupancy and checkout wait times per engine."""
+    engines = {"primary": engine}
+    if read_engine is not engine:
+        engines["replica"] = read_engine
+    stats = {}
+    for name, eng in engines.items():
+        pool = eng.pool
+        with _pool_waits_lock:
+            waits = dict(_pool_waits.get(name, {"count": 0, "total": 0.0, "max": 0.0, "slow": 0, "timeouts": 0}))
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "wait_count": waits["count"],
+            "wait_avg_ms": round(waits["total"] / waits["count"] * 1000, 2) if waits["count"] else 0.0,
+            "wait_max_ms": round(waits["max"] * 1000, 2),
+            f"waits_over_{int(SLOW_WAIT_SECONDS * 1000)}ms": waits["slow"],
+            "timeouts": waits["timeouts"],
+        }
+    return stats
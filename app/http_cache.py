@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def build_version() -> str:
+    """
+    BUILD_VERSION, or a hash of the app package's source files: either way it
+    changes with a deploy that may change the shape of the responses.
+    """
+    if settings.BUILD_VERSION:
+        return settings.BUILD_VERSION
+    digest = hashlib.blake2b(digest_size=8)
+    root = os.path.dirname(os.path.abspath(__file__))
+    for directory, _, files in sorted(os.walk(root)):
+        for name in sorted(files):
+            if name.endswith(".py"):
+                path = os.path.join(directory, name)
+                digest.update(os.path.relpath(path, root).encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+def make_etag(*parts) -> str:
+    """
+    Strong ETag of a payload, derived from the versions of what it is built
+    from rather than from its bytes, so it is known before building it.
+    """
+    key = ":".join(str(part) for part in (settings.PROJECT_VERSION, build_version(), *parts))
+    return '"' + hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 specifies for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.replace(" ", "").lower()
+            try:
+                return not quality.startswith("q=") or float(quality[2:]) > 0
+            except ValueError:
+                return True
+    return False
+
+
+class PayloadCache:
+    """Gzipped JSON bodies by ETag, least recently used evicted past max_bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def get(self, etag: str) -> Optional[bytes]:
+        body = self._bodies.get(etag)
+        if body is not None:
+            self._bodies.move_to_end(etag)
+        return body
+
+    def put(self, etag: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        if etag in self._bodies:
+            self.size -= len(self._bodies.pop(etag))
+        self._bodies[etag] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._bodies.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        self._bodies.clear()
+        self.size = 0
+
+    def __len__(self):
+        return len(self._bodies)
+
+
+# Per process: entries are keyed by ETag, so changed content is a miss and stale entries age out
+payload_cache = PayloadCache(settings.HTTP_CACHE_MAX_BYTES)
+
+
+async def conditional_response(
+    request: Request,
+    etag: str,
+    build: Callable[[], Awaitable[Any]],
+    headers: Dict[str, str] = None
+) -> Response:
+    """
+    JSON response for a payload with a known ETag: 304 if the client has it,
+    else the cached gzipped body, else the payload from `build()`. Payloads of
+    at least HTTP_CACHE_MIN_BYTES are compressed once and cached.
+    """
+    headers = {
+        **(headers or {}),
+        "ETag": etag,
+        # Per-user payloads: browsers may keep them but must revalidate
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization, Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    gzip_ok = accepts_gzip(request)
+    gzipped = payload_cache.get(etag)
+    if gzipped is None:
+        body = JSONResponse(jsonable_encoder(await build())).body
+        if len(body) < settings.HTTP_CACHE_MIN_BYTES:
+            return Response(body, media_type="application/json", headers=headers)
+        gzipped = gzip.compress(body, compresslevel=settings.HTTP_CACHE_GZIP_LEVEL)
+        payload_cache.put(etag, gzipped)
+    elif not gzip_ok:
+        body = gzip.decompress(gzipped)
+
+    if gzip_ok:
+        return Response(gzipped, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(body, media_type="application/json", headers=headers)
@@ -6,11 +6,14 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import logging
 
+from app.config import settings
 from app.database import engine, Base
+from app.migrations import run_migrations, sync_vector_storage
+from app.partitions import partition_tables
 from app.routers import auth, users, ingestion, feed, summary, feedback, interactions
 
 # Import models to ensure they are registered with Base
-from app.models import user, article, summary as summary_model, interaction, synthesized_article
+from app.models import user, article, summary as summary_model, interaction, synthesized_article, job, job_run, cluster_snapshot
 
 logging.basicConfig(
     level=logging.INFO,
@@ -54,6 +57,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Feed-Epoch"],
 )
 
 # Include Routers
@@ -72,19 +76,37 @@ async def startup_event():
     # Create tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # Columns and indexes added to existing tables
+        await run_migrations(conn)
+        # vector/halfvec storage of category vectors (VECTOR_STORAGE)
+        await sync_vector_storage(conn)
+        # Monthly partitions of the history tables (converts older databases)
+        await partition_tables(conn)
 
-    # Start Scheduler
-    import asyncio
-    from app.services.scheduler import start_scheduler
-    asyncio.create_task(start_scheduler())
+    # Start Scheduler (in whichever worker process wins the leader election)
+    if settings.SCHEDULER_ENABLED:
+        from app.services.scheduler import start_leader_election
+        start_leader_election()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Nuze Backend")
+    from app.services.scheduler import stop_leader_election
+    await stop_leader_election()
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    from app.services.llm_gateway import get_gateway
+    from app.services.llm_metrics import get_generation_stats
+    from app.services.scheduler import runner
+    from app.database import get_pool_stats
+    return {
+        "status": "ok",
+        "llm_gateway": get_gateway().stats(),
+        "llm_generations": get_generation_stats(),
+        "job_runner": runner.stats(),
+        "db_pool": get_pool_stats()
+    }
 
 if __name__ == "__main__":
     import uvicorn
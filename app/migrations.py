@@ -0,0 +1,145 @@
+import logging
+import re
+from typing import List, Tuple
+
+from sqlalchemy import text
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Schema changes to tables that already exist. Base.metadata.create_all only
+# creates missing tables (new databases get every column and index from the
+# models), so each statement must be a no-op on a freshly created schema.
+# Append only: a migration runs once per database, in list order.
+MIGRATIONS: List[Tuple[str, List[str]]] = [
+    ("0001_article_stage", [
+        "ALTER TABLE articles ADD COLUMN IF NOT EXISTS stage VARCHAR NOT NULL DEFAULT 'scraped'",
+        "ALTER TABLE articles ADD COLUMN IF NOT EXISTS stage_attempts INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE articles ADD COLUMN IF NOT EXISTS stage_error TEXT",
+        "ALTER TABLE articles ADD COLUMN IF NOT EXISTS stage_updated_at TIMESTAMPTZ DEFAULT now()",
+        # Backfill from what the pipeline used to infer on every run
+        """UPDATE articles SET stage = 'synthesized'
+           WHERE id IN (SELECT article_id FROM synthesized_sources) AND stage <> 'synthesized'""",
+        "UPDATE articles SET stage = 'classified' WHERE stage = 'scraped' AND category_scores IS NOT NULL",
+        """CREATE INDEX IF NOT EXISTS ix_articles_pending_classification ON articles (scraped_at)
+           WHERE stage IN ('scraped', 'classify_failed')""",
+        """CREATE INDEX IF NOT EXISTS ix_articles_pending_synthesis ON articles (published_at)
+           WHERE stage IN ('classified', 'clustered', 'synthesize_failed')""",
+    ]),
+    ("0002_job_run_startup", [
+        "ALTER TABLE job_runs ADD COLUMN IF NOT EXISTS startup_ms DOUBLE PRECISION",
+    ]),
+    ("0003_synthesized_sources_article", [
+        # Retention deletes the source links of dropped article partitions
+        "CREATE INDEX IF NOT EXISTS ix_synthesized_sources_article_id ON synthesized_sources (article_id)",
+    ]),
+    ("0004_http_cache_versions", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS preferences_version INTEGER NOT NULL DEFAULT 0",
+        "CREATE INDEX IF NOT EXISTS ix_synthesized_articles_generated_at ON synthesized_articles (generated_at)",
+    ]),
+    ("0005_jobs_dedupe_active", [
+        # Dedupe keys are unique among queued and running jobs only, so failed work can be queued again
+        "ALTER TABLE jobs DROP CONSTRAINT IF EXISTS jobs_dedupe_key_key",
+        """CREATE UNIQUE INDEX IF NOT EXISTS ux_jobs_dedupe_active ON jobs (dedupe_key)
+           WHERE status IN ('queued', 'running')""",
+    ]),
+    ("0006_unique_keys", [
+        # Key tables (created by create_all) keeping URLs and interactions unique
+        # across partitions; the newest row of existing duplicates wins
+        """INSERT INTO article_urls (source_url, article_id)
+           SELECT DISTINCT ON (source_url) source_url, id FROM articles
+           WHERE source_url IS NOT NULL ORDER BY source_url, scraped_at DESC NULLS LAST
+           ON CONFLICT DO NOTHING""",
+        """INSERT INTO user_interaction_keys (user_id, synthesized_article_id, interaction_id)
+           SELECT DISTINCT ON (user_id, synthesized_article_id) user_id, synthesized_article_id, id FROM user_interactions
+           WHERE user_id IS NOT NULL AND synthesized_article_id IS NOT NULL
+           ORDER BY user_id, synthesized_article_id, created_at DESC NULLS LAST
+           ON CONFLICT DO NOTHING""",
+    ]),
+    ("0007_feed_preferences", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS feed_epoch INTEGER",
+        # Converted to VECTOR_STORAGE by sync_vector_storage
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS feed_preferences vector(10)",
+    ]),
+]
+
+# Serializes runners (several app workers start at once)
+MIGRATION_LOCK_KEY = 727001
+
+
+async def run_migrations(conn) -> List[str]:
+    """
+    Applies the pending MIGRATIONS inside the caller's transaction and records
+    them in schema_migrations. Returns the names applied.
+    """
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    await conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "name VARCHAR PRIMARY KEY, applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+    ))
+    applied = set((await conn.execute(text("SELECT name FROM schema_migrations"))).scalars().all())
+
+    ran = []
+    for name, statements in MIGRATIONS:
+        if name in applied:
+            continue
+        for statement in statements:
+            await conn.execute(text(statement))
+        await conn.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
+        logger.info(f"Applied migration {name}")
+        ran.append(name)
+    return ran
+
+
+# Category vector columns whose type follows settings.VECTOR_STORAGE: (table, column, dimensions)
+VECTOR_COLUMNS: List[Tuple[str, str, int]] = [
+    ("articles", "category_scores", 10),
+    ("synthesized_articles", "category_scores", 10),
+    ("users", "preferences", 10),
+    ("users", "feed_preferences", 10),
+]
+
+_VECTOR_OPS = re.compile(r"\b(vector|halfvec)_(\w+)_ops\b")
+
+
+async def sync_vector_storage(conn, storage: str = None) -> List[str]:
+    """
+    Converts the VECTOR_COLUMNS to `storage` ("vector" or "halfvec", default
+    VECTOR_STORAGE) where they differ, rebuilding pgvector indexes on them with
+    the matching operator class. Each conversion rewrites the table under an
+    exclusive lock. Returns the columns converted.
+    """
+    storage = storage or settings.VECTOR_STORAGE
+    if storage not in ("vector", "halfvec"):
+        raise ValueError(f"Unknown VECTOR_STORAGE {storage!r}")
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+    converted = []
+    for table, column, dim in VECTOR_COLUMNS:
+        current = (await conn.execute(text(
+            "SELECT udt_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column"
+        ), {"table": table, "column": column})).scalar()
+        if current is None or current == storage:
+            continue
+
+        indexes = (await conn.execute(text(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = :table"
+        ), {"table": table})).all()
+        rebuild = [(name, definition) for name, definition in indexes
+                   if column in definition and _VECTOR_OPS.search(definition)]
+        for name, _ in rebuild:
+            await conn.execute(text(f'DROP INDEX "{name}"'))
+
+        await conn.execute(text(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {storage}({dim}) USING {column}::{storage}({dim})"
+        ))
+        for _, definition in rebuild:
+            await conn.execute(text(_VECTOR_OPS.sub(lambda m: f"{storage}_{m.group(2)}_ops", definition)))
+
+        logger.info(f"Converted {table}.{column} from {current} to {storage}"
+                    + (f", rebuilt {len(rebuild)} indexes" if rebuild else ""))
+        converted.append(f"{table}.{column}")
+    return converted
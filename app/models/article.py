@@ -1,21 +1,103 @@
-from sqlalchemy import Column, String, DateTime, func, Text
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from pgvector.sqlalchemy import Vector
+from sqlalchemy import Column, String, DateTime, func, Text, Integer, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB, insert
+from app.vector_codec import category_vector
 from app.database import Base
+from app.partitions import default_partition
 import uuid
 
+
+class ArticleStage:
+    """
+    Pipeline stage of an article:
+    scraped -> classified -> clustered -> synthesized, or classify_failed /
+    synthesize_failed after a failed attempt (retried until STAGE_MAX_ATTEMPTS).
+    """
+    SCRAPED = "scraped"
+    CLASSIFIED = "classified"
+    CLUSTERED = "clustered"
+    SYNTHESIZED = "synthesized"
+    CLASSIFY_FAILED = "classify_failed"
+    SYNTHESIZE_FAILED = "synthesize_failed"
+
+    # Work sets of each stage; each is covered by a partial index below
+    PENDING_CLASSIFICATION = (SCRAPED, CLASSIFY_FAILED)
+    PENDING_SYNTHESIS = (CLASSIFIED, CLUSTERED, SYNTHESIZE_FAILED)
+
+
+def _in_stages(stages):
+    return text("stage IN (" + ", ".join(f"'{s}'" for s in stages) + ")")
+
+
 class Article(Base):
     __tablename__ = "articles"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
-    source_url = Column(String, unique=True)
+    # Unique through article_urls (a unique constraint here would have to include published_at)
+    source_url = Column(String, index=True)
     image_url = Column(String)
     publisher = Column(String)
-    published_at = Column(DateTime(timezone=True))
+    # Partition key (monthly); part of the table's primary key, so never null
+    published_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
     language = Column(String, default='en')
     scraped_at = Column(DateTime(timezone=True), server_default=func.now())
     # Category scores vector (dimension 10)
-    category_scores = Column(Vector(10))
+    category_scores = Column(category_vector(10))
     metadata_ = Column("metadata", JSONB) # 'metadata' is reserved in SQLAlchemy Base
+    # Pipeline lifecycle (see ArticleStage); attempts count failures in the current stage
+    stage = Column(String, nullable=False, default=ArticleStage.SCRAPED, server_default=ArticleStage.SCRAPED)
+    stage_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    stage_error = Column(Text)
+    stage_updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index(
+            "ix_articles_pending_classification", "scraped_at",
+            postgresql_where=_in_stages(ArticleStage.PENDING_CLASSIFICATION)
+        ),
+        Index(
+            "ix_articles_pending_synthesis", "published_at",
+            postgresql_where=_in_stages(ArticleStage.PENDING_SYNTHESIS)
+        ),
+        {"postgresql_partition_by": "RANGE (published_at)"},
+    )
+    # Rows are identified by id alone; published_at is only in the primary key for partitioning
+    __mapper_args__ = {"primary_key": [id]}
+
+    def set_stage(self, stage: str, error: str = None):
+        """Moves to `stage`; a failed stage counts another attempt, a new stage resets the count."""
+        if stage == self.stage and error is not None:
+            self.stage_attempts = (self.stage_attempts or 0) + 1
+        elif error is not None:
+            self.stage_attempts = 1
+        else:
+            self.stage_attempts = 0
+        self.stage = stage
+        self.stage_error = error
+
+
+default_partition(Article.__table__)
+
+
+class ArticleUrl(Base):
+    """The article stored for each source URL, unique across the articles partitions."""
+    __tablename__ = "article_urls"
+
+    source_url = Column(String, primary_key=True)
+    article_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+
+    @staticmethod
+    async def claim(db, source_url: str, article_id) -> bool:
+        """
+        Reserves `source_url` for the article `article_id` inserted in the
+        caller's transaction. False if another article has it; a concurrent
+        claim waits for this transaction to end.
+        """
+        result = await db.execute(
+            insert(ArticleUrl)
+            .values(source_url=source_url, article_id=article_id)
+            .on_conflict_do_nothing()
+            .returning(ArticleUrl.article_id)
+        )
+        return result.scalar_one_or_none() is not None
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from app.database import Base
+
+
+class ClusterSnapshot(Base):
+    """
+    Incremental clustering state (centroids, memberships) saved by each run,
+    so it follows the scheduler leader from node to node.
+    """
+    __tablename__ = "cluster_snapshots"
+
+    name = Column(String, primary_key=True)
+    data = Column(JSONB, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+    @staticmethod
+    async def save(db, name: str, data: dict):
+        """Replaces the snapshot `name` in the caller's transaction."""
+        statement = insert(ClusterSnapshot).values(name=name, data=data)
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[ClusterSnapshot.name],
+                set_={"data": statement.excluded.data, "updated_at": func.now()}
+            )
+        )
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, DateTime, func, ForeignKey, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, DateTime, func, ForeignKey, Boolean, Index
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.future import select
 from app.database import Base
+from app.partitions import default_partition
 import uuid
 
 class UserInteraction(Base):
@@ -8,11 +10,57 @@ class UserInteraction(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
-    synthesized_article_id = Column(UUID(as_uuid=True), ForeignKey("synthesized_articles.id"), nullable=True)
+    # No foreign key: synthesized_articles is partitioned
+    synthesized_article_id = Column(UUID(as_uuid=True), nullable=True)
     is_liked = Column(Boolean, nullable=True, default=None)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key (monthly)
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
 
-    from sqlalchemy import UniqueConstraint
     __table_args__ = (
-        UniqueConstraint('user_id', 'synthesized_article_id', name='_user_synth_article_uc'),
+        # One row per user and article, enforced by user_interaction_keys (a
+        # unique constraint here would have to include created_at)
+        Index("ix_user_interactions_user_article", "user_id", "synthesized_article_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
+    # Rows are identified by id alone; created_at is only in the primary key for partitioning
+    __mapper_args__ = {"primary_key": [id]}
+
+
+default_partition(UserInteraction.__table__)
+
+
+class UserInteractionKey(Base):
+    """
+    The interaction of each user and synthesized article. Unpartitioned, so
+    the pair is unique across user_interactions' monthly partitions.
+    """
+    __tablename__ = "user_interaction_keys"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    synthesized_article_id = Column(UUID(as_uuid=True), primary_key=True)
+    interaction_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+
+    @staticmethod
+    async def claim(db, user_id, synthesized_article_id, interaction_id):
+        """
+        Reserves the pair for a new interaction `interaction_id` (in the
+        caller's transaction) and returns it, or returns the id of the pair's
+        existing interaction. A concurrent claim waits for this transaction,
+        then sees its interaction.
+        """
+        result = await db.execute(
+            insert(UserInteractionKey)
+            .values(user_id=user_id, synthesized_article_id=synthesized_article_id, interaction_id=interaction_id)
+            .on_conflict_do_nothing()
+            .returning(UserInteractionKey.interaction_id)
+        )
+        claimed = result.scalar_one_or_none()
+        if claimed is not None:
+            return claimed
+        result = await db.execute(
+            select(UserInteractionKey.interaction_id).where(
+                UserInteractionKey.user_id == user_id,
+                UserInteractionKey.synthesized_article_id == synthesized_article_id
+            )
+        )
+        return result.scalar_one()
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, String, DateTime, func, Text, Integer, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from app.database import Base
+import uuid
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    ACTIVE = (QUEUED, RUNNING)
+
+
+class Job(Base):
+    """A unit of pipeline work (classify one article, combine one group) claimed by any worker."""
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    # Enqueuing the same key twice is a no-op while the first job is queued or
+    # running (ux_jobs_dedupe_active); once it is done or failed the work can be queued again
+    dedupe_key = Column(String)
+    status = Column(String, nullable=False, default=JobStatus.QUEUED, server_default=JobStatus.QUEUED)
+    priority = Column(Integer, nullable=False, default=0, server_default="0")  # lower runs first
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False, default=3, server_default="3")
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String)
+    heartbeat_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # The claim query only ever scans queued jobs
+        Index("ix_jobs_queued", "kind", "priority", "run_after", postgresql_where=text("status = 'queued'")),
+        Index("ix_jobs_running", "heartbeat_at", postgresql_where=text("status = 'running'")),
+        Index("ux_jobs_dedupe_active", "dedupe_key", unique=True,
+              postgresql_where=text("status IN ('queued', 'running')")),
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, DateTime, func, Text, Float, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+import uuid
+
+
+class JobRun(Base):
+    """Ledger of scheduled job runs (daily ingest, daily cluster)."""
+    __tablename__ = "job_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # running, succeeded, failed, skipped, abandoned
+    host = Column(String)
+    started_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+    duration_seconds = Column(Float)
+    # Time from dispatch until the job body started running
+    startup_ms = Column(Float)
+    error = Column(Text)
+
+    __table_args__ = (
+        # At most one running row per job: the insert of an overlapping run fails
+        Index("ux_job_runs_running", "name", unique=True, postgresql_where=text("status = 'running'")),
+        Index("ix_job_runs_name_started", "name", "started_at"),
+    )
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, DateTime, Date, String, func, ForeignKey, ARRAY, Text
+from sqlalchemy import Column, DateTime, Date, String, func, ForeignKey, ARRAY, Text, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from app.database import Base
+from app.partitions import default_partition
 import uuid
 
 class DailySummary(Base):
@@ -10,6 +11,17 @@ class DailySummary(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     article_ids = Column(ARRAY(UUID(as_uuid=True)))
     summary_generated_at = Column(DateTime(timezone=True), server_default=func.now())
-    date = Column(Date, default=func.current_date())
+    # Partition key (monthly)
+    date = Column(Date, primary_key=True, default=func.current_date())
     summary_text = Column(JSONB)
     status = Column(String, default="pending")  # pending, completed, failed
+
+    __table_args__ = (
+        Index("ix_daily_summaries_user_date", "user_id", "date"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+    # Rows are identified by id alone; date is only in the primary key for partitioning
+    __mapper_args__ = {"primary_key": [id]}
+
+
+default_partition(DailySummary.__table__)
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, DateTime, func, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, func, Text, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from pgvector.sqlalchemy import Vector
+from app.vector_codec import category_vector
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.partitions import default_partition
 import uuid
 
 class SynthesizedArticle(Base):
@@ -12,13 +13,22 @@ class SynthesizedArticle(Base):
     title = Column(String)
     content = Column(Text)
     image_url = Column(String)
-    generated_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key (monthly); moving it (story updates) moves the row
+    generated_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     generation_prompt = Column(Text)
     notes = Column(Text)
     analysis = Column(JSONB) # Storing the full analysis JSON here
-    category_scores = Column(Vector(10))
+    category_scores = Column(category_vector(10))
     metadata_scores = Column(JSONB)
 
+    __table_args__ = (
+        # Newest article of the feed window, part of the /feed ETag
+        Index("ix_synthesized_articles_generated_at", "generated_at"),
+        {"postgresql_partition_by": "RANGE (generated_at)"},
+    )
+    # Rows are identified by id alone; generated_at is only in the primary key for partitioning
+    __mapper_args__ = {"primary_key": [id]}
+
     @property
     def published_at(self):
         return self.generated_at
@@ -27,8 +37,11 @@ class SynthesizedArticle(Base):
     def publisher(self):
         return "Nuze AI"
 
-    # Relationship to sources
-    sources = relationship("SynthesizedSource", back_populates="synthesized_article", lazy="selectin")
+    # Relationship to sources (no foreign keys: partitioned tables cannot be referenced by id alone)
+    sources = relationship(
+        "SynthesizedSource", back_populates="synthesized_article", lazy="selectin",
+        primaryjoin="SynthesizedArticle.id == foreign(SynthesizedSource.synthesized_id)"
+    )
 
     @property
     def sources_detail(self):
@@ -44,8 +57,14 @@ class SynthesizedArticle(Base):
 class SynthesizedSource(Base):
     __tablename__ = "synthesized_sources"
 
-    synthesized_id = Column(UUID(as_uuid=True), ForeignKey("synthesized_articles.id"), primary_key=True)
-    article_id = Column(UUID(as_uuid=True), ForeignKey("articles.id"), primary_key=True)
+    synthesized_id = Column(UUID(as_uuid=True), primary_key=True)
+    article_id = Column(UUID(as_uuid=True), primary_key=True, index=True)
+
+    synthesized_article = relationship(
+        "SynthesizedArticle", back_populates="sources",
+        primaryjoin="SynthesizedArticle.id == foreign(SynthesizedSource.synthesized_id)"
+    )
+    article = relationship("Article", lazy="selectin", primaryjoin="Article.id == foreign(SynthesizedSource.article_id)")
+
 
-    synthesized_article = relationship("SynthesizedArticle", back_populates="sources")
-    article = relationship("Article", lazy="selectin")
+default_partition(SynthesizedArticle.__table__)
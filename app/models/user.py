@@ -1,6 +1,6 @@
 from sqlalchemy import Column, String, DateTime, Integer, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from pgvector.sqlalchemy import Vector
+from app.vector_codec import category_vector
 from app.database import Base
 import uuid
 
@@ -17,6 +17,12 @@ class User(Base):
     gender = Column(String)
     location = Column(String)
     # Preferences vector (dimension 10)
-    preferences = Column(Vector(10))
+    preferences = Column(category_vector(10))
     preferences_metadata = Column(JSONB)
+    # Bumped on every change to preferences or interactions; part of the
+    # ETags of /me/preferences and /feed
+    preferences_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Preferences the feed of feed_epoch is ranked by (UserService.get_feed_preferences)
+    feed_epoch = Column(Integer)
+    feed_preferences = Column(category_vector(10))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,255 @@
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List, Tuple
+
+from sqlalchemy import DDL, event, text
+
+from app.config import settings
+from app.database import Base
+from app.migrations import MIGRATION_LOCK_KEY
+
+logger = logging.getLogger(__name__)
+
+# History tables, range-partitioned by month: table -> (partition key, key type,
+# expression filling a missing key when rows of an unpartitioned table are copied)
+PARTITIONED_TABLES: Dict[str, Tuple[str, str, str]] = {
+    "articles": ("published_at", "timestamptz", "coalesce(published_at, scraped_at, now())"),
+    "synthesized_articles": ("generated_at", "timestamptz", "coalesce(generated_at, now())"),
+    "user_interactions": ("created_at", "timestamptz", "coalesce(created_at, now())"),
+    "daily_summaries": ("date", "date", "coalesce(date, summary_generated_at::date, current_date)"),
+}
+
+# Tables referencing a partitioned table's ids. Foreign keys cannot point at
+# them (the unique key would have to include the partition key), so rows of
+# dropped partitions are cleaned up here instead. Interactions are deleted with
+# their story whichever month they are from
+DEPENDENTS: Dict[str, List[Tuple[str, str]]] = {
+    "articles": [("synthesized_sources", "article_id"), ("article_urls", "article_id")],
+    "synthesized_articles": [
+        ("synthesized_sources", "synthesized_id"),
+        ("user_interaction_keys", "synthesized_article_id"),
+        ("user_interactions", "synthesized_article_id"),
+    ],
+    "user_interactions": [("user_interaction_keys", "interaction_id")],
+}
+
+
+def default_partition(table):
+    """Creates `table`'s default partition with it, so rows always have somewhere to go."""
+    event.listen(table, "after_create", DDL(
+        f"CREATE TABLE IF NOT EXISTS {table.name}_default PARTITION OF {table.name} DEFAULT"
+    ))
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _partition_month(table: str, name: str):
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})", name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def _bound(kind: str, month: date) -> str:
+    # Month boundaries in UTC, whatever the session time zone
+    return f"'{month.isoformat()}'" if kind == "date" else f"'{month.isoformat()} 00:00:00+00'"
+
+
+def _month_of(kind: str, expression: str) -> str:
+    """SQL for the first day of the (UTC) month of `expression`."""
+    value = f"({expression})::timestamp" if kind == "date" else f"({expression}) AT TIME ZONE 'UTC'"
+    return f"date_trunc('month', {value})::date"
+
+
+async def _relkind(conn, table: str):
+    """'p' for a partitioned table, 'r' for a plain one, None if it does not exist."""
+    return (await conn.execute(
+        text("SELECT relkind::text FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    )).scalar()
+
+
+async def create_partition(conn, table: str, month: date) -> bool:
+    """
+    Creates `table`'s partition for `month` unless it exists. Rows for that
+    month already in the default partition are moved into it. Returns whether
+    it was created.
+    """
+    name = partition_name(table, month)
+    # Looked up where CREATE TABLE would put it
+    exists = await conn.execute(text("SELECT to_regclass(quote_ident(current_schema()) || '.' || :name)"), {"name": name})
+    if exists.scalar():
+        return False
+    column, kind, _ = PARTITIONED_TABLES[table]
+    bounds = f"FROM ({_bound(kind, month)}) TO ({_bound(kind, add_months(month, 1))})"
+    in_month = f'"{column}" >= {_bound(kind, month)} AND "{column}" < {_bound(kind, add_months(month, 1))}'
+
+    stray = (await conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE {in_month})"))).scalar()
+    if not stray:
+        await conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}"))
+    else:
+        await conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+        await conn.execute(text(
+            f"WITH moved AS (DELETE FROM {table}_default WHERE {in_month} RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ))
+        await conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    logger.info(f"Created partition {name}" + (" from rows in the default partition" if stray else ""))
+    return True
+
+
+async def ensure_partitions(conn, today: date = None) -> List[str]:
+    """
+    Creates the partitions of the current month and the next
+    PARTITION_PREMAKE_MONTHS for every partitioned table. Returns their names.
+    """
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    month = month_start(today or datetime.now(timezone.utc))
+    created = []
+    for table in PARTITIONED_TABLES:
+        if await _relkind(conn, table) != "p":
+            continue
+        for ahead in range(settings.PARTITION_PREMAKE_MONTHS + 1):
+            if await create_partition(conn, table, add_months(month, ahead)):
+                created.append(partition_name(table, add_months(month, ahead)))
+    return created
+
+
+async def partition_tables(conn) -> List[str]:
+    """
+    Converts PARTITIONED_TABLES that are still plain tables (databases created
+    before partitioning) into partitioned ones, then makes sure the upcoming
+    partitions exist. Conversion copies every row under an exclusive lock.
+    Returns the tables converted.
+    """
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    converted = []
+    for table, (column, kind, fill) in PARTITIONED_TABLES.items():
+        if await _relkind(conn, table) != "r":
+            continue
+        old = f"{table}_unpartitioned"
+        await conn.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+        # Foreign keys into the table go; then the old constraints and indexes,
+        # whose names the partitioned table reuses
+        foreign_keys = (await conn.execute(text(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE confrelid = to_regclass(:old) AND contype = 'f'"
+        ), {"old": old})).all()
+        for referencing, name in foreign_keys:
+            await conn.execute(text(f'ALTER TABLE {referencing} DROP CONSTRAINT "{name}"'))
+        constraints = (await conn.execute(text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:old) AND contype IN ('p', 'u', 'f')"
+        ), {"old": old})).scalars().all()
+        for name in constraints:
+            await conn.execute(text(f'ALTER TABLE {old} DROP CONSTRAINT "{name}"'))
+        indexes = (await conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :old"
+        ), {"old": old})).scalars().all()
+        for name in indexes:
+            await conn.execute(text(f'DROP INDEX "{name}"'))
+
+        await conn.run_sync(Base.metadata.tables[table].create)
+        months = (await conn.execute(text(f"SELECT DISTINCT {_month_of(kind, fill)} FROM {old}"))).scalars().all()
+        for month in sorted(months):
+            await create_partition(conn, table, month)
+
+        existing = set((await conn.execute(text(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :old"
+        ), {"old": old})).scalars().all())
+        columns = [c.name for c in Base.metadata.tables[table].columns if c.name in existing]
+        values = [fill if name == column else f'"{name}"' for name in columns]
+        quoted = ", ".join(f'"{name}"' for name in columns)
+        result = await conn.execute(text(f"INSERT INTO {table} ({quoted}) SELECT {', '.join(values)} FROM {old}"))
+        await conn.execute(text(f"DROP TABLE {old}"))
+        logger.info(f"Partitioned {table} by {column}: {result.rowcount} rows in {len(months)} monthly partitions")
+        converted.append(table)
+
+    await ensure_partitions(conn)
+    return converted
+
+
+async def _delete_dependents(conn, table: str, ids_sql: str):
+    for dependent, column in DEPENDENTS.get(table, []):
+        await conn.execute(text(f"DELETE FROM {dependent} WHERE {column} IN ({ids_sql})"))
+
+
+async def apply_retention(conn, today: date = None, policies: dict = None) -> List[str]:
+    """
+    Applies RETENTION_POLICIES: partitions of months before the cutoff are
+    dropped, or detached and moved to RETENTION_ARCHIVE_SCHEMA; rows before the
+    cutoff in the default partition are deleted or moved there too. Returns
+    the partitions retired.
+    """
+    policies = policies if policies is not None else settings.RETENTION_POLICIES
+    archive = settings.RETENTION_ARCHIVE_SCHEMA
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    month = month_start(today or datetime.now(timezone.utc))
+
+    retired = []
+    for table, (action, months) in policies.items():
+        if action == "keep":
+            continue
+        if table not in PARTITIONED_TABLES or action not in ("drop", "archive") or months < 1:
+            raise ValueError(f"Invalid retention policy for {table}: {action}:{months}")
+        if await _relkind(conn, table) != "p":
+            continue
+        column, kind, _ = PARTITIONED_TABLES[table]
+        cutoff = add_months(month, -months)
+        retired_here = []
+
+        partitions = (await conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ), {"table": table})).scalars().all()
+        for name in sorted(partitions):
+            partition_month = _partition_month(table, name)
+            if partition_month is None or partition_month >= cutoff:
+                continue
+            if action == "drop":
+                await _delete_dependents(conn, table, f"SELECT id FROM {name}")
+                await conn.execute(text(f"DROP TABLE {name}"))
+            else:
+                await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive}"))
+                await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive}"))
+            retired_here.append(name)
+
+        # Old rows that never had a monthly partition
+        expired = f'"{column}" < {_bound(kind, cutoff)}'
+        rows = 0
+        if (await conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE {expired})"))).scalar():
+            if action == "drop":
+                await _delete_dependents(conn, table, f"SELECT id FROM {table}_default WHERE {expired}")
+                result = await conn.execute(text(f"DELETE FROM {table}_default WHERE {expired}"))
+            else:
+                await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive}"))
+                await conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {archive}.{table}_default (LIKE {table} INCLUDING DEFAULTS)"
+                ))
+                result = await conn.execute(text(
+                    f"WITH moved AS (DELETE FROM {table}_default WHERE {expired} RETURNING *) "
+                    f"INSERT INTO {archive}.{table}_default SELECT * FROM moved"
+                ))
+            rows = result.rowcount
+        if retired_here or rows:
+            logger.info(f"Retention ({action} before {cutoff}) on {table}: {len(retired_here)} partitions, "
+                        f"{rows} rows from {table}_default")
+        retired += retired_here
+    return retired
+
+
+async def maintain_partitions(conn) -> dict:
+    """The partition_maintenance job: upcoming partitions, then retention."""
+    created = await ensure_partitions(conn)
+    retired = await apply_retention(conn)
+    return {"created": created, "retired": retired}
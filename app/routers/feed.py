@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Any
+from typing import List, Any, Optional
 
-from app.database import get_db
-from app.services.feed_service import FeedService
+from app.database import get_read_db
+from app.http_cache import conditional_response, make_etag
+from app.services.feed_service import FeedService, feed_epoch
 from app.routers.users import get_current_user_id
 
 router = APIRouter(prefix="/feed", tags=["feed"])
@@ -12,16 +13,34 @@ from app.schemas.article import ArticleResponse
 
 @router.get("", response_model=List[ArticleResponse]) # Use a proper schema for Article response
 async def get_feed(
+    request: Request,
     skip: int = 0,
     limit: int = 20,
+    epoch: Optional[int] = None,
     user_id: str = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
+    # Clients paging through the feed send back the X-Feed-Epoch of the first
+    # page, so later pages come from the same draw even after the epoch ends
+    current = feed_epoch()
+    epoch = current if epoch is None else min(epoch, current)
+
+    # The ETag comes from the versions the page depends on, so an unchanged
+    # page is answered (304, or from the payload cache) without ranking it
+    feed_service = FeedService(db)
+    version = await feed_service.get_feed_version(user_id, epoch)
+    etag = make_etag("feed", user_id, epoch, skip, limit, *version)
+    return await conditional_response(
+        request, etag, lambda: _build_feed(db, feed_service, user_id, skip, limit, epoch),
+        headers={"X-Feed-Epoch": str(epoch)}
+    )
+
+
+async def _build_feed(db: AsyncSession, feed_service: FeedService, user_id: str, skip: int, limit: int, epoch: int):
     from app.models.interaction import UserInteraction
     from sqlalchemy.future import select
 
-    feed_service = FeedService(db)
-    articles = await feed_service.get_personalized_feed(user_id, limit=limit, skip=skip)
+    articles = await feed_service.get_personalized_feed(user_id, limit=limit, skip=skip, epoch=epoch)
 
     # Fetch user interactions for these articles
     article_ids = [article.id for article in articles]
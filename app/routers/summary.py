@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
+import json
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.http_cache import conditional_response, make_etag
 from app.services.summary_service import SummaryService
+from app.services.llm_gateway import LLMUnavailableError, get_gateway
 from app.routers.users import get_current_user_id
 import logging
 
@@ -14,6 +18,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/summary", tags=["summary"])
 
+# Disable proxy buffering so tokens reach the client as they are generated
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 from typing import List, Optional, Any
 # ...
 class SummaryResponse(BaseModel):
@@ -25,25 +32,35 @@ class SummaryResponse(BaseModel):
 
 @router.get("/today", response_model=SummaryResponse)
 async def get_today_summary(
+    request: Request,
     user_id: str = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     logger.info(f"get_today_summary called for user {user_id}")
     try:
         service = SummaryService(db)
-        summary = await service.get_daily_summary(user_id)
+        # A summary is replaced rather than rewritten, so its id and status
+        # version it; the text is only loaded when the client lacks it
+        version = await service.get_daily_summary_version(user_id)
 
-        if not summary:
+        if not version:
             logger.info(f"No summary found for user {user_id} (returning 404)")
             raise HTTPException(status_code=404, detail="No daily summary found.")
 
-        return SummaryResponse(
-            id=summary.id,
-            summary_text=summary.summary_text,
-            generated_at=summary.summary_generated_at,
-            article_ids=summary.article_ids,
-            status=summary.status
-        )
+        async def build():
+            summary = await service.get_daily_summary(user_id, summary_id=version[0])
+            if not summary:
+                # Replaced since the version was read
+                raise HTTPException(status_code=404, detail="No daily summary found.")
+            return SummaryResponse(
+                id=summary.id,
+                summary_text=summary.summary_text,
+                generated_at=summary.summary_generated_at,
+                article_ids=summary.article_ids,
+                status=summary.status
+            )
+
+        return await conditional_response(request, make_etag("summary", user_id, *version), build)
     except HTTPException:
         raise
     except Exception as e:
@@ -53,11 +70,12 @@ async def get_today_summary(
 @router.post("/today", response_model=SummaryResponse)
 async def generate_today_summary(
     user_id: str = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db)
 ):
     logger.info(f"generate_today_summary called for user {user_id}")
     try:
-        service = SummaryService(db)
+        service = SummaryService(db, read_db)
         # Check if there's an existing summary
         existing_summary = await service.get_daily_summary(user_id)
         
@@ -89,6 +107,12 @@ async def generate_today_summary(
                 await db.delete(existing_summary)
                 await db.commit()
 
+        # Fail fast while the LLM circuit is open instead of queuing behind a dead backend
+        try:
+            get_gateway().check_available()
+        except LLMUnavailableError as e:
+            raise _unavailable(user_id, e)
+
         # Create a pending placeholder before starting generation
         from app.models.summary import DailySummary
         from datetime import date
@@ -104,7 +128,12 @@ async def generate_today_summary(
         await db.refresh(pending_summary)
 
         # Generate the actual summary
-        summary = await service.generate_daily_summary(user_id)
+        try:
+            summary = await service.generate_daily_summary(user_id)
+        except LLMUnavailableError as e:
+            await db.delete(pending_summary)
+            await db.commit()
+            raise _unavailable(user_id, e)
 
         if not summary:
             # Generation failed - delete pending record
@@ -128,3 +157,91 @@ async def generate_today_summary(
     except Exception as e:
         logger.error(f"Error in generate_today_summary: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+def _unavailable(user_id: str, error: LLMUnavailableError) -> HTTPException:
+    logger.warning(f"Summary generation unavailable for user {user_id}: {error}")
+    return HTTPException(
+        status_code=503,
+        detail="Summary service is busy. Please try again shortly.",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.get("/today/stream")
+async def stream_today_summary(
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Server-Sent Events variant of POST /summary/today.
+    Emits "token" events while the briefing is generated and a final "done"
+    event with the stored summary (or "error" if generation failed).
+    """
+    logger.info(f"stream_today_summary called for user {user_id}")
+    service = SummaryService(db, read_db)
+    existing_summary = await service.get_daily_summary(user_id)
+
+    if existing_summary:
+        if existing_summary.status == "pending":
+            from datetime import timedelta
+            stale_threshold = datetime.utcnow() - timedelta(minutes=10)
+            if existing_summary.summary_generated_at.replace(tzinfo=None) >= stale_threshold:
+                raise HTTPException(status_code=202, detail="Summary generation already in progress")
+            logger.warning(f"Stale pending summary for user {user_id} (>10 min). Deleting.")
+            await db.delete(existing_summary)
+            await db.commit()
+        elif existing_summary.status == "completed":
+            completed = SummaryResponse(
+                id=existing_summary.id,
+                summary_text=existing_summary.summary_text,
+                generated_at=existing_summary.summary_generated_at,
+                article_ids=existing_summary.article_ids,
+                status=existing_summary.status
+            )
+
+            async def replay():
+                yield _sse_event("done", completed.model_dump(mode="json"))
+
+            return StreamingResponse(replay(), media_type="text/event-stream", headers=SSE_HEADERS)
+        else:
+            logger.info(f"Previous summary failed for user {user_id}. Deleting for retry.")
+            await db.delete(existing_summary)
+            await db.commit()
+
+    try:
+        get_gateway().check_available()
+    except LLMUnavailableError as e:
+        raise _unavailable(user_id, e)
+
+    # Pending placeholder so concurrent POST/stream requests see the generation in progress
+    from app.models.summary import DailySummary
+    from datetime import date
+    pending_summary = DailySummary(
+        user_id=user_id,
+        article_ids=[],
+        summary_text={"status": "generating"},
+        date=date.today(),
+        status="pending"
+    )
+    db.add(pending_summary)
+    await db.commit()
+    await db.refresh(pending_summary)
+
+    # The request-scoped session is closed once this handler returns; AsyncSession
+    # transparently checks out a new connection when the stream uses it again.
+    async def event_stream():
+        try:
+            async for event, data in service.stream_daily_summary(user_id):
+                yield _sse_event(event, data)
+        except Exception as e:
+            logger.error(f"Error in stream_today_summary: {e}", exc_info=True)
+            yield _sse_event("error", {"detail": "Internal Server Error"})
+        finally:
+            await db.delete(pending_summary)
+            await db.commit()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
 
 from app.database import get_db
+from app.http_cache import conditional_response, make_etag
 from app.schemas.preferences import PreferencesUpdate, PreferencesResponse
 from app.services.user_service import UserService
 from app.utils.security import settings
@@ -30,12 +31,18 @@ router = APIRouter(prefix="/me", tags=["users"])
 
 @router.get("/preferences", response_model=PreferencesResponse)
 async def get_preferences(
+    request: Request,
     user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
     user_service = UserService(db)
-    prefs, meta = await user_service.get_user_preferences(user_id)
-    return {"interests_vector": prefs, "metadata": meta}
+    version = await user_service.get_preferences_version(user_id)
+
+    async def build():
+        prefs, meta = await user_service.get_user_preferences(user_id)
+        return {"interests_vector": prefs, "metadata": meta}
+
+    return await conditional_response(request, make_etag("preferences", user_id, version), build)
 
 @router.post("/preferences", response_model=PreferencesResponse)
 async def update_preferences(
@@ -101,7 +108,7 @@ async def get_current_user_profile(
     }
 
 from app.schemas.user import UserPasswordUpdate
-from app.utils.security import verify_password, get_password_hash
+from app.utils.security import verify_password_async, get_password_hash_async
 
 @router.post("/password")
 async def update_password(
@@ -115,10 +122,10 @@ async def update_password(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    if not verify_password(data.current_password, user.hashed_password):
+    if not await verify_password_async(data.current_password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect current password")
 
-    user.hashed_password = get_password_hash(data.new_password)
+    user.hashed_password = await get_password_hash_async(data.new_password)
     # No need to add to session if fetched from it, just commit
     await db.commit()
 
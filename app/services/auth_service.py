@@ -3,7 +3,7 @@ from sqlalchemy.future import select
 from fastapi import HTTPException, status
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin
-from app.utils.security import get_password_hash, verify_password, create_access_token
+from app.utils.security import get_password_hash_async, verify_password_async, password_needs_rehash
 
 class AuthService:
     def __init__(self, db: AsyncSession):
@@ -21,7 +21,7 @@ class AuthService:
         # Create user
         db_user = User(
             email=user_in.email,
-            hashed_password=get_password_hash(user_in.password),
+            hashed_password=await get_password_hash_async(user_in.password),
             name=user_in.name
         )
         self.db.add(db_user)
@@ -35,7 +35,12 @@ class AuthService:
         
         if not user:
             return None
-        if not verify_password(user_in.password, user.hashed_password):
+        if not await verify_password_async(user_in.password, user.hashed_password):
             return None
-        
+
+        # Move the hash to the current work factor while we have the plaintext
+        if password_needs_rehash(user.hashed_password):
+            user.hashed_password = await get_password_hash_async(user_in.password)
+            await self.db.commit()
+
         return user
@@ -0,0 +1,109 @@
+import logging
+import math
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    - closed: calls pass; `failure_threshold` consecutive failures open the circuit.
+    - open: calls are refused until `reset_timeout` seconds have passed.
+    - half_open: a single probe call is let through; its success closes the
+      circuit, its failure opens it again for another `reset_timeout`.
+
+    The breaker only counts outcomes; callers decide which errors are failures.
+    Not thread-safe: meant to be used from the event loop that owns it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        # Metrics
+        self._times_opened = 0
+        self._rejected = 0
+        self._last_failure = None
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            logger.info(f"Circuit '{self.name}' half-open: probing backend")
+        return self._state
+
+    def is_available(self) -> bool:
+        """Whether a call would currently be let through (no side effects)."""
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self._probe_in_flight)
+
+    def allow_request(self) -> bool:
+        """Admits a call, claiming the probe slot when half-open."""
+        if not self.is_available():
+            self._rejected += 1
+            return False
+        if self._state == self.HALF_OPEN:
+            self._probe_in_flight = True
+        return True
+
+    def retry_after(self) -> int:
+        """Seconds until the circuit will next let a probe through."""
+        if self._state != self.OPEN:
+            return 1
+        return max(1, math.ceil(self.reset_timeout - (self._clock() - self._opened_at)))
+
+    def record_success(self):
+        if self._state != self.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed: backend recovered")
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, error: BaseException = None):
+        self._consecutive_failures += 1
+        self._last_failure = type(error).__name__ if error is not None else None
+        self._probe_in_flight = False
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self._times_opened += 1
+                logger.warning(
+                    f"Circuit '{self.name}' open for {self.reset_timeout:.0f}s after "
+                    f"{self._consecutive_failures} consecutive failures (last: {self._last_failure})"
+                )
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+
+    def record_ignored(self):
+        """The call ended without telling us anything about the backend (e.g. cancelled)."""
+        self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._consecutive_failures,
+            "times_opened": self._times_opened,
+            "rejected": self._rejected,
+            "last_failure": self._last_failure,
+            "retry_after_seconds": self.retry_after() if state == self.OPEN else 0,
+        }
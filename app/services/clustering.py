@@ -0,0 +1,307 @@
+import math
+import logging
+from datetime import datetime, timezone
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, Hashable, Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+from sklearn.cluster import KMeans
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_rows(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    """L2-normalizes category vectors so Euclidean distance tracks cosine similarity."""
+    matrix = np.asarray(vectors, dtype=float)
+    if matrix.size == 0:
+        return matrix.reshape(0, 0)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class ClusterState:
+    """
+    Centroids and memberships carried over between clustering runs.
+
+    New articles are assigned to the nearest existing centroid when it is
+    within `max_distance`, and the centroid moves by a running mean (the
+    MiniBatchKMeans update rule). Articles far from every centroid seed new
+    clusters with a KMeans fit over those outliers only, so the cost of a run
+    is proportional to the new articles rather than to the whole window.
+    """
+
+    def __init__(self, max_distance: float = 0.35, target_size: int = 5):
+        self.max_distance = max_distance
+        self.target_size = target_size
+        self.centroids: Dict[int, np.ndarray] = {}
+        self.counts: Dict[int, int] = {}
+        self.members: Dict[str, int] = {}
+        self.next_label = 0
+        self.updated_at = None
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_dict(cls, data: dict, **kwargs) -> "ClusterState":
+        """Rebuilds the state saved by to_dict (an empty one for no data)."""
+        state = cls(**kwargs)
+        if not data:
+            return state
+        state.centroids = {int(label): np.asarray(c, dtype=float) for label, c in data["centroids"].items()}
+        state.counts = {int(label): int(n) for label, n in data["counts"].items()}
+        state.members = {article_id: int(label) for article_id, label in data["members"].items()}
+        state.next_label = int(data.get("next_label", max(state.centroids, default=-1) + 1))
+        state.updated_at = data.get("updated_at")
+        return state
+
+    def to_dict(self) -> dict:
+        return {
+            "centroids": {str(label): c.round(6).tolist() for label, c in self.centroids.items()},
+            "counts": {str(label): n for label, n in self.counts.items()},
+            "members": self.members,
+            "next_label": self.next_label,
+            "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def retain(self, article_ids: Set[str]):
+        """Forgets articles that left the window and clusters left without members."""
+        self.members = {a: label for a, label in self.members.items() if a in article_ids}
+        alive = set(self.members.values())
+        for label in list(self.centroids):
+            if label not in alive:
+                del self.centroids[label]
+                del self.counts[label]
+
+    def _new_cluster(self, centroid: np.ndarray) -> int:
+        label = self.next_label
+        self.next_label += 1
+        self.centroids[label] = centroid
+        self.counts[label] = 0
+        return label
+
+    def _add_member(self, article_id: str, label: int, vector: np.ndarray):
+        self.members[article_id] = label
+        self.counts[label] += 1
+        self.centroids[label] = self.centroids[label] + (vector - self.centroids[label]) / self.counts[label]
+
+    def assign(self, article_ids: List[str], vectors: Sequence[Sequence[float]]) -> Set[int]:
+        """
+        Adds new articles to the clusters. Returns the labels whose membership
+        changed. Articles that are already members are ignored.
+        """
+        pending = [(a, v) for a, v in zip(article_ids, normalize_rows(vectors)) if a not in self.members]
+        if not pending:
+            return set()
+
+        changed: Set[int] = set()
+        outliers = []
+        if self.centroids:
+            labels = list(self.centroids)
+            centroid_matrix = np.stack([self.centroids[label] for label in labels])
+            for article_id, vector in pending:
+                distances = np.linalg.norm(centroid_matrix - vector, axis=1)
+                nearest = int(np.argmin(distances))
+                if distances[nearest] <= self.max_distance:
+                    self._add_member(article_id, labels[nearest], vector)
+                    changed.add(labels[nearest])
+                else:
+                    outliers.append((article_id, vector))
+        else:
+            outliers = pending
+
+        if outliers:
+            changed |= self._seed(outliers)
+        return changed
+
+    def _seed(self, outliers) -> Set[int]:
+        """Fits fresh clusters over articles that matched no existing centroid."""
+        vectors = np.stack([v for _, v in outliers])
+        k = max(1, min(len(outliers), math.ceil(len(outliers) / self.target_size)))
+        if k == 1:
+            assignments = np.zeros(len(outliers), dtype=int)
+            centers = vectors.mean(axis=0, keepdims=True)
+        else:
+            kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
+            assignments = kmeans.fit_predict(vectors)
+            centers = kmeans.cluster_centers_
+
+        new_labels = {i: self._new_cluster(np.asarray(center)) for i, center in enumerate(centers)}
+        for (article_id, vector), assignment in zip(outliers, assignments):
+            label = new_labels[int(assignment)]
+            # Start the running mean from the members rather than the fitted center
+            if self.counts[label] == 0:
+                self.centroids[label] = vector.copy()
+                self.counts[label] = 1
+                self.members[article_id] = label
+            else:
+                self._add_member(article_id, label, vector)
+        return set(new_labels.values())
+
+    def clusters(self) -> Dict[int, List[str]]:
+        grouped: Dict[int, List[str]] = {}
+        for article_id, label in self.members.items():
+            grouped.setdefault(label, []).append(article_id)
+        return grouped
+
+
+def cosine_similarity_matrix(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    normalized = normalize_rows(vectors)
+    if normalized.size == 0:
+        return np.zeros((0, 0))
+    return normalized @ normalized.T
+
+
+def balanced_groups(
+    similarity: np.ndarray,
+    min_size: int = 3,
+    max_size: int = 5,
+    min_similarity: float = 0.9,
+) -> Tuple[List[List[int]], List[int]]:
+    """
+    Greedy size-constrained grouping over a pairwise similarity matrix.
+
+    Repeatedly seeds a group at the item with the most unassigned neighbours
+    above `min_similarity`, then adds the seed's closest neighbours while every
+    pair in the group stays above the floor (complete linkage), up to
+    `max_size`. Groups smaller than `min_size` are not formed; items that end
+    up in no group are returned as leftovers instead of being forced together.
+
+    Returns (groups, leftovers) as lists of row indices.
+    """
+    n = similarity.shape[0]
+    above = similarity >= min_similarity
+    np.fill_diagonal(above, False)
+
+    unassigned = np.ones(n, dtype=bool)
+    can_seed = np.ones(n, dtype=bool)
+    groups: List[List[int]] = []
+
+    while True:
+        neighbour_counts = (above & unassigned).sum(axis=1)
+        neighbour_counts[~(unassigned & can_seed)] = -1
+        seed = int(np.argmax(neighbour_counts)) if n else 0
+        if n == 0 or neighbour_counts[seed] < min_size - 1:
+            break
+
+        candidates = np.flatnonzero(above[seed] & unassigned)
+        candidates = candidates[np.argsort(-similarity[seed, candidates], kind="stable")]
+        group = [seed]
+        for candidate in candidates:
+            if len(group) >= max_size:
+                break
+            if above[candidate, group].all():
+                group.append(int(candidate))
+
+        if len(group) >= min_size:
+            groups.append(group)
+            unassigned[group] = False
+        else:
+            # Its neighbours are not similar enough to each other; it may still join another group
+            can_seed[seed] = False
+
+    return groups, [int(i) for i in np.flatnonzero(unassigned)]
+
+
+def group_cohesion(similarity: np.ndarray, group: Sequence[int]) -> float:
+    """Mean pairwise similarity inside a group (1.0 for a single item)."""
+    if len(group) < 2:
+        return 1.0
+    block = similarity[np.ix_(group, group)]
+    return float((block.sum() - np.trace(block)) / (len(group) * (len(group) - 1)))
+
+
+class EntityIndex:
+    """
+    Inverted index from named entity to the recent articles mentioning it.
+
+    Entities are weighted by inverse document frequency, and entities in more
+    than `max_share` of the articles (e.g. "United States") are ignored: they
+    say nothing about whether two articles cover the same event.
+    """
+
+    def __init__(self, max_share: float = 0.2, min_common_count: int = 3):
+        self.max_share = max_share
+        self.min_common_count = min_common_count
+        self._postings: Dict[str, Set[Hashable]] = defaultdict(set)
+        self._entities: Dict[Hashable, Set[str]] = {}
+
+    def add(self, key: Hashable, entities: Iterable[str]):
+        entities = set(entities)
+        for entity in self._entities.get(key, set()) - entities:
+            self._postings[entity].discard(key)
+        self._entities[key] = entities
+        for entity in entities:
+            self._postings[entity].add(key)
+
+    def _is_informative(self, entity: str) -> bool:
+        df = len(self._postings.get(entity, ()))
+        return 0 < df <= max(self.min_common_count, self.max_share * len(self._entities))
+
+    def idf(self, entity: str) -> float:
+        df = len(self._postings.get(entity, ()))
+        if not df:
+            return 0.0
+        return math.log(1 + len(self._entities) / df)
+
+    def similarity_matrix(self, keys: Sequence[Hashable]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        IDF-weighted Jaccard similarity of the informative entities of `keys`,
+        computed through the postings (only pairs sharing an entity are touched).
+        Returns (similarity, has_entities); rows without informative entities
+        have has_entities False.
+        """
+        n = len(keys)
+        position = {key: i for i, key in enumerate(keys)}
+        shared = np.zeros((n, n))
+        totals = np.zeros(n)
+
+        entities = {e for key in keys for e in self._entities.get(key, ()) if self._is_informative(e)}
+        for entity in entities:
+            weight = self.idf(entity)
+            rows = sorted(position[k] for k in self._postings[entity] if k in position)
+            totals[rows] += weight
+            for a, b in combinations(rows, 2):
+                shared[a, b] += weight
+                shared[b, a] += weight
+
+        union = totals[:, None] + totals[None, :] - shared
+        similarity = np.divide(shared, union, out=np.zeros_like(shared), where=union > 0)
+        np.fill_diagonal(similarity, 1.0)
+        return similarity, totals > 0
+
+    def __len__(self):
+        return len(self._entities)
+
+    def __contains__(self, key):
+        return key in self._entities
+
+
+def entity_aware_similarity(
+    vector_similarity: np.ndarray,
+    entity_similarity: np.ndarray,
+    has_entities: np.ndarray,
+    entity_weight: float = 0.2,
+    min_entity_similarity: float = 0.1,
+) -> np.ndarray:
+    """
+    Combines category-vector and entity similarity for balanced_groups.
+
+    Pairs where both articles name entities but share (almost) none are set
+    to 0: a matching category distribution alone does not make them the same
+    story. Other pairs get the vector similarity plus `entity_weight` times
+    their entity similarity, so shared entities pull borderline pairs over the
+    grouping floor. Pairs lacking entities fall back to the vector similarity.
+    """
+    both = np.outer(has_entities, has_entities)
+    combined = vector_similarity + entity_weight * np.where(both, entity_similarity, 0.0)
+    combined[both & (entity_similarity < min_entity_similarity)] = 0.0
+    np.fill_diagonal(combined, 1.0)
+    return combined
@@ -1,6 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.models.article import Article
+from app.models.article import Article, ArticleStage, ArticleUrl
 from app.services.nlp_service import NLPService
 from datetime import datetime
 import uuid
@@ -12,14 +12,15 @@ class ContentService:
 
     async def ingest_article(self, title: str, content: str, source_url: str, publisher: str):
         # Check if exists
-        result = await self.db.execute(select(Article).where(Article.source_url == source_url))
-        if result.scalar_one_or_none():
+        result = await self.db.execute(select(Article.id).where(Article.source_url == source_url).limit(1))
+        if result.first():
             return None # Already exists
 
         # Classify
         category_scores = await self.nlp_service.classify_article(content)
 
         article = Article(
+            id=uuid.uuid4(),
             title=title,
             content=content,
             source_url=source_url,
@@ -27,6 +28,11 @@ class ContentService:
             published_at=datetime.utcnow(),
             category_scores=category_scores
         )
+        if category_scores is not None:
+            article.set_stage(ArticleStage.CLASSIFIED)
+        if not await ArticleUrl.claim(self.db, source_url, article.id):
+            await self.db.rollback()
+            return None # Stored concurrently
         self.db.add(article)
         await self.db.commit()
         await self.db.refresh(article)
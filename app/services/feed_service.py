@@ -1,55 +1,128 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import desc, func
-from datetime import date, datetime, timedelta
+from sqlalchemy import desc, exists, func
+from datetime import date, datetime, timedelta, timezone
+from app.config import settings
 from app.models.synthesized_article import SynthesizedArticle
 from app.models.article import Article
 from app.services.user_service import UserService
 from typing import List
+import hashlib
 import logging
+import random
 
 logger = logging.getLogger(__name__)
 
+def feed_epoch(now: datetime = None) -> int:
+    """Number of the FEED_EPOCH_MINUTES period `now` (default: now) falls in."""
+    now = now or datetime.now(timezone.utc)
+    return int(now.timestamp() // (settings.FEED_EPOCH_MINUTES * 60))
+
+
+def epoch_started(epoch: int) -> datetime:
+    return datetime.fromtimestamp(epoch * settings.FEED_EPOCH_MINUTES * 60, timezone.utc)
+
+
+def _sampler(user_id, epoch: int, block: int) -> random.Random:
+    # Seeded from a digest rather than hash(), which differs between worker processes
+    digest = hashlib.blake2b(f"{user_id}:{epoch}:{block}".encode(), digest_size=8).digest()
+    return random.Random(int.from_bytes(digest, "big"))
+
+
 class FeedService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.user_service = UserService(db)
 
-    async def get_personalized_feed(self, user_id, limit=20, skip=0) -> List[SynthesizedArticle]:
-        import random
-
-        # Get user preferences
-        prefs, _ = await self.user_service.get_user_preferences(user_id)
-
+    async def get_personalized_feed(self, user_id, limit=20, skip=0, epoch: int = None) -> List[SynthesizedArticle]:
+        """
+        The user's feed: articles ranked by the epoch's copy of the user's
+        preferences, in blocks of 50, each shuffled by the 70/20/10
+        best/mid/rest sampling with a generator seeded by user, feed epoch and
+        block. Pages are slices of that sequence, so they do not overlap and a
+        request repeated within the epoch gets the same page.
+        """
         from app.models.interaction import UserInteraction
 
-        # Subquery for articles the user has interacted with
-        interacted_subquery = select(UserInteraction.synthesized_article_id).where(
-            UserInteraction.user_id == user_id
+        epoch = feed_epoch() if epoch is None else epoch
+        # Fixed for the epoch: ranking by the live preferences would reshuffle
+        # every page after each interaction
+        prefs = await self.user_service.get_feed_preferences(user_id, epoch)
+        epoch_start = epoch_started(epoch)
+        # Both tables are partitioned by month: bounding them by the feed window
+        # keeps these queries on the recent partitions
+        since = epoch_start - timedelta(days=settings.FEED_WINDOW_DAYS)
+
+        # Articles the user interacted with before the epoch, as an anti-join.
+        # NOT IN could not be planned as one: once the user's history outgrew
+        # work_mem it was rescanned for every candidate (and a NULL id emptied
+        # the feed). Interactions with articles in the window are at least as
+        # recent as the articles, except for stories updated since (which may
+        # then show up again)
+        interacted = exists().where(
+            UserInteraction.user_id == user_id,
+            UserInteraction.synthesized_article_id == SynthesizedArticle.id,
+            UserInteraction.created_at >= since,
+            UserInteraction.created_at < epoch_start
         )
 
         if not prefs:
             result = await self.db.execute(
                 select(SynthesizedArticle)
-                .where(SynthesizedArticle.id.not_in(interacted_subquery))
-                .order_by(SynthesizedArticle.generated_at.desc())
+                .where(SynthesizedArticle.generated_at >= since, ~interacted)
+                .order_by(SynthesizedArticle.generated_at.desc(), SynthesizedArticle.id)
                 .offset(skip)
                 .limit(limit)
             )
-            return result.scalars().all()
+            articles = result.scalars().all()
+        else:
+            # Sampling pool per block (buckets are 10, 10, and rest)
+            pool_limit = 50
+            stmt = select(SynthesizedArticle).where(
+                SynthesizedArticle.generated_at >= since,
+                ~interacted
+            ).order_by(
+                SynthesizedArticle.category_scores.cosine_distance(prefs),
+                SynthesizedArticle.id
+            )
 
-        # Fetch a larger pool for randomness (buckets are 10, 10, and rest)
-        # We need enough items to satisfy the request even if we hit the 'rest' bucket often or run out of 'best'
-        pool_limit = 50
-        stmt = select(SynthesizedArticle).where(
-            SynthesizedArticle.id.not_in(interacted_subquery)
-        ).order_by(
-            SynthesizedArticle.category_scores.cosine_distance(prefs)
-        ).offset(skip).limit(pool_limit)
+            first_block = skip // pool_limit
+            feed = []
+            for block in range(first_block, (skip + limit - 1) // pool_limit + 1):
+                result = await self.db.execute(stmt.offset(block * pool_limit).limit(pool_limit))
+                ordered_articles = result.scalars().all()
+                feed += self._sample(ordered_articles, _sampler(user_id, epoch, block))
+                if len(ordered_articles) < pool_limit:
+                    break
+            start = skip - first_block * pool_limit
+            articles = feed[start:start + limit]
+
+        # Interactions during the epoch leave the page but not the sampling
+        # pool, so later pages of the epoch stay aligned with earlier ones
+        result = await self.db.execute(
+            select(UserInteraction.synthesized_article_id).where(
+                UserInteraction.user_id == user_id,
+                UserInteraction.created_at >= epoch_start
+            )
+        )
+        interacted_now = set(result.scalars().all())
+        return [article for article in articles if article.id not in interacted_now]
 
-        result = await self.db.execute(stmt)
-        ordered_articles = result.scalars().all()
+    async def get_feed_version(self, user_id, epoch: int) -> tuple:
+        """
+        What the user's feed in `epoch` depends on besides the epoch itself:
+        their preferences version (bumped by every interaction too) and the
+        newest synthesized article of the window (new and updated stories).
+        """
+        since = epoch_started(epoch) - timedelta(days=settings.FEED_WINDOW_DAYS)
+        version = await self.user_service.get_preferences_version(user_id)
+        result = await self.db.execute(
+            select(func.max(SynthesizedArticle.generated_at)).where(SynthesizedArticle.generated_at >= since)
+        )
+        return version, result.scalar()
 
+    def _sample(self, ordered_articles, rng: random.Random) -> List[SynthesizedArticle]:
+        """Orders a ranked pool by drawing from its best/mid/rest buckets with `rng`."""
         # Determine buckets (BUCKET_SIZE = 10 from experiment)
         BUCKET_SIZE = 10
 
@@ -59,12 +132,9 @@ class FeedService:
 
         feed = []
 
-        # Select 'limit' articles
-        for _ in range(limit):
-            if not (best or mid or rest):
-                break # No more articles available
-
-            r = random.random()
+        # Draw every article of the pool
+        for _ in range(len(ordered_articles)):
+            r = rng.random()
 
             # Select Target Bucket based on probabilities
             # Adjusted to 70% Best, 20% Mid, 10% Rest to encourage exploration ("every now and then")
@@ -98,7 +168,7 @@ class FeedService:
 
             # Pick one randomly from the selected pool
             if pool:
-                article = random.choice(pool)
+                article = rng.choice(pool)
                 feed.append(article)
                 pool.remove(article)
 
@@ -120,7 +190,7 @@ class FeedService:
             # Fallback to latest published in last 24h
             result = await self.db.execute(
                 select(Article)
-                .where(Article.published_at >= cutoff_time)
+                .where(Article.published_at >= cutoff_time, Article.category_scores.is_not(None))
                 .order_by(Article.published_at.desc())
                 .limit(limit)
             )
@@ -130,7 +200,8 @@ class FeedService:
 
         # Strict similarity sort, filtered by last 24h
         stmt = select(Article).where(
-            Article.published_at >= cutoff_time
+            Article.published_at >= cutoff_time,
+            Article.category_scores.is_not(None)
         ).order_by(
             Article.category_scores.cosine_distance(prefs)
         ).limit(limit)
@@ -1,8 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 import numpy as np
+import uuid
+from sqlalchemy import update
 from sqlalchemy.future import select
-from app.models.interaction import UserInteraction
+from app.models.interaction import UserInteraction, UserInteractionKey
 from app.models.synthesized_article import SynthesizedArticle
 from app.services.user_service import UserService
 
@@ -19,13 +21,22 @@ class FeedbackService:
         synth_article = result.scalar_one_or_none()
 
         if synth_article:
-            # Check if interaction already exists
-            stmt = select(UserInteraction).where(
-                UserInteraction.user_id == user_id,
-                UserInteraction.synthesized_article_id == article_id
-            )
-            result = await self.db.execute(stmt)
-            existing_interaction = result.scalar_one_or_none()
+            # Check if interaction already exists; the key row serializes
+            # concurrent first interactions with the same article
+            new_id = uuid.uuid4()
+            interaction_id = await UserInteractionKey.claim(self.db, user_id, article_id, new_id)
+            existing_interaction = None
+            if interaction_id != new_id:
+                result = await self.db.execute(select(UserInteraction).where(UserInteraction.id == interaction_id))
+                existing_interaction = result.scalars().first()
+                if existing_interaction is None:
+                    # Its partition was archived: the key moves to the new interaction
+                    await self.db.execute(
+                        update(UserInteractionKey).where(
+                            UserInteractionKey.user_id == user_id,
+                            UserInteractionKey.synthesized_article_id == article_id
+                        ).values(interaction_id=new_id)
+                    )
 
             if existing_interaction:
                 # Update existing
@@ -45,6 +56,7 @@ class FeedbackService:
 
             # Create new
             interaction = UserInteraction(
+                id=new_id,
                 user_id=user_id,
                 synthesized_article_id=article_id,
                 is_liked=is_liked
@@ -69,10 +81,12 @@ class FeedbackService:
              article_obj = res.scalar_one_or_none()
 
         if not article_obj or article_obj.category_scores is None:
+            # The interaction still changed what the feed shows
+            await self.user_service.bump_preferences_version(user_id)
             return
 
         # 1. Construct Article Full Vector (15 dims)
-        article_cat_vec = np.array([float(x) for x in article_obj.category_scores])
+        article_cat_vec = np.asarray(article_obj.category_scores, dtype=float)
 
         # Metadata defaults if missing
         default_meta = {"Length": 0.5, "Complexity": 0.5, "Neutral": 0.5, "Informative": 0.5, "Emotional": 0.5}
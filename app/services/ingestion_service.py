@@ -1,19 +1,27 @@
 import asyncio
 import os
+import copy
+import uuid
 import json
-import ollama
 import traceback
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.future import select
 from app.database import AsyncSessionLocal
-from app.models.article import Article
+from app.models.article import Article, ArticleStage, ArticleUrl
 from scrapers.new_bbc_scraper import BBCScraper
 from scrapers.new_cnn_scraper import CNNScraper
 from scrapers.new_foxnews_scraper import FoxNewsScraper
 from scrapers.new_nytimes_scraper import NYTimesScraper
 from scrapers.new_sky_news_scraper import SkyNewsScraper
-from app.services.llm_validator import validate_output
+from app.services.llm_validator import validate_output, repair_output, CLASSIFICATION_SCHEMA
+from app.services.llm_metrics import record_generation, get_generation_stats
+from app.services.llm_gateway import get_gateway, Priority
+from app.services.prompt_builder import prepare_text, get_prompt_stats
+from app.services.preclassifier import get_preclassifier, SOURCE_KEY, SOURCE_VALUE
+from app.services.near_duplicate import SimHashIndex, simhash
+from app.services import job_queue
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +34,11 @@ class IngestionService:
 """
 
     def __init__(self):
-        self.client = ollama.Client(host=self.OLLAMA_HOST, timeout=300)
+        self.gateway = get_gateway(self.OLLAMA_HOST)
+        # Near-duplicate index over recent articles: url -> fingerprint, plus their classifications
+        self.near_duplicates = SimHashIndex(settings.NEAR_DUPLICATE_MAX_DISTANCE)
+        self.classifications = {}
+        self.reused_classifications = 0
         self.scrapers = [
             BBCScraper(),
             CNNScraper(),
@@ -37,6 +49,7 @@ class IngestionService:
 
     async def run_daily_ingestion(self, dry_run=False):
         start_total = datetime.now()
+        run_started = datetime.now(timezone.utc)
         logger.info(f"Starting daily ingestion (Dry Run: {dry_run})...")
 
         # Step 1: Collect all articles from all scrapers
@@ -66,21 +79,120 @@ class IngestionService:
                 existing_urls = set(result.scalars().all())
             logger.info(f"Found {len(existing_urls)} existing articles in database (skipping duplicates)")
 
+            await self._load_near_duplicate_index()
+
         # Step 3: Filter to only new articles
         new_articles = [a for a in all_articles if a.get('url') not in existing_urls]
         logger.info(f"Processing {len(new_articles)} new articles")
 
-        # Step 4: Process only new articles
+        # Step 4: Process only new articles; confident ones are classified locally
+        preclassified = {} if dry_run else self._preclassify(new_articles)
+        # With the job queue, the remaining articles are classified by the workers
+        if len(new_articles) > len(preclassified) and not dry_run and not settings.JOB_QUEUE_ENABLED:
+            # Load the classifier and prefill the shared instructions before the batch
+            await self.gateway.warm_up(self.MODEL_NAME, prefix=self.PROMPT_TEMPLATE.split("{article_text}")[0])
+
         start_process = datetime.now()
         for article_data in new_articles:
-            await self.process_article(article_data, dry_run=dry_run, skip_dup_check=True)
+            await self.process_article(
+                article_data, dry_run=dry_run, skip_dup_check=True,
+                preclassified=preclassified.get(article_data.get('url'))
+            )
         process_duration = (datetime.now() - start_process).total_seconds()
         logger.info(f"Processed {len(new_articles)} articles in {process_duration:.2f} seconds")
 
+        if not dry_run:
+            if settings.JOB_QUEUE_ENABLED:
+                # Jobs retry on their own, but one that ran out of attempts (e.g. while
+                # the LLM circuit was open) leaves its article pending
+                await self.enqueue_pending_classifications()
+            else:
+                await self.retry_pending_classifications(failed_before=run_started)
+
+        if self.reused_classifications:
+            logger.info(f"Reused {self.reused_classifications} classifications from near-duplicate articles")
+
+        prompt_stats = get_prompt_stats().get(self.MODEL_NAME)
+        if prompt_stats:
+            logger.info(
+                f"Classifier prompt input: {prompt_stats['final_tokens']} tokens "
+                f"({prompt_stats['tokens_saved']} saved by cleanup/budgeting)"
+            )
+
+        generation_stats = get_generation_stats().get(self.MODEL_NAME)
+        if generation_stats:
+            logger.info(
+                f"Classifier generations: {generation_stats.get('generations', 0)}, "
+                f"retries: {generation_stats.get('retries', 0)} (rate {generation_stats.get('retry_rate', 0.0)}), "
+                f"failures: {generation_stats.get('failures', 0)}, "
+                f"prefill saved: {generation_stats.get('prefill_saved_tokens', 0)} tokens "
+                f"({generation_stats.get('prefix_cache_hits', 0)} prefix cache hits)"
+            )
+
         total_duration = (datetime.now() - start_total).total_seconds()
         logger.info(f"Daily ingestion finished in {total_duration:.2f} seconds.")
 
-    async def process_article(self, article_data, dry_run=False, skip_dup_check=False):
+    async def _load_near_duplicate_index(self):
+        """Indexes the classified articles of the last NEAR_DUPLICATE_WINDOW_DAYS days."""
+        start = datetime.now()
+        since = datetime.now(timezone.utc) - timedelta(days=settings.NEAR_DUPLICATE_WINDOW_DAYS)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Article.source_url, Article.content, Article.metadata_).where(
+                    Article.scraped_at >= since,
+                    Article.metadata_.is_not(None)
+                )
+            )
+            rows = result.all()
+
+        for url, content, metadata in rows:
+            self._remember_classification(url, simhash(content), metadata)
+        duration = (datetime.now() - start).total_seconds()
+        logger.info(f"Indexed {len(self.near_duplicates)} recent articles for near-duplicate detection in {duration:.2f} seconds")
+
+    def _remember_classification(self, url, fingerprint, classification):
+        if url and fingerprint is not None:
+            self.near_duplicates.add(url, fingerprint)
+            self.classifications[url] = classification
+
+    def _reuse_near_duplicate(self, url, fingerprint):
+        """Returns a copy of the classification of an indexed near-twin, or None."""
+        twin_url = self.near_duplicates.nearest(fingerprint)
+        if twin_url is None:
+            return None
+        logger.info(f"Reusing classification of near-duplicate {twin_url} for {url}")
+        self.reused_classifications += 1
+        return copy.deepcopy(self.classifications[twin_url])
+
+    def _preclassify(self, articles):
+        """
+        Classifies articles with the local pre-classifier in one batch.
+        Returns {url: result} for the confident, valid predictions; everything
+        else falls back to the LLM. Empty when no model has been trained.
+        """
+        model = get_preclassifier()
+        candidates = [a for a in articles if a.get('url') and a.get('content')]
+        if model is None or not candidates:
+            return {}
+
+        start = datetime.now()
+        predictions = model.predict([a['content'] for a in candidates])
+        accepted = {}
+        for article_data, (result, confidence) in zip(candidates, predictions):
+            if confidence < settings.PRECLASSIFIER_MIN_CONFIDENCE:
+                continue
+            is_valid, _ = validate_output(result)
+            if is_valid:
+                accepted[article_data['url']] = {**result, SOURCE_KEY: SOURCE_VALUE}
+
+        duration = (datetime.now() - start).total_seconds()
+        logger.info(
+            f"Pre-classifier accepted {len(accepted)}/{len(candidates)} articles in {duration:.3f} seconds "
+            f"(min confidence {settings.PRECLASSIFIER_MIN_CONFIDENCE}); {len(candidates) - len(accepted)} go to the LLM"
+        )
+        return accepted
+
+    async def process_article(self, article_data, dry_run=False, skip_dup_check=False, preclassified=None):
         url = article_data.get('url')
         if not url:
             return
@@ -102,25 +214,11 @@ class IngestionService:
 
                 logger.info(f"Ingesting: {url}")
 
-                # Ollama Processing with Retry and Validation
-                ollama_result = None
-                for attempt in range(3):
-                    logger.debug(f"Ollama attempt {attempt + 1}/3 for {url}")
-                    raw_result = self._call_ollama(article_data.get('content', ''))
-
-                    if raw_result:
-                        is_valid, error_msg = validate_output(raw_result)
-                        if is_valid:
-                            ollama_result = raw_result
-                            break
-                        else:
-                            logger.warning(f"Validation failed for {url} (Attempt {attempt + 1}): {error_msg}")
-                    else:
-                        logger.warning(f"Ollama returned None for {url} (Attempt {attempt + 1})")
-
-                if not ollama_result:
-                    logger.error(f"Failed to get valid Ollama result for {url} after 3 attempts. Skipping.")
-                    return
+                fingerprint = simhash(article_data.get('content', ''))
+                ollama_result = await self._classify(
+                    url, article_data.get('content', ''), fingerprint, preclassified,
+                    use_llm=not settings.JOB_QUEUE_ENABLED
+                )
 
                 # Parse published_at
                 published_at = article_data.get('published_at')
@@ -136,37 +234,180 @@ class IngestionService:
 
                 # Create Article
                 article = Article(
+                    id=uuid.uuid4(),
                     title=article_data.get('title'),
                     content=article_data.get('content'),
                     source_url=url,
                     publisher=article_data.get('source'),
-                    published_at=published_at,
-                    image_url=article_data.get('image_url'),
-                    category_scores=self._extract_category_scores(ollama_result),
-                    metadata_=ollama_result
+                    # Undated articles count as published when scraped (partition key, never null)
+                    published_at=published_at or datetime.now(timezone.utc),
+                    image_url=article_data.get('image_url')
                 )
+                # Stored by a concurrent run, or listed twice in this batch
+                if not await ArticleUrl.claim(db, url, article.id):
+                    logger.info(f"Skipping duplicate: {url}")
+                    await db.rollback()
+                    return
+                if ollama_result:
+                    article.category_scores = self._extract_category_scores(ollama_result)
+                    article.metadata_ = ollama_result
+                    article.set_stage(ArticleStage.CLASSIFIED)
+                elif settings.JOB_QUEUE_ENABLED:
+                    # Stored and queued in one transaction: no article is left without its job
+                    article.set_stage(ArticleStage.SCRAPED)
+                    db.add(article)
+                    await db.flush()
+                    await job_queue.enqueue(
+                        db, "classify", {"article_id": str(article.id)}, dedupe_key=f"classify:{article.id}"
+                    )
+                else:
+                    # Keep it so a later run retries the classification (retry_pending_classifications)
+                    logger.error(f"Failed to get valid Ollama result for {url} after 3 attempts. Saving for retry.")
+                    article.set_stage(ArticleStage.CLASSIFY_FAILED, error="No valid classification after 3 attempts")
 
                 logger.debug(f"category_scores type/value: {type(article.category_scores)} {article.category_scores}")
 
                 db.add(article)
                 await db.commit()
-                logger.info(f"Saved article: {article.title}")
+                logger.info(f"Saved article: {article.title} ({article.stage})")
+                if ollama_result:
+                    self._remember_classification(url, fingerprint, ollama_result)
 
             except Exception as e:
                 logger.error(f"Error processing article {url}: {e}")
                 await db.rollback()
 
-    def _call_ollama(self, text):
+    async def _classify(self, url, content, fingerprint, preclassified=None, use_llm=True):
+        """
+        Reuses a near-twin's classification, then the pre-classifier's; only
+        the remaining articles go to Ollama (3 attempts, unless `use_llm` is
+        False). Returns None on failure.
+        """
+        result = self._reuse_near_duplicate(url, fingerprint)
+        if result is None:
+            result = preclassified
+        if result is not None or not use_llm:
+            return result
+
+        for attempt in range(3):
+            logger.debug(f"Ollama attempt {attempt + 1}/3 for {url}")
+            raw_result = await self._call_ollama(content, attempt=attempt + 1)
+
+            if raw_result:
+                is_valid, error_msg = validate_output(raw_result)
+                if is_valid:
+                    result = raw_result
+                    break
+                else:
+                    logger.warning(f"Validation failed for {url} (Attempt {attempt + 1}): {error_msg}")
+            else:
+                logger.warning(f"Ollama returned None for {url} (Attempt {attempt + 1})")
+
+        record_generation(self.MODEL_NAME, attempt + 1, success=result is not None)
+        return result
+
+    async def retry_pending_classifications(self, failed_before=None):
+        """
+        Classifies the stored articles still waiting for a classification
+        (failed earlier or left behind by a crashed run), through the
+        ix_articles_pending_classification partial index. Articles whose stage
+        changed after `failed_before` (this run's failures) are left for the next run.
+        """
+        query = select(Article).where(
+            Article.stage.in_(ArticleStage.PENDING_CLASSIFICATION),
+            Article.stage_attempts < settings.STAGE_MAX_ATTEMPTS
+        )
+        if failed_before is not None:
+            query = query.where(Article.stage_updated_at < failed_before)
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(query.order_by(Article.scraped_at))
+            pending = result.scalars().all()
+            if not pending:
+                return
+            logger.info(f"Retrying classification of {len(pending)} pending articles")
+
+            classified = 0
+            for article in pending:
+                try:
+                    fingerprint = simhash(article.content)
+                    classification = await self._classify(article.source_url, article.content, fingerprint)
+                    if classification:
+                        article.category_scores = self._extract_category_scores(classification)
+                        article.metadata_ = classification
+                        article.set_stage(ArticleStage.CLASSIFIED)
+                        classified += 1
+                    else:
+                        article.set_stage(ArticleStage.CLASSIFY_FAILED, error="No valid classification after 3 attempts")
+                    await db.commit()
+                    if classification:
+                        self._remember_classification(article.source_url, fingerprint, classification)
+                except Exception as e:
+                    logger.error(f"Error retrying classification of {article.source_url}: {e}")
+                    await db.rollback()
+            logger.info(f"Classified {classified}/{len(pending)} pending articles")
+
+    async def enqueue_pending_classifications(self) -> int:
+        """
+        Queues a classify job for every stored article still waiting for a
+        classification with attempts left. Articles whose job is queued or
+        running are skipped by the dedupe key. Returns how many were queued.
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Article.id).where(
+                    Article.stage.in_(ArticleStage.PENDING_CLASSIFICATION),
+                    Article.stage_attempts < settings.STAGE_MAX_ATTEMPTS
+                ).order_by(Article.scraped_at)
+            )
+            queued = 0
+            for article_id in result.scalars().all():
+                queued += await job_queue.enqueue(
+                    db, "classify", {"article_id": str(article_id)}, dedupe_key=f"classify:{article_id}"
+                )
+            await db.commit()
+        if queued:
+            logger.info(f"Queued classification of {queued} pending articles")
+        return queued
+
+    async def classify_job(self, payload: dict):
+        """
+        Job handler: classifies one stored article. Raises when no valid
+        classification was produced, so the queue retries the job.
+        """
+        async with AsyncSessionLocal() as db:
+            article = await db.get(Article, uuid.UUID(payload["article_id"]))
+            if article is None or article.stage not in ArticleStage.PENDING_CLASSIFICATION:
+                return  # Deleted, or classified by an earlier attempt
+
+            fingerprint = simhash(article.content)
+            classification = await self._classify(article.source_url, article.content, fingerprint)
+            if classification:
+                article.category_scores = self._extract_category_scores(classification)
+                article.metadata_ = classification
+                article.set_stage(ArticleStage.CLASSIFIED)
+            else:
+                article.set_stage(ArticleStage.CLASSIFY_FAILED, error="No valid classification after 3 attempts")
+            await db.commit()
+
+        if not classification:
+            raise RuntimeError(f"No valid classification for {article.source_url}")
+        self._remember_classification(article.source_url, fingerprint, classification)
+
+    async def _call_ollama(self, text, attempt=1):
         if not text:
             return None
 
         try:
-            prompt = self.PROMPT_TEMPLATE.replace("{article_text}", text)
+            prompt = self.PROMPT_TEMPLATE.replace("{article_text}", prepare_text(text, self.MODEL_NAME))
 
-            response = self.client.chat(
+            response = await self.gateway.chat(
                 model=self.MODEL_NAME,
                 messages=[{"role": "user", "content": prompt}],
-                stream=False
+                priority=Priority.BATCH,
+                stage="ingest_classify",
+                attempt=attempt,
+                format=CLASSIFICATION_SCHEMA
             )
 
             raw_response = response.message.content
@@ -184,18 +425,8 @@ class IngestionService:
             if start != -1 and end != -1:
                 cleaned = cleaned[start:end+1]
 
-            result = json.loads(cleaned)
-
-            # Normalize category structure if nested
-            if "category" in result and isinstance(result["category"], dict):
-                for k, v in result["category"].items():
-                    result[k] = v
-                del result["category"]
-
-            if "Named_Entities" in result:
-                result["Named Entities"] = result.pop("Named_Entities")
-
-            return result
+            # Fix near-misses (nested categories, key variants, ...) locally
+            return repair_output(json.loads(cleaned))
         except Exception as e:
             logger.error(f"JSON parse error: {e}")
             return None
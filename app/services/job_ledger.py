@@ -0,0 +1,98 @@
+import logging
+import socket
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.job_run import JobRun
+
+logger = logging.getLogger(__name__)
+
+
+class RunHandle:
+    """The running ledger entry; the job body calls fail() to record an error without raising."""
+
+    def __init__(self, run_id, name: str):
+        self.id = run_id
+        self.name = name
+        self.error: Optional[str] = None
+        self.startup_ms: Optional[float] = None
+
+    def fail(self, error: str):
+        self.error = error
+
+
+async def _start(name: str) -> Optional[RunHandle]:
+    async with AsyncSessionLocal() as db:
+        # A run still "running" past the limit belongs to a process that died mid-run
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.JOB_RUN_MAX_HOURS)
+        await db.execute(
+            update(JobRun)
+            .where(JobRun.name == name, JobRun.status == "running", JobRun.started_at < cutoff)
+            .values(status="abandoned", finished_at=datetime.now(timezone.utc), error="no finish recorded")
+        )
+        run = JobRun(name=name, status="running", host=socket.gethostname())
+        db.add(run)
+        try:
+            await db.commit()
+            return RunHandle(run.id, name)
+        except IntegrityError:
+            await db.rollback()
+
+        db.add(JobRun(
+            name=name, status="skipped", host=socket.gethostname(),
+            finished_at=datetime.now(timezone.utc), duration_seconds=0.0, error="previous run still in progress"
+        ))
+        await db.commit()
+        return None
+
+
+async def _finish(run: RunHandle, duration: float):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(JobRun)
+            .where(JobRun.id == run.id)
+            .values(
+                status="failed" if run.error else "succeeded",
+                finished_at=datetime.now(timezone.utc),
+                duration_seconds=round(duration, 3),
+                startup_ms=run.startup_ms,
+                error=run.error
+            )
+        )
+        await db.commit()
+
+
+@asynccontextmanager
+async def ledger_run(name: str):
+    """
+    Records a run of job `name` in job_runs (start, end, duration, outcome).
+    Yields None, and records a skipped run, when another run of the same job
+    is still in progress on any process; the caller then returns without
+    doing the work.
+    """
+    run = await _start(name)
+    if run is None:
+        logger.warning(f"Skipping {name}: a previous run is still in progress")
+        yield None
+        return
+
+    start = time.monotonic()
+    try:
+        yield run
+    except BaseException as e:
+        run.fail(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        duration = time.monotonic() - start
+        try:
+            await _finish(run, duration)
+        except Exception as e:
+            logger.error(f"Could not record the end of {name} run {run.id}: {e}")
+        logger.info(f"{name} run {'failed' if run.error else 'succeeded'} in {duration:.1f} seconds")
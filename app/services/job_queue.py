@@ -0,0 +1,168 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Sequence
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Retry delay after the n-th failed attempt: RETRY_BASE_SECONDS * 2^(n-1), capped
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 900
+
+
+async def enqueue(
+    db,
+    kind: str,
+    payload: dict,
+    dedupe_key: str = None,
+    priority: int = 0,
+    max_attempts: int = 3,
+) -> bool:
+    """
+    Adds a job (committed by the caller). Returns False when a queued or
+    running job has the same `dedupe_key`, so producers can re-enqueue
+    freely; work whose job finished (or failed for good) is queued again.
+    """
+    statement = insert(Job).values(
+        kind=kind,
+        payload=payload,
+        dedupe_key=dedupe_key,
+        priority=priority,
+        max_attempts=max_attempts,
+    )
+    if dedupe_key is not None:
+        statement = statement.on_conflict_do_nothing(
+            index_elements=[Job.dedupe_key], index_where=Job.status.in_(JobStatus.ACTIVE)
+        )
+    result = await db.execute(statement)
+    return result.rowcount != 0
+
+
+async def claim(db, worker_id: str, kinds: Sequence[str], limit: int = 1) -> List[Job]:
+    """
+    Claims up to `limit` runnable jobs for `worker_id` and commits. Rows
+    locked by another worker's claim are skipped (FOR UPDATE SKIP LOCKED),
+    so any number of workers drain the queue without blocking each other
+    or claiming the same job.
+    """
+    candidates = (
+        select(Job.id)
+        .where(
+            Job.status == JobStatus.QUEUED,
+            Job.kind.in_(list(kinds)),
+            Job.run_after <= func.now()
+        )
+        .order_by(Job.priority, Job.run_after)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(Job)
+        .where(Job.id.in_(candidates.scalar_subquery()))
+        .values(
+            status=JobStatus.RUNNING,
+            locked_by=worker_id,
+            heartbeat_at=func.now(),
+            attempts=Job.attempts + 1
+        )
+        .returning(Job)
+        .execution_options(synchronize_session=False)
+    )
+    jobs = list(result.scalars().all())
+    await db.commit()
+    return jobs
+
+
+async def heartbeat(db, worker_id: str, job_ids: Sequence) -> int:
+    """Marks the worker's running jobs as alive. Returns how many it still holds."""
+    if not job_ids:
+        return 0
+    result = await db.execute(
+        update(Job)
+        .where(Job.id.in_(list(job_ids)), Job.locked_by == worker_id, Job.status == JobStatus.RUNNING)
+        .values(heartbeat_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def complete(db, job: Job, worker_id: str):
+    await db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.locked_by == worker_id)
+        .values(status=JobStatus.DONE, finished_at=func.now(), locked_by=None, last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1)))
+
+
+async def fail(db, job: Job, worker_id: str, error: str):
+    """Requeues the job with backoff, or marks it failed once its attempts are spent."""
+    final = job.attempts >= job.max_attempts
+    values = {"locked_by": None, "last_error": error[:2000]}
+    if final:
+        values.update(status=JobStatus.FAILED, finished_at=func.now())
+    else:
+        values.update(status=JobStatus.QUEUED, run_after=datetime.now(timezone.utc) + retry_delay(job.attempts))
+    await db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.locked_by == worker_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if final:
+        logger.error(f"Job {job.kind} {job.id} failed after {job.attempts} attempts: {error}")
+
+
+async def requeue_stale(db, timeout_seconds: float) -> int:
+    """
+    Returns the jobs of dead workers (no heartbeat for `timeout_seconds`) to
+    the queue, or fails them when their attempts are spent. Safe to run from
+    every worker: the row locks make concurrent sweeps harmless.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=timeout_seconds)
+    stale = Job.status == JobStatus.RUNNING, Job.heartbeat_at < cutoff
+    requeued = await db.execute(
+        update(Job)
+        .where(*stale, Job.attempts < Job.max_attempts)
+        .values(status=JobStatus.QUEUED, locked_by=None, run_after=func.now(), last_error="worker lost")
+        .execution_options(synchronize_session=False)
+    )
+    failed = await db.execute(
+        update(Job)
+        .where(*stale, Job.attempts >= Job.max_attempts)
+        .values(status=JobStatus.FAILED, locked_by=None, finished_at=func.now(), last_error="worker lost")
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if requeued.rowcount or failed.rowcount:
+        logger.warning(f"Requeued {requeued.rowcount} and failed {failed.rowcount} jobs of unresponsive workers")
+    return requeued.rowcount
+
+
+async def queue_stats(db) -> dict:
+    """Job counts by kind and status."""
+    result = await db.execute(select(Job.kind, Job.status, func.count()).group_by(Job.kind, Job.status))
+    stats: dict = {}
+    for kind, status, count in result.all():
+        stats.setdefault(kind, {})[status] = count
+    return stats
+
+
+async def purge_finished(db, older_than_days: int = 7) -> int:
+    """Deletes done jobs older than `older_than_days`; failed ones are kept for inspection."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    result = await db.execute(delete(Job).where(Job.status == JobStatus.DONE, Job.finished_at < cutoff))
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _reset_run_stats():
+    """The end-of-run summaries report this run only, not everything since the worker started."""
+    from app.services.prompt_builder import reset_prompt_stats
+    from app.services.llm_metrics import reset_generation_stats
+    reset_prompt_stats()
+    reset_generation_stats()
+
+
+async def _daily_ingest():
+    from app.services.ingestion_service import IngestionService
+    _reset_run_stats()
+    await IngestionService().run_daily_ingestion()
+
+
+async def _daily_cluster():
+    from scripts.daily_cluster import ClusterService
+    _reset_run_stats()
+    await ClusterService().run_daily_clustering()
+
+
+async def _partition_maintenance():
+    from app.database import engine
+    from app.partitions import maintain_partitions
+    async with engine.begin() as conn:
+        await maintain_partitions(conn)
+
+
+# Scheduled jobs the runner can execute. Each run gets fresh service
+# instances; imports, the database engine and the LLM gateway stay warm.
+JOBS: Dict[str, Callable[[], Awaitable[None]]] = {
+    "daily_ingest": _daily_ingest,
+    "daily_cluster": _daily_cluster,
+    "partition_maintenance": _partition_maintenance,
+}
+
+
+def _preload():
+    """Pays the import cost (scikit-learn, BeautifulSoup, scrapers) once, when the worker starts."""
+    import app.services.ingestion_service  # noqa: F401
+    import scripts.daily_cluster  # noqa: F401
+
+
+async def _execute(name: str, timeout: Optional[float], jobs=JOBS) -> Optional[str]:
+    """Runs job `name` in the worker's loop. Returns an error message, or None on success."""
+    try:
+        await asyncio.wait_for(jobs[name](), timeout)
+    except asyncio.TimeoutError:
+        return f"timed out after {timeout:.0f}s"
+    except asyncio.CancelledError:
+        return "cancelled"
+    except Exception as e:
+        logger.exception(f"Job {name} failed")
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+async def _serve(conn):
+    loop = asyncio.get_running_loop()
+    incoming: asyncio.Queue = asyncio.Queue()
+
+    def on_readable():
+        try:
+            incoming.put_nowait(conn.recv())
+        except (EOFError, OSError):
+            # The parent went away
+            loop.remove_reader(conn.fileno())
+            incoming.put_nowait(("stop",))
+
+    loop.add_reader(conn.fileno(), on_readable)
+    current = None
+
+    async def run(name, timeout, sent_at):
+        startup_ms = (time.time() - sent_at) * 1000
+        start = time.monotonic()
+        error = await _execute(name, timeout)
+        conn.send(("done", {
+            "job": name,
+            "error": error,
+            "startup_ms": round(startup_ms, 1),
+            "duration_seconds": round(time.monotonic() - start, 3),
+        }))
+
+    while True:
+        message = await incoming.get()
+        if message[0] == "run":
+            current = asyncio.create_task(run(*message[1:]))
+        elif message[0] == "cancel":
+            if current is not None and not current.done():
+                current.cancel()
+        elif message[0] == "stop":
+            break
+
+    if current is not None and not current.done():
+        current.cancel()
+        await asyncio.gather(current, return_exceptions=True)
+
+
+def _worker_main(conn):
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s",
+    )
+    start = time.monotonic()
+    _preload()
+    conn.send(("ready", round(time.monotonic() - start, 3)))
+    asyncio.run(_serve(conn))
+
+
+class WarmJobRunner:
+    """
+    Runs scheduled jobs in one long-lived worker process instead of a fresh
+    `uv run` subprocess per run, so a job starts in milliseconds: the
+    interpreter, imported libraries, database pool and LLM gateway are
+    reused across runs. The worker keeps CPU-heavy jobs off the API's event
+    loop, and its output goes straight to the process's stdout.
+
+    One job runs at a time. A job past its timeout is cancelled inside the
+    worker; if the worker does not answer within `grace_seconds` after that
+    (or after the awaiting task is cancelled), it is killed and replaced on the next run.
+    """
+
+    def __init__(self, grace_seconds: float = 30.0, worker_main=_worker_main):
+        self.grace_seconds = grace_seconds
+        self.worker_main = worker_main
+        self._process = None
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self.spawn_seconds = None
+        self.jobs_run = 0
+        self.restarts = 0
+        self.last_startup_ms = None
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    async def start(self):
+        """Starts the worker process (if needed) and waits until its imports are loaded."""
+        # Under the lock: a run arriving during the spawn would otherwise read
+        # the worker's ready message as its result
+        async with self._lock:
+            await self._start()
+
+    async def _start(self):
+        if self.running:
+            return
+        if self._process is not None:
+            self._kill()
+        if self.spawn_seconds is not None:
+            self.restarts += 1
+        start = time.monotonic()
+        # spawn, not fork: the child must not inherit the API's event loop and connections
+        context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        self._process = context.Process(target=self.worker_main, args=(child_conn,), name="job-runner", daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        try:
+            _, preload_seconds = await self._recv()
+        except EOFError:
+            self._kill()
+            raise RuntimeError("Job runner worker exited during startup")
+        self.spawn_seconds = round(time.monotonic() - start, 3)
+        logger.info(f"Job runner worker {self._process.pid} ready in {self.spawn_seconds}s "
+                    f"(imports {preload_seconds}s)")
+
+    async def run(self, name: str, timeout: Optional[float] = None) -> dict:
+        """
+        Runs job `name` in the worker and returns
+        {"job", "error", "startup_ms", "duration_seconds"}; error is None on success.
+        Cancelling the awaiting task cancels the job in the worker.
+        """
+        if name not in JOBS:
+            raise ValueError(f"Unknown job {name}")
+        async with self._lock:
+            await self._start()
+            sent = time.monotonic()
+            self._conn.send(("run", name, timeout, time.time()))
+            hard_limit = None if timeout is None else timeout + self.grace_seconds
+            try:
+                _, result = await asyncio.wait_for(self._recv(), hard_limit)
+            except asyncio.CancelledError:
+                await self._cancel_running()
+                raise
+            except asyncio.TimeoutError:
+                # The job blocked the worker's loop, so it could not honour its own timeout
+                logger.error(f"Job {name} did not stop after {hard_limit:.0f}s; killing the worker")
+                self._kill()
+                result = {"job": name, "error": f"timed out after {timeout:.0f}s (worker killed)",
+                          "startup_ms": None, "duration_seconds": round(time.monotonic() - sent, 3)}
+            except EOFError:
+                self._kill()
+                result = {"job": name, "error": "job runner worker exited",
+                          "startup_ms": None, "duration_seconds": round(time.monotonic() - sent, 3)}
+        self.jobs_run += 1
+        if result["startup_ms"] is not None:
+            self.last_startup_ms = result["startup_ms"]
+            logger.info(f"Job {name} started in {result['startup_ms']:.1f}ms")
+        return result
+
+    async def _cancel_running(self):
+        try:
+            self._conn.send(("cancel",))
+            await asyncio.wait_for(self._recv(), self.grace_seconds)
+        except (asyncio.TimeoutError, EOFError, OSError):
+            self._kill()
+
+    async def stop(self):
+        """Cancels the running job, if any, and stops the worker."""
+        if self._process is None:
+            return
+        try:
+            self._conn.send(("stop",))
+            await asyncio.to_thread(self._process.join, self.grace_seconds)
+        except (OSError, BrokenPipeError):
+            pass
+        self._kill()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "spawn_seconds": self.spawn_seconds,
+            "jobs_run": self.jobs_run,
+            "restarts": self.restarts,
+            "last_startup_ms": self.last_startup_ms,
+        }
+
+    async def _recv(self):
+        """Waits for the next message from the worker; raises EOFError if it exited."""
+        loop = asyncio.get_running_loop()
+        fd = self._conn.fileno()
+        readable = loop.create_future()
+        loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+        try:
+            await readable
+        finally:
+            loop.remove_reader(fd)
+        return self._conn.recv()
+
+    def _kill(self):
+        process, conn = self._process, self._conn
+        self._process = self._conn = None
+        if process is not None and process.is_alive():
+            process.kill()
+            process.join(5)
+        if conn is not None:
+            conn.close()
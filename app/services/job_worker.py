@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable, Dict
+
+from app.database import AsyncSessionLocal
+from app.services import job_queue
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class JobWorker:
+    """
+    Drains the job queue on one node. Any number of workers on any number of
+    nodes can run side by side: claims use SKIP LOCKED, so each job goes to
+    exactly one of them.
+
+    - Up to `concurrency` jobs run at once, each through `handlers[job.kind]`.
+      A handler that returns completes the job; one that raises fails it
+      (retried with backoff until the job's max_attempts).
+    - While jobs run, a heartbeat keeps them claimed; every `stale_after`
+      seconds the worker also requeues jobs whose worker stopped heartbeating.
+    """
+
+    def __init__(
+        self,
+        handlers: Dict[str, Handler],
+        worker_id: str = None,
+        concurrency: int = 1,
+        poll_interval: float = 2.0,
+        heartbeat_interval: float = 15.0,
+        stale_after: float = 90.0,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.handlers = handlers
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.session_factory = session_factory
+
+        self._running: Dict = {}
+        self._last_sweep = 0.0
+        self.processed = 0
+        self.failed = 0
+
+    async def run(self, stop: asyncio.Event = None, drain: bool = False):
+        """
+        Claims and runs jobs until `stop` is set (running jobs are finished
+        first). With `drain`, returns as soon as the queue has no runnable job.
+        """
+        stop = stop or asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat_loop())
+        logger.info(f"Worker {self.worker_id} started for {', '.join(self.handlers)} (concurrency {self.concurrency})")
+        try:
+            while not stop.is_set():
+                await self._sweep()
+                claimed = await self._claim()
+                if drain and not claimed and not self._running:
+                    break
+                await self._wait(stop, busy=bool(claimed))
+            if self._running:
+                await asyncio.gather(*self._running.values(), return_exceptions=True)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+        logger.info(f"Worker {self.worker_id} stopped: {self.processed} jobs done, {self.failed} failed")
+
+    async def _claim(self) -> list:
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            return []
+        try:
+            async with self.session_factory() as db:
+                jobs = await job_queue.claim(db, self.worker_id, list(self.handlers), limit=free)
+        except Exception as e:
+            logger.error(f"Could not claim jobs: {e}")
+            return []
+        for job in jobs:
+            task = asyncio.create_task(self._run_job(job))
+            self._running[job.id] = task
+            task.add_done_callback(lambda _, job_id=job.id: self._running.pop(job_id, None))
+        return jobs
+
+    async def _wait(self, stop: asyncio.Event, busy: bool):
+        """Sleeps until a slot frees up, new work may be available, or stop is set."""
+        if busy and len(self._running) < self.concurrency:
+            return
+        waiters = [asyncio.ensure_future(stop.wait())]
+        if len(self._running) >= self.concurrency:
+            waiters += list(self._running.values())
+        await asyncio.wait(waiters, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+        waiters[0].cancel()
+
+    async def _run_job(self, job):
+        start = time.perf_counter()
+        try:
+            await self.handlers[job.kind](job.payload)
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Job {job.kind} {job.id} attempt {job.attempts} failed: {type(e).__name__}: {e}")
+            await self._finish(job_queue.fail, job, f"{type(e).__name__}: {e}")
+        else:
+            self.processed += 1
+            logger.info(f"Job {job.kind} {job.id} done in {time.perf_counter() - start:.1f}s")
+            await self._finish(job_queue.complete, job)
+
+    async def _finish(self, outcome, job, *args):
+        try:
+            async with self.session_factory() as db:
+                await outcome(db, job, self.worker_id, *args)
+        except Exception as e:
+            # The job stays claimed; once the heartbeat stops it is requeued by a sweep
+            logger.error(f"Could not record the outcome of job {job.id}: {e}")
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self._running:
+                continue
+            try:
+                async with self.session_factory() as db:
+                    await job_queue.heartbeat(db, self.worker_id, list(self._running))
+            except Exception as e:
+                logger.error(f"Heartbeat failed: {e}")
+
+    async def _sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < self.stale_after:
+            return
+        self._last_sweep = now
+        try:
+            async with self.session_factory() as db:
+                await job_queue.requeue_stale(db, self.stale_after)
+        except Exception as e:
+            logger.error(f"Could not requeue stale jobs: {e}")
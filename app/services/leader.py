@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock key owned by the process that runs the scheduler
+SCHEDULER_LOCK_KEY = 727002
+
+
+class LeaderElection:
+    """
+    Elects one process, across all app workers and nodes, through a
+    session-level Postgres advisory lock held on a dedicated connection.
+
+    The lock lives as long as that connection: if the leader process dies or
+    its connection drops, Postgres releases the lock and another candidate
+    takes over on its next attempt. The leader checks its connection every
+    `check_interval` seconds and steps down when it is gone.
+    """
+
+    def __init__(
+        self,
+        key: int,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        check_interval: float = 30.0,
+        bind=engine,
+    ):
+        self.key = key
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.check_interval = check_interval
+        self.bind = bind
+        self.is_leader = False
+        self._conn = None
+        self._stop = asyncio.Event()
+
+    async def run(self):
+        """Campaigns until stop(); runs on_elected/on_demoted as leadership changes."""
+        while not self._stop.is_set():
+            try:
+                if self.is_leader:
+                    await self._conn.execute(text("SELECT 1"))
+                    await self._conn.commit()
+                elif await self._try_acquire():
+                    self.is_leader = True
+                    logger.info(f"Elected leader (advisory lock {self.key})")
+                    await self.on_elected()
+            except Exception as e:
+                logger.error(f"Leader election error: {e}")
+                await self._step_down()
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.check_interval)
+            except asyncio.TimeoutError:
+                pass
+        await self._step_down()
+
+    async def stop(self):
+        self._stop.set()
+        await self._step_down()
+
+    async def _try_acquire(self) -> bool:
+        if self._conn is None:
+            self._conn = await self.bind.connect()
+        acquired = (await self._conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}
+        )).scalar()
+        # Autobegun transaction would otherwise stay open for the process lifetime
+        await self._conn.commit()
+        if not acquired:
+            await self._release_connection()
+        return bool(acquired)
+
+    async def _step_down(self):
+        was_leader = self.is_leader
+        self.is_leader = False
+        if was_leader:
+            logger.warning(f"Giving up leadership (advisory lock {self.key})")
+            try:
+                await self.on_demoted()
+            except Exception as e:
+                logger.error(f"Error while stepping down: {e}")
+        await self._release_connection(unlock=was_leader)
+
+    async def _release_connection(self, unlock: bool = False):
+        conn = self._conn
+        self._conn = None
+        if conn is None:
+            return
+        try:
+            if unlock:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+                await conn.commit()
+        except Exception:
+            # Never hand a connection that may still hold the lock back to the pool
+            try:
+                await conn.invalidate()
+            except Exception:
+                pass
+        finally:
+            try:
+                await conn.close()
+            except Exception:
+                pass
@@ -0,0 +1,192 @@
+import atexit
+import json
+import logging
+import math
+import os
+import queue
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Duration fields Ollama reports on a finished generation, in nanoseconds
+_DURATION_FIELDS = ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+
+# (path, record) pairs waiting for the writer thread: callers on the event
+# loop only enqueue, the disk I/O happens in the background
+_queue: "queue.Queue[Tuple[str, dict]]" = queue.Queue()
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def _ns_to_ms(value) -> Optional[float]:
+    return round(value / 1e6, 1) if isinstance(value, int) else None
+
+
+def _count(value) -> Optional[int]:
+    return value if isinstance(value, int) else None
+
+
+def build_record(
+    model: str,
+    stage: str,
+    attempt: int,
+    latency_ms: float,
+    response=None,
+    error: Optional[BaseException] = None,
+) -> dict:
+    """
+    Builds one call record from an Ollama response (or the error that ended
+    the call). `latency_ms` is the wall-clock time including gateway queueing;
+    the *_ms fields are Ollama's own timings.
+    """
+    record = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "model": model,
+        "stage": stage,
+        "attempt": attempt,
+        "success": error is None,
+        "latency_ms": round(latency_ms, 1),
+        "prompt_tokens": _count(getattr(response, "prompt_eval_count", None)),
+        "output_tokens": _count(getattr(response, "eval_count", None)),
+    }
+    for field in _DURATION_FIELDS:
+        record[field.replace("_duration", "_ms")] = _ns_to_ms(getattr(response, field, None))
+    if error is not None:
+        record["error"] = type(error).__name__
+    return record
+
+
+def _write(path: str, records: List[dict]):
+    """
+    Appends records to the JSONL call log in one write with O_APPEND, so
+    concurrent writers do not interleave. Logging must never break a
+    generation, so I/O errors are only logged.
+    """
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+    except OSError as e:
+        logger.warning(f"Could not write LLM call log {path}: {e}")
+
+
+def _drain():
+    while True:
+        batch = [_queue.get()]
+        # Everything queued meanwhile goes out in the same write
+        while True:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            by_path: Dict[str, List[dict]] = defaultdict(list)
+            for path, record in batch:
+                by_path[path].append(record)
+            for path, records in by_path.items():
+                _write(path, records)
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_drain, name="llm-call-log", daemon=True)
+            _writer.start()
+
+
+def record_call(record: dict, path: str = None):
+    """
+    Queues one record for the JSONL call log and returns at once; a
+    background thread writes it (see flush_calls).
+    """
+    path = settings.LLM_CALL_LOG_PATH if path is None else path
+    if not path:
+        return
+    if _writer is None or not _writer.is_alive():
+        _ensure_writer()
+    _queue.put((path, record))
+
+
+def flush_calls():
+    """Blocks until every queued record is written (tests, process exit)."""
+    if _queue.unfinished_tasks:
+        _ensure_writer()
+        _queue.join()
+
+
+# Short-lived scripts exit right after their last call
+atexit.register(flush_calls)
+
+
+def read_calls(path: str = None) -> Iterator[dict]:
+    """Yields the records of a call log, skipping lines that do not parse."""
+    path = settings.LLM_CALL_LOG_PATH if path is None else path
+    if not path or not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def aggregate_calls(records: Iterable[dict]) -> Dict[str, Dict[str, dict]]:
+    """
+    Aggregates call records per day and stage:
+    - prefill/decode tokens per second from Ollama's own timings,
+    - retry cost: share of tokens and time spent on attempts beyond the first,
+    - p50/p95 wall-clock latency.
+    """
+    groups: Dict[tuple, List[dict]] = defaultdict(list)
+    for record in records:
+        groups[(record.get("ts", "")[:10], record.get("stage", "unknown"))].append(record)
+
+    report: Dict[str, Dict[str, dict]] = defaultdict(dict)
+    for (day, stage), calls in sorted(groups.items()):
+        prompt_tokens = sum(c.get("prompt_tokens") or 0 for c in calls)
+        output_tokens = sum(c.get("output_tokens") or 0 for c in calls)
+        prompt_eval_ms = sum(c.get("prompt_eval_ms") or 0 for c in calls)
+        eval_ms = sum(c.get("eval_ms") or 0 for c in calls)
+        latency_ms = sum(c.get("latency_ms") or 0 for c in calls)
+
+        retries = [c for c in calls if (c.get("attempt") or 1) > 1]
+        retry_tokens = sum((c.get("prompt_tokens") or 0) + (c.get("output_tokens") or 0) for c in retries)
+        retry_ms = sum(c.get("latency_ms") or 0 for c in retries)
+
+        latencies = [c["latency_ms"] for c in calls if c.get("latency_ms") is not None]
+        report[day][stage] = {
+            "calls": len(calls),
+            "failures": sum(1 for c in calls if not c.get("success", True)),
+            "retries": len(retries),
+            "prompt_tokens": prompt_tokens,
+            "output_tokens": output_tokens,
+            "prefill_tokens_per_sec": round(prompt_tokens / (prompt_eval_ms / 1000), 1) if prompt_eval_ms else None,
+            "decode_tokens_per_sec": round(output_tokens / (eval_ms / 1000), 1) if eval_ms else None,
+            "load_ms": round(sum(c.get("load_ms") or 0 for c in calls), 1),
+            "retry_token_share": round(retry_tokens / (prompt_tokens + output_tokens), 3) if prompt_tokens + output_tokens else 0.0,
+            "retry_time_share": round(retry_ms / latency_ms, 3) if latency_ms else 0.0,
+            "p50_latency_ms": _percentile(latencies, 50),
+            "p95_latency_ms": _percentile(latencies, 95),
+        }
+    return dict(report)
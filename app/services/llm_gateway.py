@@ -0,0 +1,422 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import weakref
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Dict, List, Optional, AsyncIterator
+
+import httpx
+import ollama
+
+from app.config import settings
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.llm_call_log import build_record, record_call
+from app.services.llm_metrics import record_prefill, record_prefix
+from app.services.llm_slots import HostSlots
+
+logger = logging.getLogger(__name__)
+
+# Timeout for Ollama requests (10 minutes: combiner generations are the longest)
+OLLAMA_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+
+class Priority(IntEnum):
+    """Lower value is served first."""
+    INTERACTIVE = 0  # user-facing requests (daily summary)
+    BATCH = 10       # ingestion classification, clustering/combining
+
+
+class LLMUnavailableError(Exception):
+    """The LLM backend cannot take the request right now; callers should answer 503."""
+
+    retry_after = 30
+
+
+class LLMGatewayOverloaded(LLMUnavailableError):
+    """Raised when a request is rejected by admission control."""
+
+
+class LLMCircuitOpen(LLMUnavailableError):
+    """Raised without calling Ollama while the circuit breaker is open."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMDeadlineExceeded(LLMUnavailableError):
+    """Raised when a generation runs past its per-stage deadline."""
+
+
+def _is_backend_failure(error: BaseException) -> bool:
+    """Errors that say the Ollama host is down or saturated (these trip the breaker)."""
+    if isinstance(error, (ConnectionError, httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, ollama.ResponseError) and error.status_code >= 500
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "model", "future", "enqueued_at")
+
+    def __init__(self, priority: int, seq: int, model: str, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.model = model
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class LLMGateway:
+    """
+    Process-wide entry point for all Ollama generations.
+
+    - Keeps one AsyncClient (and its keep-alive connection pool) per event loop.
+    - Enforces the process's concurrency limit and optional per-model limits.
+    - Serves the process's waiting requests by priority, so interactive
+      summaries overtake queued batch work, and keeps `reserved_interactive`
+      slots free of batch work.
+    - With `host_slots`, also takes one of the host's slots shared with the
+      other processes, so the limit and the interactive reservation hold
+      across API workers, queue workers and the job runner.
+    - Rejects interactive requests once their queue is full (admission control)
+      instead of letting them wait behind a saturated backend.
+    - Fails fast while the circuit breaker is open and bounds every generation
+      by its stage deadline (settings.LLM_DEADLINES).
+    """
+
+    def __init__(
+        self,
+        host: str,
+        max_concurrency: int = 2,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        reserved_interactive: int = 1,
+        max_interactive_queue: int = 16,
+        breaker: Optional[CircuitBreaker] = None,
+        host_slots: Optional[HostSlots] = None,
+    ):
+        self.host = host
+        self.max_concurrency = max(1, max_concurrency)
+        self.model_concurrency = dict(model_concurrency or {})
+        self.reserved_interactive = min(max(0, reserved_interactive), self.max_concurrency - 1)
+        self.max_interactive_queue = max_interactive_queue
+        self.breaker = breaker or CircuitBreaker(f"ollama@{host}")
+        self.host_slots = host_slots
+
+        self._clients = weakref.WeakKeyDictionary()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._in_flight_by_model: Dict[str, int] = defaultdict(int)
+
+        # Metrics
+        self._admitted: Dict[str, int] = defaultdict(int)
+        self._rejected: Dict[str, int] = defaultdict(int)
+        self._wait_seconds: Dict[str, float] = defaultdict(float)
+        self._max_queue_depth: Dict[str, int] = defaultdict(int)
+
+    # ------------------------------------------------------------------
+    # Clients
+    # ------------------------------------------------------------------
+
+    def client(self) -> ollama.AsyncClient:
+        """Returns the pooled client bound to the running event loop."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return ollama.AsyncClient(host=self.host, timeout=OLLAMA_TIMEOUT)
+
+        client = self._clients.get(loop)
+        if client is None:
+            client = ollama.AsyncClient(host=self.host, timeout=OLLAMA_TIMEOUT)
+            self._clients[loop] = client
+        return client
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def _has_capacity(self, model: str, priority: int) -> bool:
+        limit = self.max_concurrency
+        if priority > Priority.INTERACTIVE:
+            limit -= self.reserved_interactive
+        if self._in_flight >= limit:
+            return False
+        model_limit = self.model_concurrency.get(model)
+        if model_limit is not None and self._in_flight_by_model[model] >= model_limit:
+            return False
+        return True
+
+    def _grant(self, model: str):
+        self._in_flight += 1
+        self._in_flight_by_model[model] += 1
+
+    def _release(self, model: str):
+        self._in_flight -= 1
+        self._in_flight_by_model[model] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hands free slots to waiters in priority order."""
+        if not self._waiters:
+            return
+        remaining = []
+        for waiter in sorted(self._waiters):
+            if waiter.future.done():
+                continue
+            if self._has_capacity(waiter.model, waiter.priority):
+                self._grant(waiter.model)
+                waiter.future.set_result(True)
+            else:
+                remaining.append(waiter)
+        heapq.heapify(remaining)
+        self._waiters = remaining
+
+    def _queue_depth(self, priority: int) -> int:
+        return sum(1 for w in self._waiters if w.priority == priority and not w.future.done())
+
+    async def acquire(self, model: str, priority: int = Priority.BATCH):
+        name = Priority(priority).name.lower()
+        if priority == Priority.INTERACTIVE and self._queue_depth(priority) >= self.max_interactive_queue:
+            self._rejected[name] += 1
+            logger.warning(f"LLM gateway rejected {model} request: interactive queue full")
+            raise LLMGatewayOverloaded("LLM backend is busy, please retry shortly.")
+
+        waiter = _Waiter(priority, next(self._seq), model, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        self._dispatch()
+        self._max_queue_depth[name] = max(self._max_queue_depth[name], self._queue_depth(priority))
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slot was granted just before cancellation; hand it back
+                self._release(model)
+            raise
+        finally:
+            self._wait_seconds[name] += time.monotonic() - waiter.enqueued_at
+
+        self._admitted[name] += 1
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: int = Priority.BATCH):
+        await self.acquire(model, priority)
+        try:
+            held = None
+            if self.host_slots is not None:
+                held = await self.host_slots.acquire(interactive=priority == Priority.INTERACTIVE)
+            try:
+                yield
+            finally:
+                if held is not None:
+                    # Shielded: a lock left on a pooled connection would keep the slot taken
+                    await asyncio.shield(self.host_slots.release(held))
+        finally:
+            self._release(model)
+
+    # ------------------------------------------------------------------
+    # Generation
+    # ------------------------------------------------------------------
+
+    def _record_prefill(self, model: str, messages: list, response):
+        prompt_eval_count = getattr(response, "prompt_eval_count", None)
+        if isinstance(prompt_eval_count, int):
+            prompt = "".join(m.get("content", "") for m in messages if isinstance(m, dict))
+            record_prefill(model, prompt, prompt_eval_count)
+
+    def check_available(self):
+        """Raises LLMCircuitOpen while the breaker refuses calls (no side effects)."""
+        if not self.breaker.is_available():
+            raise LLMCircuitOpen("LLM backend is unavailable, please retry shortly.", self.breaker.retry_after())
+
+    def _admit(self, model: str):
+        if not self.breaker.allow_request():
+            logger.warning(f"LLM gateway refused {model} request: circuit open")
+            raise LLMCircuitOpen("LLM backend is unavailable, please retry shortly.", self.breaker.retry_after())
+
+    async def _guarded(self, awaitable, stage: str, deadline: Optional[float]):
+        """Awaits one Ollama round trip under its deadline and reports the outcome to the breaker."""
+        try:
+            if deadline:
+                result = await asyncio.wait_for(awaitable, deadline)
+            else:
+                result = await awaitable
+        except asyncio.TimeoutError as e:
+            self.breaker.record_failure(e)
+            raise LLMDeadlineExceeded(f"{stage} exceeded its {deadline:.0f}s deadline") from e
+        except BaseException as e:
+            if _is_backend_failure(e):
+                self.breaker.record_failure(e)
+            else:
+                self.breaker.record_ignored()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def chat(
+        self, model: str, messages: list, priority: int = Priority.BATCH,
+        stage: str = None, attempt: int = 1, deadline: float = None, **kwargs
+    ):
+        """
+        Non-streaming chat completion through the shared client. `stage` and
+        `attempt` label the call in the per-call log (stage defaults to the
+        model); `deadline` overrides the stage deadline for the generation.
+        """
+        kwargs.setdefault("keep_alive", settings.OLLAMA_KEEP_ALIVE)
+        stage = stage or model
+        deadline = deadline or settings.LLM_DEADLINES.get(stage)
+        self._admit(model)
+        start = time.monotonic()
+        try:
+            async with self.slot(model, priority):
+                response = await self._guarded(
+                    self.client().chat(model=model, messages=messages, stream=False, **kwargs), stage, deadline
+                )
+        except BaseException as e:
+            self.breaker.record_ignored()
+            record_call(build_record(model, stage, attempt, (time.monotonic() - start) * 1000, error=e))
+            raise
+        record_call(build_record(model, stage, attempt, (time.monotonic() - start) * 1000, response))
+        self._record_prefill(model, messages, response)
+        return response
+
+    async def stream_chat(
+        self, model: str, messages: list, priority: int = Priority.INTERACTIVE,
+        stage: str = None, attempt: int = 1, deadline: float = None, **kwargs
+    ) -> AsyncIterator:
+        """
+        Streaming chat completion; the slot is held until the stream ends.
+        The deadline bounds the time to the first token only.
+        """
+        kwargs.setdefault("keep_alive", settings.OLLAMA_KEEP_ALIVE)
+        stage = stage or model
+        deadline = deadline or settings.LLM_DEADLINES.get(stage)
+        self._admit(model)
+        start = time.monotonic()
+        final = None
+        try:
+            async with self.slot(model, priority):
+                async def first_part():
+                    stream = await self.client().chat(model=model, messages=messages, stream=True, **kwargs)
+                    try:
+                        return stream, await stream.__anext__()
+                    except StopAsyncIteration:
+                        return stream, None
+
+                stream, part = await self._guarded(first_part(), stage, deadline)
+                while part is not None:
+                    if getattr(part, "done", False):
+                        # Token counts and durations are only reported on the final part
+                        final = part
+                        self._record_prefill(model, messages, part)
+                    yield part
+                    try:
+                        part = await stream.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    except BaseException as e:
+                        if _is_backend_failure(e):
+                            self.breaker.record_failure(e)
+                        raise
+        except BaseException as e:
+            self.breaker.record_ignored()
+            record_call(build_record(model, stage, attempt, (time.monotonic() - start) * 1000, error=e))
+            raise
+        record_call(build_record(model, stage, attempt, (time.monotonic() - start) * 1000, final))
+
+    async def warm_up(self, model: str, prefix: str = None):
+        """
+        Loads `model` with the configured keep_alive before a batch stage.
+        With `prefix`, the shared instruction text is also prefilled so the
+        first real request reuses Ollama's prompt cache. Failures are logged
+        and ignored: warm-up is an optimization only.
+        """
+        start = time.monotonic()
+        try:
+            self._admit(model)
+            try:
+                async with self.slot(model, Priority.BATCH):
+                    if prefix:
+                        request = self.client().chat(
+                            model=model,
+                            messages=[{"role": "user", "content": prefix}],
+                            options={"num_predict": 1},
+                            keep_alive=settings.OLLAMA_KEEP_ALIVE
+                        )
+                    else:
+                        # An empty prompt only loads the model into memory
+                        request = self.client().generate(model=model, prompt="", keep_alive=settings.OLLAMA_KEEP_ALIVE)
+                    response = await self._guarded(request, "warm_up", settings.LLM_DEADLINES.get("warm_up"))
+            finally:
+                self.breaker.record_ignored()
+            record_call(build_record(model, "warm_up", 1, (time.monotonic() - start) * 1000, response))
+            prompt_eval_count = getattr(response, "prompt_eval_count", None)
+            if prefix and isinstance(prompt_eval_count, int):
+                # The uncached prefix cost later calls' savings are measured against
+                record_prefix(model, prefix, prompt_eval_count)
+            logger.info(f"Warmed up {model} in {time.monotonic() - start:.2f} seconds (keep_alive={settings.OLLAMA_KEEP_ALIVE})")
+        except Exception as e:
+            logger.warning(f"Warm-up of {model} failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        queued = defaultdict(int)
+        for waiter in self._waiters:
+            if not waiter.future.done():
+                queued[Priority(waiter.priority).name.lower()] += 1
+
+        priorities = [p.name.lower() for p in Priority]
+        return {
+            "in_flight": self._in_flight,
+            "in_flight_by_model": {m: n for m, n in self._in_flight_by_model.items() if n},
+            "queue_depth": {p: queued[p] for p in priorities},
+            "max_queue_depth": {p: self._max_queue_depth[p] for p in priorities},
+            "admitted": {p: self._admitted[p] for p in priorities},
+            "rejected": {p: self._rejected[p] for p in priorities},
+            "avg_wait_seconds": {
+                p: round(self._wait_seconds[p] / self._admitted[p], 3) if self._admitted[p] else 0.0
+                for p in priorities
+            },
+            "circuit": self.breaker.stats(),
+            "host_slots": self.host_slots.stats() if self.host_slots is not None else None,
+        }
+
+
+_gateways: Dict[str, LLMGateway] = {}
+
+
+def get_gateway(host: str = None) -> LLMGateway:
+    """Returns the process-wide gateway for `host` (default: OLLAMA_HOST)."""
+    host = host or settings.OLLAMA_HOST
+    gateway = _gateways.get(host)
+    if gateway is None:
+        gateway = LLMGateway(
+            host=host,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            model_concurrency=settings.LLM_MODEL_CONCURRENCY,
+            reserved_interactive=settings.LLM_RESERVED_INTERACTIVE_SLOTS,
+            max_interactive_queue=settings.LLM_MAX_INTERACTIVE_QUEUE,
+            breaker=CircuitBreaker(
+                f"ollama@{host}",
+                failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=settings.LLM_BREAKER_RESET_SECONDS,
+            ),
+            host_slots=HostSlots(
+                host,
+                slots=settings.LLM_MAX_CONCURRENCY,
+                reserved_interactive=settings.LLM_RESERVED_INTERACTIVE_SLOTS,
+                poll_interval=settings.LLM_HOST_SLOT_POLL_SECONDS,
+            ) if settings.LLM_HOST_SLOTS else None,
+        )
+        _gateways[host] = gateway
+    return gateway
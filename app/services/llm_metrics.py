@@ -0,0 +1,107 @@
+from collections import defaultdict
+from typing import Dict
+
+# Per-model counters of logical generations (one classification, one summary,
+# one combined article) and the attempts spent on them.
+_generations: Dict[str, Dict[str, int]] = defaultdict(lambda: {"generations": 0, "attempts": 0, "failures": 0})
+
+# Per-model prompt prefill: the prompt_eval_count Ollama reports (tokens
+# actually evaluated; cached prefix tokens are skipped) and the prefix tokens
+# calls were spared, measured against the model's uncached prefix below.
+_prefill: Dict[str, Dict[str, int]] = defaultdict(
+    lambda: {"calls": 0, "prompt_tokens_evaluated": 0, "prefix_cache_hits": 0, "prefill_saved_tokens": 0}
+)
+
+# Per-model shared prompt prefix and its uncached cost (system prompt, chat
+# template and instructions) as evaluated by the warm-up call.
+_prefixes: Dict[str, dict] = {}
+
+# Per-model combiner source usage: articles sent in a cluster vs. articles the
+# combiner left out of combined_indices (prompt tokens spent for nothing).
+_sources: Dict[str, Dict[str, int]] = defaultdict(
+    lambda: {"clusters": 0, "sources_sent": 0, "sources_dropped": 0, "clusters_with_drops": 0}
+)
+
+
+def record_generation(model: str, attempts: int, success: bool):
+    """Records the outcome of a generation that took `attempts` LLM calls."""
+    entry = _generations[model]
+    entry["generations"] += 1
+    entry["attempts"] += attempts
+    if not success:
+        entry["failures"] += 1
+
+
+def record_prefix(model: str, prefix: str, prompt_eval_count: int):
+    """
+    Records the tokens Ollama evaluated to prefill `prefix` for `model`. The
+    largest count seen is kept: a warm-up that itself hit the cache reports
+    less than the uncached prefix.
+    """
+    baseline = _prefixes.get(model)
+    if baseline is None or baseline["text"] != prefix or prompt_eval_count > baseline["tokens"]:
+        _prefixes[model] = {"text": prefix, "tokens": prompt_eval_count}
+
+
+def record_prefill(model: str, prompt: str, prompt_eval_count: int):
+    """Records the tokens Ollama evaluated for one call with the given prompt text."""
+    entry = _prefill[model]
+    entry["calls"] += 1
+    entry["prompt_tokens_evaluated"] += prompt_eval_count
+    baseline = _prefixes.get(model)
+    if not baseline or not baseline["tokens"] or not prompt.startswith(baseline["text"]):
+        return
+    # Every word of the rest of the prompt is at least one token, so without a
+    # cache hit Ollama evaluates at least the prefix plus that many tokens
+    suffix_words = len(prompt[len(baseline["text"]):].split())
+    if prompt_eval_count < baseline["tokens"] + suffix_words:
+        entry["prefix_cache_hits"] += 1
+        entry["prefill_saved_tokens"] += baseline["tokens"]
+
+
+def record_sources(model: str, sent: int, combined: int):
+    """Records how many of the `sent` source articles the combiner actually combined."""
+    entry = _sources[model]
+    dropped = max(0, sent - combined)
+    entry["clusters"] += 1
+    entry["sources_sent"] += sent
+    entry["sources_dropped"] += dropped
+    if dropped:
+        entry["clusters_with_drops"] += 1
+
+
+def get_generation_stats() -> Dict[str, dict]:
+    """
+    Returns per-model retry and prefill metrics. `retries` counts the wasted
+    generations (every attempt beyond the first); `retry_rate` is retries per
+    generation. `prefix_tokens` is the uncached cost of the model's shared prefix
+    measured at warm-up; `prefill_saved_tokens` credits it once per call that
+    provably reused the cached prefix (`prefix_cache_hits`). Calls whose hit
+    cannot be told apart from a miss are not credited, so it is a lower bound.
+    `dropped_per_cluster` is the mean number of source articles the combiner
+    left out of a cluster.
+    """
+    stats = {}
+    for model, entry in _generations.items():
+        retries = entry["attempts"] - entry["generations"]
+        stats[model] = {
+            **entry,
+            "retries": retries,
+            "retry_rate": round(retries / entry["generations"], 3) if entry["generations"] else 0.0,
+        }
+    for model, entry in _prefill.items():
+        stats.setdefault(model, {}).update({k: v for k, v in entry.items() if k != "calls"})
+        stats[model]["prefix_tokens"] = _prefixes[model]["tokens"] if model in _prefixes else 0
+    for model, entry in _sources.items():
+        stats.setdefault(model, {}).update({
+            **entry,
+            "dropped_per_cluster": round(entry["sources_dropped"] / entry["clusters"], 3) if entry["clusters"] else 0.0,
+        })
+    return stats
+
+
+def reset_generation_stats():
+    _generations.clear()
+    # Measured prefix costs are kept: they describe the models, not a run
+    _prefill.clear()
+    _sources.clear()
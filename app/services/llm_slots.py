@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import zlib
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock keys of the generation slots: this key in the high 32 bits,
+# then a hash of the Ollama host and the slot number
+LLM_SLOT_LOCK_KEY = 727003
+
+
+class HostSlots:
+    """
+    Generation slots of one Ollama host, shared by every process that calls
+    it (API workers, queue workers, the job runner) on any node. A slot is a
+    session-level Postgres advisory lock held on a dedicated connection while
+    the generation runs, so it is freed if the process dies.
+
+    The first `reserved_interactive` slots are never taken by batch work.
+    Waiting processes poll every `poll_interval` seconds; the order among
+    them is not global (each gateway still orders its own waiters).
+    """
+
+    def __init__(self, host: str, slots: int, reserved_interactive: int = 0,
+                 poll_interval: float = 0.2, bind=engine):
+        self.host = host
+        self.slots = max(1, slots)
+        self.reserved_interactive = min(max(0, reserved_interactive), self.slots - 1)
+        self.poll_interval = poll_interval
+        self.bind = bind
+        host_hash = zlib.crc32(host.encode()) & 0xFFFF
+        self.keys: List[int] = [(LLM_SLOT_LOCK_KEY << 32) | (host_hash << 16) | i for i in range(self.slots)]
+        self.held = 0
+        self.uncoordinated = 0
+
+    def _candidates(self, interactive: bool) -> List[int]:
+        # Interactive requests try the reserved slots first, batch work the others only
+        return self.keys if interactive else self.keys[self.reserved_interactive:]
+
+    async def acquire(self, interactive: bool) -> Optional[Tuple[object, int]]:
+        """
+        Waits for a free slot and returns the handle to release it with.
+        Returns None (after logging) when the database cannot be reached: the
+        generation then runs under the process's own limits only.
+        """
+        try:
+            conn = await self.bind.connect()
+        except Exception as e:
+            self.uncoordinated += 1
+            logger.warning(f"LLM slots for {self.host} unavailable, running uncoordinated: {e}")
+            return None
+        try:
+            while True:
+                for key in self._candidates(interactive):
+                    acquired = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})).scalar()
+                    if acquired:
+                        # Autobegun transaction would otherwise stay open during the generation
+                        await conn.commit()
+                        self.held += 1
+                        return conn, key
+                await conn.commit()
+                await asyncio.sleep(self.poll_interval)
+        except asyncio.CancelledError:
+            await self._close(conn, None)
+            raise
+        except Exception as e:
+            await self._close(conn, None)
+            self.uncoordinated += 1
+            logger.warning(f"LLM slots for {self.host} unavailable, running uncoordinated: {e}")
+            return None
+
+    async def release(self, handle: Tuple[object, int]):
+        conn, key = handle
+        self.held -= 1
+        await self._close(conn, key)
+
+    async def _close(self, conn, key: Optional[int]):
+        try:
+            if key is not None:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                await conn.commit()
+        except Exception:
+            # Never hand a connection that may still hold the lock back to the pool
+            try:
+                await conn.invalidate()
+            except Exception:
+                pass
+        finally:
+            try:
+                await conn.close()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "slots": self.slots,
+            "reserved_interactive": self.reserved_interactive,
+            "held": self.held,
+            "uncoordinated": self.uncoordinated,
+        }
@@ -29,6 +29,129 @@ ALLOWED_CONTENT_TYPES = [
 TONE_KEYS = ["Neutral", "Informative", "Emotional"]
 
 
+# -----------------------------
+# JSON schemas for Ollama's `format` parameter (constrained decoding).
+# Derived from the rules enforced by the validators below; the sum-to-5.0
+# rule cannot be expressed in JSON schema and is repaired locally instead.
+# -----------------------------
+
+CLASSIFICATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        **{cat: {"type": "number", "minimum": 0, "maximum": 5} for cat in CATEGORIES},
+        "Length": {"type": "number", "minimum": 0, "maximum": 1},
+        "Complexity": {"type": "number", "minimum": 0, "maximum": 1},
+        "Tone": {
+            "type": "object",
+            "properties": {tk: {"type": "number", "minimum": 0, "maximum": 1} for tk in TONE_KEYS},
+            "required": TONE_KEYS,
+            "additionalProperties": False,
+        },
+        "Content_type": {"type": "string", "enum": ALLOWED_CONTENT_TYPES},
+        "Named Entities": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": CATEGORIES + METADATA_KEYS,
+    "additionalProperties": False,
+}
+
+SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "greeting": {"type": "string", "minLength": 1},
+        "summary": {"type": "string", "minLength": 50},
+        "key_points": {"type": "array", "items": {"type": "string", "minLength": 1}, "minItems": 1},
+    },
+    "required": ["greeting", "summary", "key_points"],
+}
+
+COMBINER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "articles_combined": {"type": "integer", "minimum": 1},
+        "combined_indices": {"type": "array", "items": {"type": "integer", "minimum": 1}},
+        "title": {"type": "string", "minLength": 1},
+        "generated_article": {"type": "string", "minLength": 1},
+        "analysis": CLASSIFICATION_SCHEMA,
+    },
+    "required": ["articles_combined", "combined_indices", "title", "generated_article", "analysis"],
+    "additionalProperties": False,
+}
+
+
+def _to_number(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            return value
+    return value
+
+
+def repair_output(result: dict):
+    """
+    Fix common near-misses in a classification output before validation,
+    so a cheap local fix replaces a full regeneration.
+    Handles: nested "category" object, "Named_Entities"-style key variants,
+    flat tone keys, numeric strings, out-of-range 0-1 metadata and
+    Content_type casing. Category sums are normalized by validate_output.
+    Returns the repaired dict (mutated in place) or the input unchanged.
+    """
+    if not isinstance(result, dict) or "error" in result:
+        return result
+
+    # Flatten nested categories
+    if "category" in result and isinstance(result["category"], dict):
+        for k, v in result.pop("category").items():
+            result[k] = v
+
+    # Named Entities key variants
+    for variant in ("Named_Entities", "Named_entities", "named_entities", "NamedEntities", "Named entities"):
+        if variant in result and "Named Entities" not in result:
+            result["Named Entities"] = result.pop(variant)
+    entities = result.get("Named Entities")
+    if isinstance(entities, str):
+        result["Named Entities"] = [e.strip() for e in entities.split(",") if e.strip()]
+    elif isinstance(entities, list):
+        # Entities occasionally come back as {"name": ...} objects
+        result["Named Entities"] = [
+            e.get("name") if isinstance(e, dict) else e
+            for e in entities
+            if isinstance(e, str) or (isinstance(e, dict) and isinstance(e.get("name"), str))
+        ]
+
+    # Tone keys emitted at top level instead of nested
+    if not isinstance(result.get("Tone"), dict):
+        flat = {k.lower(): k for k in result if isinstance(k, str)}
+        if all(tk.lower() in flat for tk in TONE_KEYS):
+            result["Tone"] = {tk: result.pop(flat[tk.lower()]) for tk in TONE_KEYS}
+    if isinstance(result.get("Tone"), dict):
+        tone = {str(k).capitalize(): _to_number(v) for k, v in result["Tone"].items()}
+        for tk, value in tone.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                tone[tk] = min(1.0, max(0.0, float(value)))
+        result["Tone"] = tone
+
+    for cat in CATEGORIES:
+        if cat in result:
+            result[cat] = _to_number(result[cat])
+
+    for key in ("Length", "Complexity"):
+        value = _to_number(result.get(key))
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            result[key] = min(1.0, max(0.0, float(value)))
+
+    content_type = result.get("Content_type")
+    if isinstance(content_type, str):
+        for allowed in ALLOWED_CONTENT_TYPES:
+            if content_type.strip().lower() == allowed.lower():
+                result["Content_type"] = allowed
+                break
+
+    return result
+
+
 def validate_output(result: dict):
     """
     Validate an LLM classification output according to strict rules.
@@ -212,3 +335,75 @@ def validate_summary_output(result: dict):
     # All checks passed
     # -----------------------------
     return True, None
+
+
+def repair_summary_output(result: dict):
+    """
+    Fix near-misses in a summary output: key_points given as a single string,
+    blank key points and surrounding whitespace.
+    """
+    if not isinstance(result, dict):
+        return result
+
+    key_points = result.get("key_points")
+    if isinstance(key_points, str):
+        key_points = [p.strip(" -*\u2022") for p in key_points.splitlines()]
+    if isinstance(key_points, list):
+        result["key_points"] = [p.strip() for p in key_points if isinstance(p, str) and p.strip()]
+
+    for key in ("greeting", "summary"):
+        if isinstance(result.get(key), str):
+            result[key] = result[key].strip()
+
+    return result
+
+
+def validate_combiner_output(result: dict, num_sources: int):
+    """
+    Validate a news-combiner output.
+    Expected structure:
+    {
+        "articles_combined": int,
+        "combined_indices": [int, ...],   # 1-based, within the input set
+        "title": "...",
+        "generated_article": "...",
+        "analysis": { ...15 classification keys... }
+    }
+    Returns: (bool, error_message)
+    """
+    # -----------------------------
+    # 1. Correct type
+    # -----------------------------
+    if not isinstance(result, dict):
+        return False, "Output is not a Python dictionary."
+
+    if "error" in result:
+        return False, f"Model reported an error: {result['error']}"
+
+    # -----------------------------
+    # 2. Text fields
+    # -----------------------------
+    for key in ("title", "generated_article"):
+        if not isinstance(result.get(key), str) or not result[key].strip():
+            return False, f"Field '{key}' must be a non-empty string."
+
+    # -----------------------------
+    # 3. Combined indices
+    # -----------------------------
+    indices = result.get("combined_indices", [])
+    if not isinstance(indices, list) or any(not isinstance(i, int) or isinstance(i, bool) for i in indices):
+        return False, "Field 'combined_indices' must be a list of integers."
+    if any(not (1 <= i <= num_sources) for i in indices):
+        return False, f"combined_indices must be between 1 and {num_sources}."
+
+    # -----------------------------
+    # 4. Analysis
+    # -----------------------------
+    analysis = result.get("analysis")
+    if not isinstance(analysis, dict):
+        return False, "Field 'analysis' must be a dictionary."
+    is_valid, error_msg = validate_output(analysis)
+    if not is_valid:
+        return False, f"Invalid analysis: {error_msg}"
+
+    return True, None
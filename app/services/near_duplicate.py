@@ -0,0 +1,124 @@
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.prompt_builder import clean_text
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+# Texts shorter than this many words give unstable fingerprints and are skipped
+MIN_WORDS = 30
+# Maximum Hamming distance between fingerprints of near-duplicates
+DEFAULT_MAX_DISTANCE = 6
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _hash64(token: str) -> int:
+    # blake2b rather than hash(): fingerprints must be stable across processes
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash over word shingles of the cleaned text. Boilerplate lines
+    (share buttons, newsletter prompts, copyright footers) are dropped first,
+    so the same wire story with different page chrome hashes alike.
+    Returns None for texts too short to fingerprint reliably.
+    """
+    words = _WORD_RE.findall(clean_text(text).lower())
+    if len(words) < MIN_WORDS:
+        return None
+
+    count = len(words) - SHINGLE_SIZE + 1
+    hashes = np.fromiter(
+        (_hash64(" ".join(words[i:i + SHINGLE_SIZE])) for i in range(count)), dtype=np.uint64, count=count
+    )
+    # Per bit: +1 for every shingle hash with the bit set, -1 otherwise
+    bits = (hashes[:, None] >> np.arange(FINGERPRINT_BITS, dtype=np.uint64)) & np.uint64(1)
+    weights = 2 * bits.sum(axis=0, dtype=np.int64) - count
+
+    fingerprint = 0
+    for bit in np.flatnonzero(weights > 0):
+        fingerprint |= 1 << int(bit)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """
+    In-memory near-duplicate index over SimHash fingerprints.
+
+    Fingerprints are split into `max_distance + 1` bands; by the pigeonhole
+    principle two fingerprints within `max_distance` bits agree exactly on at
+    least one band, so only keys sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._bands = max_distance + 1
+        self._band_bits = -(-FINGERPRINT_BITS // self._bands)
+        self._buckets: List[Dict[int, List[Hashable]]] = [defaultdict(list) for _ in range(self._bands)]
+        self._fingerprints: Dict[Hashable, int] = {}
+
+    def _band_values(self, fingerprint: int):
+        mask = (1 << self._band_bits) - 1
+        for band in range(self._bands):
+            yield band, fingerprint >> (band * self._band_bits) & mask
+
+    def add(self, key: Hashable, fingerprint: Optional[int]):
+        if fingerprint is None or key in self._fingerprints:
+            return
+        self._fingerprints[key] = fingerprint
+        for band, value in self._band_values(fingerprint):
+            self._buckets[band][value].append(key)
+
+    def query(self, fingerprint: Optional[int]) -> List[Tuple[Hashable, int]]:
+        """Returns (key, distance) of all indexed near-duplicates, closest first."""
+        if fingerprint is None:
+            return []
+        candidates = set()
+        for band, value in self._band_values(fingerprint):
+            candidates.update(self._buckets[band].get(value, ()))
+        matches = []
+        for key in candidates:
+            distance = hamming_distance(fingerprint, self._fingerprints[key])
+            if distance <= self.max_distance:
+                matches.append((key, distance))
+        matches.sort(key=lambda m: m[1])
+        return matches
+
+    def nearest(self, fingerprint: Optional[int]) -> Optional[Hashable]:
+        matches = self.query(fingerprint)
+        return matches[0][0] if matches else None
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def __contains__(self, key):
+        return key in self._fingerprints
+
+
+def group_near_duplicates(items: List[Tuple[Hashable, str]], max_distance: int = DEFAULT_MAX_DISTANCE) -> Dict[Hashable, List[Hashable]]:
+    """
+    Groups (key, text) pairs into near-duplicate sets. The first key of each
+    set (in input order) represents it. Returns {representative: [twins]};
+    unique texts map to an empty list.
+    """
+    index = SimHashIndex(max_distance)
+    groups: Dict[Hashable, List[Hashable]] = {}
+    for key, text in items:
+        fingerprint = simhash(text)
+        representative = index.nearest(fingerprint)
+        if representative is None:
+            index.add(key, fingerprint)
+            groups[key] = []
+        else:
+            groups[representative].append(key)
+    return groups
@@ -1,21 +1,35 @@
 import ollama
-from typing import List, Dict
+from typing import List, Dict, Tuple, Optional, AsyncIterator
 import json
 import logging
-import httpx
 
-import os
+from app.services.llm_gateway import get_gateway, Priority, LLMUnavailableError
+from app.services.prompt_builder import prepare_text, prepare_texts
+from app.services.llm_validator import (
+    CLASSIFICATION_SCHEMA, SUMMARY_SCHEMA, repair_output, repair_summary_output, validate_summary_output
+)
+from app.services.llm_metrics import record_generation
 
 logger = logging.getLogger(__name__)
 
-# Timeout for Ollama requests (5 minutes for large summaries)
-OLLAMA_TIMEOUT = httpx.Timeout(300.0, connect=10.0)
+# Shared prompt prefix for news-summarizer; the per-user data is appended after it
+SUMMARY_INSTRUCTIONS = """INSTRUCTIONS:
+Generate a Daily Briefing JSON object based on the articles and preferences below.
+Structure:
+{
+  "greeting": "...",
+  "summary": "...",
+  "key_points": ["..."]
+}
+Output ONLY valid JSON.
+
+Here is the data (User Preferences + Articles):
+"""
 
 class NLPService:
     def __init__(self, model_name="news-classifier", host=None):
-        if host is None:
-            host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
-        self.client = ollama.AsyncClient(host=host, timeout=OLLAMA_TIMEOUT)
+        # All generations go through the shared gateway (pooled client + concurrency limits)
+        self.gateway = get_gateway(host)
         self.model_name = model_name
 
     async def classify_article(self, text: str) -> List[float]:
@@ -23,14 +37,16 @@ class NLPService:
         Classifies the article and returns a vector of scores for the categories.
         """
         prompt = f"""Analyze the following article and return the JSON object with category scores:
-        {text}
+        {prepare_text(text, self.model_name)}
         """
 
         try:
-            response = await self.client.chat(
+            response = await self.gateway.chat(
                 model=self.model_name,
                 messages=[{"role": "user", "content": prompt}],
-                stream=False
+                priority=Priority.BATCH,
+                stage="classify",
+                format=CLASSIFICATION_SCHEMA
             )
             raw_response = response.message.content
 
@@ -41,12 +57,8 @@ class NLPService:
             if start != -1 and end != -1:
                 cleaned = cleaned[start:end+1]
 
-            result = json.loads(cleaned)
-
-            # Flatten if needed
-            if "category" in result and isinstance(result["category"], dict):
-                for k, v in result["category"].items():
-                    result[k] = v
+            result = repair_output(json.loads(cleaned))
+            record_generation(self.model_name, attempts=1, success=True)
 
             categories = [
                 "Politics & Law", "Economy & Business", "Science & Technology",
@@ -59,81 +71,116 @@ class NLPService:
             return scores
 
         except Exception as e:
+            record_generation(self.model_name, attempts=1, success=False)
             logger.error(f"Error classifying article: {e}")
             # Return zero vector on error
             return [0.0] * 10
 
-    async def summarize_articles(self, articles_text: List[str], user_preferences: dict = None) -> str:
-        """
-        Summarizes a list of articles using the news-summarizer model.
-        Includes a validation retry loop (up to 3 attempts).
-        """
-        from app.services.llm_validator import validate_summary_output
-
-        logger.info(f"Summarizing {len(articles_text)} articles with preferences: {user_preferences}")
-        model = "news-summarizer"
+    SUMMARY_MODEL = "news-summarizer"
 
+    def _build_summary_prompt(self, articles_text: List[str], user_preferences: dict = None) -> str:
         # Build the input for the model
         input_data = {
             "preferences": user_preferences if user_preferences else {},
-            "articles": articles_text
+            "articles": prepare_texts(articles_text, self.SUMMARY_MODEL)
         }
 
-        # Serialize to string for the prompt
-        import json
-        data_json = json.dumps(input_data, indent=2)
+        # Serialize to string for the prompt (compact: indentation only costs tokens)
+        data_json = json.dumps(input_data, ensure_ascii=False, separators=(",", ":"))
 
-        explicit_prompt = f"""
-Here is the data (User Preferences + Articles):
-{data_json}
+        # Static instructions first so Ollama can reuse the cached prefix across users
+        return SUMMARY_INSTRUCTIONS + data_json + "\n"
 
-INSTRUCTIONS:
-Generate a Daily Briefing JSON object based on the above articles and preferences.
-Structure:
-{{
-  "greeting": "...",
-  "summary": "...",
-  "key_points": ["..."]
-}}
-Output ONLY valid JSON.
-"""
+    @staticmethod
+    def _clean_summary_response(raw_content: str) -> str:
+        # Clean up potential markdown code blocks
+        cleaned = raw_content.strip()
+        if cleaned.startswith("```"):
+            start = cleaned.find("{")
+            end = cleaned.rfind("}")
+            if start != -1 and end != -1:
+                cleaned = cleaned[start:end+1]
+        return cleaned
+
+    def parse_summary(self, raw_content: str) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Parses and validates a raw summarizer response.
+        Near-misses are repaired locally before validation.
+        Returns: (summary_dict, None) if valid, otherwise (None, error_message)
+        """
+        try:
+            result = json.loads(self._clean_summary_response(raw_content))
+        except json.JSONDecodeError as je:
+            return None, f"JSON parse error: {je}"
+
+        result = repair_summary_output(result)
+
+        is_valid, error_msg = validate_summary_output(result)
+        if not is_valid:
+            return None, error_msg
+        return result, None
+
+    async def summarize_articles(self, articles_text: List[str], user_preferences: dict = None) -> str:
+        """
+        Summarizes a list of articles using the news-summarizer model.
+        Includes a validation retry loop (up to 3 attempts).
+        Raises LLMUnavailableError when the gateway cannot admit the request,
+        the circuit is open or the deadline passes (no retry in those cases).
+        """
+        logger.info(f"Summarizing {len(articles_text)} articles with preferences: {user_preferences}")
+        explicit_prompt = self._build_summary_prompt(articles_text, user_preferences)
 
         # Retry loop with validation
         for attempt in range(3):
             try:
                 logger.debug(f"Summary generation attempt {attempt + 1}/3")
-                response = await self.client.chat(
-                    model=model,
+                response = await self.gateway.chat(
+                    model=self.SUMMARY_MODEL,
                     messages=[{"role": "user", "content": explicit_prompt}],
-                    stream=False
+                    priority=Priority.INTERACTIVE,
+                    stage="summarize",
+                    attempt=attempt + 1,
+                    format=SUMMARY_SCHEMA
                 )
-                raw_content = response.message.content
-
-                # Clean up potential markdown code blocks
-                cleaned = raw_content.strip()
-                if cleaned.startswith("```"):
-                    start = cleaned.find("{")
-                    end = cleaned.rfind("}")
-                    if start != -1 and end != -1:
-                        cleaned = cleaned[start:end+1]
-
-                # Parse JSON
-                try:
-                    result = json.loads(cleaned)
-                except json.JSONDecodeError as je:
-                    logger.warning(f"JSON parse error on attempt {attempt + 1}: {je}")
-                    continue
-
-                # Validate structure
-                is_valid, error_msg = validate_summary_output(result)
-                if is_valid:
+
+                result, error_msg = self.parse_summary(response.message.content)
+                if result is not None:
                     logger.info(f"Summary validation passed on attempt {attempt + 1}")
-                    return cleaned
+                    record_generation(self.SUMMARY_MODEL, attempts=attempt + 1, success=True)
+                    return json.dumps(result, ensure_ascii=False)
                 else:
                     logger.warning(f"Summary validation failed on attempt {attempt + 1}: {error_msg}")
 
+            except LLMUnavailableError:
+                raise
             except Exception as e:
                 logger.error(f"Error summarizing articles on attempt {attempt + 1}: {e}")
 
+        record_generation(self.SUMMARY_MODEL, attempts=3, success=False)
         logger.error("Failed to generate valid summary after 3 attempts.")
         return json.dumps({"error": "Failed to generate summary after 3 attempts."})
+
+    async def stream_summary(self, articles_text: List[str], user_preferences: dict = None) -> AsyncIterator[str]:
+        """
+        Streams the raw summarizer output chunk by chunk as Ollama generates it.
+        Single attempt: the caller validates the assembled text with parse_summary.
+        """
+        logger.info(f"Streaming summary of {len(articles_text)} articles with preferences: {user_preferences}")
+        explicit_prompt = self._build_summary_prompt(articles_text, user_preferences)
+
+        async for part in self.gateway.stream_chat(
+            model=self.SUMMARY_MODEL,
+            messages=[{"role": "user", "content": explicit_prompt}],
+            priority=Priority.INTERACTIVE,
+            stage="summarize_stream",
+            format=SUMMARY_SCHEMA
+        ):
+            chunk = part.message.content
+            if chunk:
+                yield chunk
+
+    def complete_stream(self, raw_content: str) -> Tuple[Optional[dict], Optional[str]]:
+        """Validates the text assembled from stream_summary and records the outcome."""
+        result, error_msg = self.parse_summary(raw_content)
+        record_generation(self.SUMMARY_MODEL, attempts=1, success=result is not None)
+        return result, error_msg
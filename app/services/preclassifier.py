@@ -0,0 +1,241 @@
+import copy
+import logging
+import os
+import re
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, Ridge
+
+from app.config import settings
+from app.services.llm_validator import CATEGORIES, TONE_KEYS, validate_output
+from app.services.prompt_builder import clean_text
+
+logger = logging.getLogger(__name__)
+
+# Marker stored in articles.metadata for locally classified articles, so they
+# are never used as training labels (only LLM outputs are)
+SOURCE_KEY = "Classified_by"
+SOURCE_VALUE = "preclassifier"
+
+# Entities must appear in at least this many training labels to be matched
+MIN_ENTITY_COUNT = 2
+MAX_ENTITIES = 10
+
+
+def _preprocess(text: str) -> str:
+    # Module-level (not a lambda) so the fitted vectorizer can be pickled
+    return clean_text(text).lower()
+
+
+def _numeric_row(label: dict) -> List[float]:
+    row = [float(label[cat]) for cat in CATEGORIES]
+    row += [float(label["Length"]), float(label["Complexity"])]
+    row += [float(label["Tone"][tk]) for tk in TONE_KEYS]
+    return row
+
+
+def usable_labels(texts: List[str], labels: List[dict]) -> Tuple[List[str], List[dict]]:
+    """Keeps the (text, label) pairs whose label is an LLM output that passes validate_output."""
+    kept_texts, kept_labels = [], []
+    for text, label in zip(texts, labels):
+        if not text or not isinstance(label, dict) or SOURCE_KEY in label:
+            continue
+        label = copy.deepcopy(label)
+        is_valid, _ = validate_output(label)
+        if is_valid:
+            kept_texts.append(text)
+            kept_labels.append(label)
+    return kept_texts, kept_labels
+
+
+class PreClassifier:
+    """
+    In-process CPU stand-in for the news-classifier LLM, trained on the
+    classifications the LLM already produced (articles.metadata).
+
+    - TF-IDF features shared by all heads.
+    - Ridge regression for the category scores, Length, Complexity and Tone.
+    - Logistic regression for the top category and the Content_type; their
+      probabilities give the confidence used to decide on an LLM fallback.
+    - Named Entities are matched against the entities seen in the labels.
+    """
+
+    def __init__(self, vectorizer, regressor, category_model, content_type_model, entities, n_samples):
+        self.vectorizer = vectorizer
+        self.regressor = regressor
+        self.category_model = category_model
+        self.content_type_model = content_type_model
+        self.entities = entities
+        self.n_samples = n_samples
+        self.trained_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._entity_re = self._compile_entities(entities)
+
+    @staticmethod
+    def _compile_entities(entities: List[str]):
+        if not entities:
+            return None
+        # Longest first so "New York City" wins over "New York"
+        alternatives = sorted((re.escape(e) for e in entities), key=len, reverse=True)
+        return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b")
+
+    @classmethod
+    def train(cls, texts: List[str], labels: List[dict]) -> "PreClassifier":
+        """Fits all heads on valid LLM labels. Raises ValueError if the data is too thin."""
+        texts, labels = usable_labels(texts, labels)
+        if len(texts) < 10:
+            raise ValueError(f"Need at least 10 valid labelled articles, got {len(texts)}.")
+
+        top_categories = [max(CATEGORIES, key=lambda c: float(label[c])) for label in labels]
+        content_types = [label["Content_type"] for label in labels]
+        for name, values in (("top category", top_categories), ("Content_type", content_types)):
+            if len(set(values)) < 2:
+                raise ValueError(f"Labels contain a single {name}; cannot train a classifier.")
+
+        vectorizer = TfidfVectorizer(
+            preprocessor=_preprocess,
+            ngram_range=(1, 2), min_df=2, max_df=0.9, max_features=50000, sublinear_tf=True,
+        )
+        features = vectorizer.fit_transform(texts)
+
+        regressor = Ridge(alpha=1.0)
+        regressor.fit(features, np.array([_numeric_row(label) for label in labels]))
+
+        category_model = LogisticRegression(max_iter=1000, C=4.0)
+        category_model.fit(features, top_categories)
+
+        content_type_model = LogisticRegression(max_iter=1000, C=4.0)
+        content_type_model.fit(features, content_types)
+
+        counts = Counter(e for label in labels for e in set(label["Named Entities"]) if len(e) > 1)
+        entities = [e for e, n in counts.items() if n >= MIN_ENTITY_COUNT]
+
+        return cls(vectorizer, regressor, category_model, content_type_model, entities, len(texts))
+
+    def predict(self, texts: List[str]) -> List[Tuple[dict, float]]:
+        """
+        Returns (result, confidence) per text. `result` has the same shape as
+        the LLM output; confidence is the lower of the top-category and
+        Content_type probabilities (0 for texts with no known vocabulary).
+        """
+        if not texts:
+            return []
+        features = self.vectorizer.transform(texts)
+        numeric = self.regressor.predict(features)
+        category_proba = self.category_model.predict_proba(features)
+        content_proba = self.content_type_model.predict_proba(features)
+        has_vocabulary = np.asarray(features.getnnz(axis=1)) > 0
+
+        results = []
+        for i, text in enumerate(texts):
+            row = numeric[i]
+            scores = np.clip(row[:len(CATEGORIES)], 0.0, None)
+            # Keep the classifier's top category on top of the regressed scores
+            top = self.category_model.classes_[int(np.argmax(category_proba[i]))]
+            top_index = CATEGORIES.index(top)
+            scores[top_index] = max(scores[top_index], scores.max() + 1e-3)
+            scores = scores * 5.0 / scores.sum()
+
+            metadata = np.clip(row[len(CATEGORIES):], 0.0, 1.0)
+            result = {cat: round(float(s), 4) for cat, s in zip(CATEGORIES, scores)}
+            result["Length"] = round(float(metadata[0]), 4)
+            result["Complexity"] = round(float(metadata[1]), 4)
+            result["Tone"] = {tk: round(float(v), 4) for tk, v in zip(TONE_KEYS, metadata[2:])}
+            result["Content_type"] = str(self.content_type_model.classes_[int(np.argmax(content_proba[i]))])
+            result["Named Entities"] = self._match_entities(text)
+
+            confidence = float(min(category_proba[i].max(), content_proba[i].max())) if has_vocabulary[i] else 0.0
+            results.append((result, confidence))
+        return results
+
+    def _match_entities(self, text: str) -> List[str]:
+        if self._entity_re is None or not text:
+            return []
+        counts = Counter(self._entity_re.findall(text))
+        return [e for e, _ in counts.most_common(MAX_ENTITIES)]
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str) -> "PreClassifier":
+        model = joblib.load(path)
+        model._entity_re = PreClassifier._compile_entities(model.entities)
+        return model
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_entity_re"] = None
+        return state
+
+
+def evaluate(model: PreClassifier, texts: List[str], labels: List[dict], min_confidence: float) -> dict:
+    """
+    Agreement report of the pre-classifier against held-out LLM labels:
+    overall and for the articles it would accept at `min_confidence`.
+    """
+    texts, labels = usable_labels(texts, labels)
+    if not texts:
+        return {"articles": 0}
+
+    start = time.perf_counter()
+    predictions = model.predict(texts)
+    elapsed = time.perf_counter() - start
+
+    def agreement(pairs):
+        if not pairs:
+            return {"articles": 0}
+        top_match = sum(
+            max(CATEGORIES, key=lambda c: p[c]) == max(CATEGORIES, key=lambda c: float(l[c])) for p, l in pairs
+        )
+        type_match = sum(p["Content_type"] == l["Content_type"] for p, l in pairs)
+        mae = np.mean([abs(p[c] - float(l[c])) for p, l in pairs for c in CATEGORIES])
+        return {
+            "articles": len(pairs),
+            "top_category_agreement": round(top_match / len(pairs), 3),
+            "content_type_agreement": round(type_match / len(pairs), 3),
+            "category_score_mae": round(float(mae), 4),
+        }
+
+    pairs = [(p, l) for (p, _), l in zip(predictions, labels)]
+    accepted = [(p, l) for (p, c), l in zip(predictions, labels) if c >= min_confidence]
+    return {
+        "articles": len(texts),
+        "min_confidence": min_confidence,
+        "coverage": round(len(accepted) / len(texts), 3),
+        "articles_per_second": round(len(texts) / elapsed, 1) if elapsed else None,
+        "all": agreement(pairs),
+        "accepted": agreement(accepted),
+    }
+
+
+_loaded: dict = {}
+
+
+def get_preclassifier() -> Optional[PreClassifier]:
+    """
+    Returns the model at PRECLASSIFIER_MODEL_PATH, loaded once per process,
+    or None when the path is unset or no model has been trained yet.
+    """
+    path = settings.PRECLASSIFIER_MODEL_PATH
+    if not path or not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != mtime:
+        try:
+            model = PreClassifier.load(path)
+        except Exception as e:
+            logger.error(f"Could not load pre-classifier from {path}: {e}")
+            return None
+        logger.info(f"Loaded pre-classifier trained on {model.n_samples} articles ({model.trained_at})")
+        _loaded[path] = (mtime, model)
+    return _loaded[path][1]
@@ -0,0 +1,168 @@
+import re
+import logging
+from typing import List, Dict
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for English news prose (phi4 / qwen2.5 tokenizers)
+CHARS_PER_TOKEN = 4
+
+# Input token budget for the variable article text of each model.
+# Derived from num_ctx in scripts/init/ollama-models/*-modfile minus the
+# system prompt, the fixed instruction text and room for the generated output.
+MODEL_TOKEN_BUDGETS = {
+    "news-classifier": 6000,   # num_ctx 8192, ~1k system prompt, ~400 output
+    "news-combiner": 4000,     # num_ctx 8192, ~2k system prompt, long article output
+    "news-summarizer": 24000,  # num_ctx 32768, num_predict 4096
+}
+DEFAULT_TOKEN_BUDGET = 4000
+
+# Share of a truncated text kept from the start; the rest comes from the end
+LEAD_RATIO = 0.7
+TRUNCATION_MARKER = "\n[...]\n"
+
+# Lines that scrapers pick up from page chrome rather than the story itself.
+# Anchored to whole short lines: story sentences often start with these words
+BOILERPLATE_PATTERNS = [
+    r"^advertisement$",
+    r"^(share|share this|share this article|share on \w+)$",
+    r"^(follow us on|follow .* on (twitter|x|facebook|instagram)).*",
+    r"^sign up (for|to) .*newsletter.*",
+    r"^(read more|related( topics)?|more on this story|watch|listen)\s*:?\s*$",
+    r"^(click here|tap here) .*",
+    r"^(©|\(c\)|copyright)\s*(\d{4}|[^.]{0,60}$)",
+    r"^.{0,60}all rights reserved\.?$",
+    r"^(image|video|photo) (source|caption|credit)s?\s*[:,].*",
+    r"^getty images$",
+    r"^this video can ?not be played.*",
+    r"^(download|get) (the|our) .* app.*",
+    r"^(skip to content|back to top)$",
+]
+_BOILERPLATE_RE = re.compile("|".join(BOILERPLATE_PATTERNS), re.IGNORECASE)
+
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate; good enough for budgeting, no tokenizer needed."""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def get_token_budget(model_name: str) -> int:
+    return MODEL_TOKEN_BUDGETS.get(model_name, DEFAULT_TOKEN_BUDGET)
+
+
+def clean_text(text: str) -> str:
+    """
+    Removes boilerplate lines and repeated paragraphs, and collapses whitespace.
+    Paragraph order is preserved.
+    """
+    if not text:
+        return ""
+
+    paragraphs = re.split(r"\n\s*\n", text)
+    seen = set()
+    kept = []
+    for paragraph in paragraphs:
+        lines = [re.sub(r"[ \t]+", " ", line).strip() for line in paragraph.splitlines()]
+        lines = [line for line in lines if line and not _BOILERPLATE_RE.match(line)]
+        if not lines:
+            continue
+
+        cleaned = "\n".join(lines)
+        key = re.sub(r"\W+", " ", cleaned).strip().lower()
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        kept.append(cleaned)
+
+    return "\n\n".join(kept)
+
+
+def fit_to_budget(text: str, max_tokens: int, lead_ratio: float = LEAD_RATIO) -> str:
+    """
+    Truncates text to roughly `max_tokens`, keeping the lead and the tail of
+    the story (where the key facts and the latest updates usually are).
+    """
+    if not text or estimate_tokens(text) <= max_tokens:
+        return text or ""
+
+    max_chars = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER))
+    if max_chars == 0:
+        return ""
+
+    lead_chars = int(max_chars * lead_ratio)
+    tail_chars = max_chars - lead_chars
+
+    # Cut on whitespace so we don't hand the model half words
+    lead = text[:lead_chars]
+    cut = lead.rfind(" ")
+    if cut > lead_chars // 2:
+        lead = lead[:cut]
+
+    tail = text[len(text) - tail_chars:] if tail_chars else ""
+    cut = tail.find(" ")
+    if 0 <= cut < tail_chars // 2:
+        tail = tail[cut + 1:]
+
+    return lead.rstrip() + TRUNCATION_MARKER + tail.lstrip()
+
+
+def _record(model_name: str, original_tokens: int, final_tokens: int):
+    entry = _stats.setdefault(model_name, {"calls": 0, "original_tokens": 0, "final_tokens": 0})
+    entry["calls"] += 1
+    entry["original_tokens"] += original_tokens
+    entry["final_tokens"] += final_tokens
+
+
+def prepare_text(text: str, model_name: str, budget: int = None) -> str:
+    """Cleans a single input text and fits it to the model's token budget."""
+    return prepare_texts([text], model_name, budget)[0]
+
+
+def prepare_texts(texts: List[str], model_name: str, budget: int = None) -> List[str]:
+    """
+    Cleans several input texts and fits them into one shared token budget.
+    Short texts are kept whole; the unused share is handed to the longer ones.
+    """
+    if budget is None:
+        budget = get_token_budget(model_name)
+
+    original_tokens = sum(estimate_tokens(t) for t in texts)
+    cleaned = [clean_text(t) for t in texts]
+    sizes = [estimate_tokens(t) for t in cleaned]
+
+    # Water-filling: visit texts shortest first, each gets at most an equal
+    # share of what is left
+    allowance = [0] * len(cleaned)
+    remaining = budget
+    order = sorted(range(len(cleaned)), key=lambda i: sizes[i])
+    for position, i in enumerate(order):
+        share = remaining // (len(order) - position)
+        allowance[i] = min(sizes[i], share)
+        remaining -= allowance[i]
+
+    fitted = [fit_to_budget(t, allowance[i]) for i, t in enumerate(cleaned)]
+
+    final_tokens = sum(estimate_tokens(t) for t in fitted)
+    _record(model_name, original_tokens, final_tokens)
+    if original_tokens != final_tokens:
+        logger.debug(
+            f"Prompt input for {model_name}: {original_tokens} -> {final_tokens} tokens "
+            f"({original_tokens - final_tokens} saved)"
+        )
+    return fitted
+
+
+def get_prompt_stats() -> Dict[str, Dict[str, int]]:
+    """Returns per-model prompt input token counts and the tokens saved so far."""
+    return {
+        model: {**entry, "tokens_saved": entry["original_tokens"] - entry["final_tokens"]}
+        for model, entry in _stats.items()
+    }
+
+
+def reset_prompt_stats():
+    _stats.clear()
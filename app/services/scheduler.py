@@ -1,102 +1,67 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+import asyncio
 import logging
+from typing import Optional
 from sqlalchemy.future import select
+from app.config import settings
 from app.database import AsyncSessionLocal
 from app.models.user import User
+from app.services.job_ledger import ledger_run
+from app.services.job_runner import WarmJobRunner
+from app.services.leader import LeaderElection, SCHEDULER_LOCK_KEY
 from app.services.summary_service import SummaryService
 
 logger = logging.getLogger("nuze-backend")
 
 scheduler = AsyncIOScheduler()
 
-async def run_daily_cluster():
-    """JOB: Daily Cluster/Summary Generation"""
-    logger.info("Starting daily cluster/summary generation job...")
-
-    import sys
-    import os
-    import asyncio
+# Long-lived process that executes the scheduled jobs (started by the leader)
+runner = WarmJobRunner(grace_seconds=settings.JOB_CANCEL_GRACE_SECONDS)
 
-    script_path = os.path.join("scripts", "daily_cluster.py")
-    cmd = ["uv", "run", script_path]
-
-    logger.info(f"Executing command: {' '.join(cmd)}")
+async def _run_job(run, name: str):
+    """Executes job `name` in the warm runner and records the outcome on the ledger entry."""
     try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-
-        async def log_stream(stream, level):
-            while True:
-                line = await stream.readline()
-                if line:
-                    logger.log(level, line.decode().strip())
-                else:
-                    break
-
-        await asyncio.gather(
-            log_stream(process.stdout, logging.INFO),
-            log_stream(process.stderr, logging.ERROR)
-        )
-
-        returncode = await process.wait()
-
-        if returncode != 0:
-            logger.error(f"Job failed with return code {returncode}")
-
+        result = await runner.run(name, timeout=settings.JOB_TIMEOUTS.get(name))
     except Exception as e:
-        logger.error(f"Failed to execute daily cluster script: {e}")
+        logger.error(f"Failed to execute {name}: {e}")
+        run.fail(f"{type(e).__name__}: {e}")
+        return
+    run.startup_ms = result["startup_ms"]
+    if result["error"]:
+        logger.error(f"Job {name} failed: {result['error']}")
+        run.fail(result["error"])
 
-    logger.info("Daily cluster/summary generation job completed.")
+async def run_daily_cluster():
+    """JOB: Daily Cluster/Summary Generation"""
+    async with ledger_run("daily_cluster") as run:
+        if run is None:
+            return
+        logger.info("Starting daily cluster/summary generation job...")
+        await _run_job(run, "daily_cluster")
+        logger.info("Daily cluster/summary generation job completed.")
 
 async def run_daily_ingest():
     """JOB: Daily Content Ingestion"""
-    logger.info("Starting daily content ingestion job...")
-
-    import sys
-    import os
-    import asyncio
-
-    script_path = os.path.join("scripts", "daily_ingest.py")
-    cmd = ["uv", "run", script_path]
-
-    logger.info(f"Executing command: {' '.join(cmd)}")
-    try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-
-        async def log_stream(stream, level):
-            while True:
-                line = await stream.readline()
-                if line:
-                    logger.log(level, line.decode().strip())
-                else:
-                    break
-
-        await asyncio.gather(
-            log_stream(process.stdout, logging.INFO),
-            log_stream(process.stderr, logging.ERROR)
-        )
-
-        returncode = await process.wait()
-
-        if returncode != 0:
-             logger.error(f"Job failed with return code {returncode}")
-
-    except Exception as e:
-        logger.error(f"Failed to execute daily ingest script: {e}")
-
-    logger.info("Daily content ingestion job completed.")
+    async with ledger_run("daily_ingest") as run:
+        if run is None:
+            return
+        logger.info("Starting daily content ingestion job...")
+        await _run_job(run, "daily_ingest")
+        logger.info("Daily content ingestion job completed.")
 
     # Trigger clustering immediately after ingestion
     await run_daily_cluster()
 
+async def run_partition_maintenance():
+    """JOB: Create upcoming monthly partitions and apply the retention policies"""
+    async with ledger_run("partition_maintenance") as run:
+        if run is None:
+            return
+        logger.info("Starting partition maintenance job...")
+        await _run_job(run, "partition_maintenance")
+        logger.info("Partition maintenance job completed.")
+
 async def start_scheduler():
     # Schedule jobs
     # Run daily ingest twice a day at 06:00 and 18:00 UTC
@@ -105,6 +70,50 @@ async def start_scheduler():
     
     scheduler.add_job(run_daily_ingest, morning_trigger, id="daily_ingest_morning")
     scheduler.add_job(run_daily_ingest, evening_trigger, id="daily_ingest_evening")
+    # Partitions and retention once a day, away from the ingest runs
+    scheduler.add_job(run_partition_maintenance, CronTrigger(hour=3, minute=0), id="partition_maintenance")
 
     scheduler.start()
-    logger.info("Scheduler started. Jobs scheduled at 06:00 and 18:00 UTC.")
+    logger.info("Scheduler started. Ingest scheduled at 06:00 and 18:00 UTC, partition maintenance at 03:00 UTC.")
+
+async def _on_elected():
+    # Warm the runner now so the first scheduled run does not pay for it
+    asyncio.create_task(_warm_runner())
+    if scheduler.running:
+        scheduler.resume()
+        logger.info("Scheduler resumed.")
+    else:
+        await start_scheduler()
+
+async def _warm_runner():
+    try:
+        await runner.start()
+    except Exception as e:
+        logger.error(f"Could not start the job runner: {e}")
+
+async def _on_demoted():
+    if scheduler.running:
+        scheduler.pause()
+        logger.info("Scheduler paused: another process is the leader now.")
+
+_election: Optional[LeaderElection] = None
+
+def start_leader_election() -> LeaderElection:
+    """
+    Campaigns for the scheduler lock in the background. Every app worker calls
+    this at startup; only the elected one runs the scheduler, and a standby
+    takes over if the leader goes away.
+    """
+    global _election
+    _election = LeaderElection(
+        SCHEDULER_LOCK_KEY, _on_elected, _on_demoted, check_interval=settings.SCHEDULER_LEADER_CHECK_SECONDS
+    )
+    asyncio.create_task(_election.run())
+    return _election
+
+async def stop_leader_election():
+    if _election is not None:
+        await _election.stop()
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    await runner.stop()
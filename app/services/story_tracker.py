@@ -0,0 +1,101 @@
+import logging
+import re
+from typing import Dict, Hashable, Iterable, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.services.clustering import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+# Two stories must share at least this many entities (or all of the smaller set)
+MIN_SHARED_ENTITIES = 2
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def entity_set(names: Optional[Iterable[str]]) -> Set[str]:
+    """Case- and whitespace-normalized entity names; single characters are dropped."""
+    if not names:
+        return set()
+    normalized = set()
+    for name in names:
+        if not isinstance(name, str):
+            continue
+        name = _SPACE_RE.sub(" ", name).strip().lower()
+        if len(name) > 1:
+            normalized.add(name)
+    return normalized
+
+
+def article_entities(metadata: Optional[dict]) -> Set[str]:
+    """Entities of a classification output (articles.metadata or a synthesized analysis)."""
+    if not isinstance(metadata, dict):
+        return set()
+    return entity_set(metadata.get("Named Entities"))
+
+
+def entity_overlap(a: Set[str], b: Set[str]) -> float:
+    """
+    Overlap coefficient |a & b| / min(|a|, |b|). Unlike Jaccard it does not
+    penalize a developing story for accumulating entities over several days.
+    """
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    if shared < min(MIN_SHARED_ENTITIES, len(a), len(b)):
+        return 0.0
+    return shared / min(len(a), len(b))
+
+
+def centroid(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    """Mean of the L2-normalized vectors: the direction a group of articles shares."""
+    return normalize_rows(vectors).mean(axis=0)
+
+
+class StoryIndex:
+    """
+    Recent synthesized stories, matched against new article groups by
+    category-vector cosine similarity and named-entity overlap. Both must
+    clear their threshold: the vector alone only says "same topic", the
+    entities say "same event".
+    """
+
+    def __init__(self, min_similarity: float = 0.85, min_entity_overlap: float = 0.5):
+        self.min_similarity = min_similarity
+        self.min_entity_overlap = min_entity_overlap
+        self._vectors: Dict[Hashable, np.ndarray] = {}
+        self._entities: Dict[Hashable, Set[str]] = {}
+
+    def add(self, key: Hashable, vector: Sequence[float], entities: Set[str]):
+        """Adds or replaces a story; entities accumulate across updates."""
+        self._vectors[key] = normalize_rows([vector])[0]
+        self._entities[key] = self._entities.get(key, set()) | set(entities)
+
+    def match(self, vector: Sequence[float], entities: Set[str]) -> Optional[Tuple[Hashable, float]]:
+        """
+        Returns (key, score) of the best matching story or None. The score is
+        the mean of the cosine similarity and the entity overlap.
+        """
+        if not self._vectors or not entities:
+            return None
+        keys = list(self._vectors)
+        similarities = np.stack([self._vectors[k] for k in keys]) @ normalize_rows([vector])[0]
+
+        best = None
+        for key, similarity in zip(keys, similarities):
+            if similarity < self.min_similarity:
+                continue
+            overlap = entity_overlap(entities, self._entities[key])
+            if overlap < self.min_entity_overlap:
+                continue
+            score = (float(similarity) + overlap) / 2
+            if best is None or score > best[1]:
+                best = (key, score)
+        return best
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def __contains__(self, key):
+        return key in self._vectors
@@ -1,12 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
 from datetime import date
-from typing import Optional
+from typing import Optional, AsyncIterator, Tuple
 
 from app.models.summary import DailySummary
 from app.services.feed_service import FeedService
 from app.services.nlp_service import NLPService
+from app.services.llm_gateway import LLMUnavailableError
 
 
 import logging
@@ -14,19 +14,32 @@ logger = logging.getLogger(__name__)
 
 
 class SummaryService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, read_db: Optional[AsyncSession] = None):
         self.db = db
-        self.feed_service = FeedService(db)
+        # Article selection may read from the replica; summaries are written
+        # (and, when generating, looked up) on `db` so pending placeholders are seen
+        self.read_db = read_db or db
+        self.feed_service = FeedService(self.read_db)
         self.nlp_service = NLPService()
 
-    async def get_daily_summary(self, user_id: str) -> Optional[DailySummary]:
+    async def _top_articles(self, user_id: str):
+        articles = await self.feed_service.get_top_articles(user_id, limit=15)
+        if self.read_db is not self.db:
+            # End the replica transaction before the long LLM call
+            await self.read_db.commit()
+        return articles
+
+    async def get_daily_summary(self, user_id: str, summary_id=None) -> Optional[DailySummary]:
         logger.info(f"Checking daily summary for user {user_id}")
         today = date.today()
 
         stmt = select(DailySummary).where(
             DailySummary.user_id == user_id,
-            func.date(DailySummary.date) == today
+            # A plain comparison on the partition key reads only this month's partition
+            DailySummary.date == today
         ).limit(1)
+        if summary_id is not None:
+            stmt = stmt.where(DailySummary.id == summary_id)
         result = await self.db.execute(stmt)
         summary = result.scalars().first()
 
@@ -37,9 +50,20 @@ class SummaryService:
         logger.info(f"No existing summary found for user {user_id}")
         return None
 
+    async def get_daily_summary_version(self, user_id: str) -> Optional[Tuple]:
+        """(id, status, generated_at) of today's summary, without loading its text."""
+        result = await self.db.execute(
+            select(DailySummary.id, DailySummary.status, DailySummary.summary_generated_at).where(
+                DailySummary.user_id == user_id,
+                DailySummary.date == date.today()
+            ).limit(1)
+        )
+        row = result.first()
+        return tuple(row) if row else None
+
     async def generate_daily_summary(self, user_id: str) -> DailySummary:
         # 1. Get top relevant articles (strict 15)
-        articles = await self.feed_service.get_top_articles(user_id, limit=15)
+        articles = await self._top_articles(user_id)
 
         logger.info(f"Fetched {len(articles)} articles for summary generation (User: {user_id})")
 
@@ -48,7 +72,6 @@ class SummaryService:
             return None
 
         article_texts = [f"Title: {a.title}\nContent: {a.content}" for a in articles]
-        article_ids = [a.id for a in articles]
 
         # 2. Summarize
         from app.services.user_service import UserService
@@ -70,6 +93,11 @@ class SummaryService:
             logger.error(f"Summary generation failed: {summary_data.get('error')}")
             return None  # Don't save failed summaries - let user retry
 
+        return await self._store_summary(user_id, articles, summary_data)
+
+    async def _store_summary(self, user_id: str, articles, summary_data: dict) -> DailySummary:
+        article_ids = [a.id for a in articles]
+
         # Inject top article image (find first one with an image)
         top_image_url = None
         for article in articles:
@@ -96,3 +124,53 @@ class SummaryService:
         logger.info(f"Successfully generated summary {summary.id} for user {user_id}")
 
         return summary
+
+    async def stream_daily_summary(self, user_id: str) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Generates today's summary while streaming the model output.
+        Yields (event, data) pairs: "token" for each generated chunk, then a
+        final "done" with the stored summary or "error" if generation failed.
+        The assembled document is validated before it is persisted.
+        """
+        articles = await self._top_articles(user_id)
+        logger.info(f"Fetched {len(articles)} articles for streamed summary (User: {user_id})")
+
+        if not articles:
+            logger.warning(f"No articles found for user {user_id}, cannot generate summary.")
+            yield "error", {"detail": "No relevant articles found for today."}
+            return
+
+        article_texts = [f"Title: {a.title}\nContent: {a.content}" for a in articles]
+
+        from app.services.user_service import UserService
+        user_service = UserService(self.db)
+        _, preferences_meta = await user_service.get_user_preferences(user_id)
+
+        chunks = []
+        try:
+            async for chunk in self.nlp_service.stream_summary(article_texts, preferences_meta):
+                chunks.append(chunk)
+                yield "token", {"text": chunk}
+        except LLMUnavailableError as e:
+            logger.warning(f"Summary stream unavailable for user {user_id}: {e}")
+            yield "error", {"detail": "Summary service is busy. Please try again shortly.", "retry_after": e.retry_after}
+            return
+        except Exception as e:
+            logger.error(f"Error streaming summary for user {user_id}: {e}")
+            yield "error", {"detail": "Summary generation was interrupted. Please try again."}
+            return
+
+        summary_data, error_msg = self.nlp_service.complete_stream("".join(chunks))
+        if summary_data is None:
+            logger.error(f"Streamed summary failed validation for user {user_id}: {error_msg}")
+            yield "error", {"detail": "Generated summary was invalid. Please try again."}
+            return
+
+        summary = await self._store_summary(user_id, articles, summary_data)
+        yield "done", {
+            "id": str(summary.id),
+            "summary_text": summary.summary_text,
+            "generated_at": summary.summary_generated_at.isoformat() if summary.summary_generated_at else None,
+            "article_ids": [str(a) for a in summary.article_ids],
+            "status": summary.status
+        }
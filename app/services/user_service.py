@@ -1,8 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import update
 from app.models.user import User
-from typing import List
+from typing import List, Optional
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +16,7 @@ class UserService:
         result = await self.db.execute(select(User).where(User.id == user_id))
         user = result.scalar_one_or_none()
         if user:
-            prefs = list(user.preferences) if user.preferences is not None else []
+            prefs = np.asarray(user.preferences, dtype=float).tolist() if user.preferences is not None else []
             meta = user.preferences_metadata if user.preferences_metadata else {}
             return prefs, meta
         return [], {}
@@ -26,12 +28,44 @@ class UserService:
             user.preferences = preferences
             if metadata is not None:
                 user.preferences_metadata = metadata
+            # In SQL, so concurrent updates cannot end on the same version
+            user.preferences_version = User.preferences_version + 1
             await self.db.commit()
             await self.db.refresh(user)
             logger.info(f"Updated preferences for user {user_id}")
-            return list(user.preferences)
+            return np.asarray(user.preferences, dtype=float).tolist()
         return None
 
+    async def get_feed_preferences(self, user_id, epoch: int) -> List[float]:
+        """
+        Preferences the feed of `epoch` is ranked by: a copy taken at the
+        user's first feed request in the epoch, so the likes and reads of the
+        epoch (which update the preferences) do not reorder its pages.
+        """
+        # Conditional in SQL, so concurrent first requests keep one copy
+        result = await self.db.execute(
+            update(User)
+            .where(User.id == user_id, User.feed_epoch.is_distinct_from(epoch))
+            .values(feed_epoch=epoch, feed_preferences=User.preferences)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            await self.db.commit()
+        result = await self.db.execute(select(User.feed_preferences).where(User.id == user_id))
+        prefs = result.scalar_one_or_none()
+        return np.asarray(prefs, dtype=float).tolist() if prefs is not None else []
+
+    async def get_preferences_version(self, user_id) -> Optional[int]:
+        result = await self.db.execute(select(User.preferences_version).where(User.id == user_id))
+        return result.scalar_one_or_none()
+
+    async def bump_preferences_version(self, user_id):
+        """For changes the ETags depend on that leave the preferences as they are."""
+        await self.db.execute(
+            update(User).where(User.id == user_id).values(preferences_version=User.preferences_version + 1)
+        )
+        await self.db.commit()
+
     async def initialize_user_vector(self, user_id: str, onboarding_data):
         import numpy as np
 
@@ -1,14 +1,37 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Union, Any
 from jose import jwt
 import bcrypt
 from app.config import settings
 
+# bcrypt releases the GIL, so a few threads keep hashing off the event loop;
+# the bound caps how many CPU cores a login storm can take from each worker
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode('utf-8')
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a different work factor than BCRYPT_ROUNDS ($2b$<rounds>$...)."""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the hashing pool; use from request handlers."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _hash_executor, verify_password, plain_password, hashed_password
+    )
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the hashing pool; use from request handlers."""
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, get_password_hash, password)
 
 def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     if expires_delta:
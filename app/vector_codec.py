@@ -0,0 +1,108 @@
+import logging
+import struct
+
+import numpy as np
+from pgvector.sqlalchemy import HALFVEC, Vector
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# pgvector binary format: dimensions (uint16), unused (uint16), then big-endian
+# float32 (vector) or float16 (halfvec) values
+_HEADER = struct.Struct(">HH")
+
+
+def _encode(value, dtype: str) -> bytes:
+    if isinstance(value, str):
+        value = [float(v) for v in value.strip("[]").split(",")]
+    array = np.asarray(value, dtype=dtype)
+    if array.ndim != 1:
+        raise ValueError("expected a 1-dimensional vector")
+    return _HEADER.pack(array.shape[0], 0) + array.tobytes()
+
+
+def _decode(data: bytes, dtype: str) -> np.ndarray:
+    dim, _ = _HEADER.unpack_from(data)
+    return np.frombuffer(data, dtype=dtype, count=dim, offset=_HEADER.size).astype(np.float32)
+
+
+def encode_vector(value) -> bytes:
+    """Binary wire format for a vector given as an array, a sequence or pgvector text."""
+    return _encode(value, ">f4")
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    """float32 NumPy array straight from the binary wire format."""
+    return _decode(data, ">f4")
+
+
+def encode_halfvec(value) -> bytes:
+    return _encode(value, ">f2")
+
+
+def decode_halfvec(data: bytes) -> np.ndarray:
+    """halfvec values are widened to float32 so callers see one dtype in both storage modes."""
+    return _decode(data, ">f2")
+
+
+async def register_vector_codecs(conn):
+    """Makes an asyncpg connection exchange `vector`/`halfvec` values in binary, as NumPy arrays."""
+    for name, encoder, decoder in (
+        ("vector", encode_vector, decode_vector),
+        ("halfvec", encode_halfvec, decode_halfvec),
+    ):
+        try:
+            await conn.set_type_codec(name, schema="public", encoder=encoder, decoder=decoder, format="binary")
+        except ValueError as e:
+            # The extension is not installed yet (CREATE EXTENSION vector runs in
+            # scripts/init/init.sql), or predates halfvec (pgvector < 0.7)
+            logger.warning(f"pgvector {name} codec not registered: {e}")
+
+
+def index_ops(metric: str = "cosine", storage: str = None) -> str:
+    """Operator class for an index on category vectors, e.g. hnsw (category_scores halfvec_cosine_ops)."""
+    return f"{storage or settings.VECTOR_STORAGE}_{metric}_ops"
+
+
+class _NumpyBinding:
+    """
+    Binds values as float32 arrays for the binary codecs instead of
+    formatting them as text; results are already arrays and pass through.
+    """
+
+    def bind_processor(self, dialect):
+        dim = self.dim
+
+        def process(value):
+            if value is None:
+                return None
+            array = np.asarray(value, dtype=np.float32)
+            if dim is not None and array.shape != (dim,):
+                raise ValueError(f"expected {dim} dimensions, not {array.shape}")
+            return array
+        return process
+
+    def result_processor(self, dialect, coltype):
+        text_processor = super().result_processor(dialect, coltype)
+
+        def process(value):
+            if value is None or isinstance(value, np.ndarray):
+                return value
+            # Connection without the codec: text format
+            value = text_processor(value)
+            return value if isinstance(value, np.ndarray) else np.asarray(value.to_numpy(), dtype=np.float32)
+        return process
+
+
+class NumpyVector(_NumpyBinding, Vector):
+    cache_ok = True
+
+
+class NumpyHalfVector(_NumpyBinding, HALFVEC):
+    cache_ok = True
+
+
+def category_vector(dim: int):
+    """Column type for category vectors in the configured storage (VECTOR_STORAGE)."""
+    return NumpyHalfVector(dim) if settings.VECTOR_STORAGE == "halfvec" else NumpyVector(dim)
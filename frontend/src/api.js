@@ -22,10 +22,17 @@ export const signup = async (userData) => {
     return response.data;
 };
 
+// Feed epoch of the first page; later pages ask for the same one so they do not overlap it
+let feedEpoch = null;
+
 export const fetchArticles = async (skip = 0, limit = 20) => {
     try {
         // Try to hit the real endpoint first
-        const response = await axios.get(`${API_URL}/feed?skip=${skip}&limit=${limit}`, { headers: getAuthHeader() });
+        const epoch = skip > 0 && feedEpoch !== null ? `&epoch=${feedEpoch}` : '';
+        const response = await axios.get(`${API_URL}/feed?skip=${skip}&limit=${limit}${epoch}`, { headers: getAuthHeader() });
+        if (skip === 0) {
+            feedEpoch = response.headers['x-feed-epoch'] ?? null;
+        }
         return response.data;
     } catch (error) {
         console.error("Error fetching articles:", error);
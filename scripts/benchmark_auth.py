@@ -0,0 +1,108 @@
+import asyncio
+import sys
+import os
+import time
+import json
+import argparse
+import logging
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.utils import security
+
+# Simulated feed request: a 5ms database round trip
+FEED_IO_SECONDS = 0.005
+
+
+async def feed_requests(stop: asyncio.Event, rate: float) -> list:
+    """
+    Feed-like requests arriving at `rate` per second until stop; returns their
+    latencies. Latency counts from the scheduled arrival, as a client would
+    see it, so requests that could not even start while the loop was blocked
+    are measured too.
+    """
+    latencies = []
+    pending = set()
+
+    async def request(arrival):
+        await asyncio.sleep(FEED_IO_SECONDS)
+        latencies.append(time.perf_counter() - arrival)
+
+    start = time.perf_counter()
+    sent = 0
+    while not stop.is_set():
+        # Every request due by now, including those missed while the loop was blocked
+        due = int((time.perf_counter() - start) * rate) + 1
+        for i in range(sent, due):
+            task = asyncio.create_task(request(start + i / rate))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        sent = due
+        await asyncio.sleep(max(0.0, start + sent / rate - time.perf_counter()))
+    await asyncio.gather(*pending)
+    return latencies
+
+
+async def login_storm(mode: str, hashed: str, logins: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            if mode == "inline":
+                # What the handlers did before: bcrypt on the event loop
+                assert security.verify_password("password123", hashed)
+            else:
+                assert await security.verify_password_async("password123", hashed)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+
+
+async def measure(mode: str, hashed: str, logins: int, concurrency: int, rate: float, idle_seconds: float = 2.0):
+    stop = asyncio.Event()
+    feed = asyncio.create_task(feed_requests(stop, rate))
+    start = time.perf_counter()
+    if mode == "idle":
+        await asyncio.sleep(idle_seconds)
+    else:
+        await login_storm(mode, hashed, logins, concurrency)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    latencies = np.array(await feed) * 1000
+    return {
+        "mode": mode,
+        "logins": 0 if mode == "idle" else logins,
+        "logins_per_second": None if mode == "idle" else round(logins / elapsed, 2),
+        "feed_requests": len(latencies),
+        "feed_p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "feed_p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        "feed_max_ms": round(float(latencies.max()), 1),
+    }
+
+
+async def main(args):
+    settings.BCRYPT_ROUNDS = args.rounds
+    hashed = security.get_password_hash("password123")
+    results = []
+    for mode in ("idle", "inline", "pool"):
+        results.append(await measure(mode, hashed, args.logins, args.concurrency, args.feed_rate))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feed latency on one worker while logins verify bcrypt hashes")
+    parser.add_argument("--logins", type=int, default=20, help="Logins in the storm")
+    parser.add_argument("--concurrency", type=int, default=10, help="Logins in flight at once")
+    parser.add_argument("--feed-rate", type=float, default=50, help="Feed requests per second during the storm")
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS, help="bcrypt work factor")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = asyncio.run(main(args))
+    print(f"bcrypt rounds {args.rounds}, {settings.PASSWORD_HASH_WORKERS} hashing threads, "
+          f"{os.cpu_count()} CPUs")
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,147 @@
+import asyncio
+import sys
+import os
+import json
+import time
+import uuid
+import argparse
+import logging
+import statistics
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import engine, Base
+from app.partitions import add_months, create_partition, month_start
+from app.models.interaction import UserInteraction
+from app.models.synthesized_article import SynthesizedArticle
+from app.services.feed_service import FeedService
+
+# Import models to ensure they are registered with Base
+from app.models import user, article, summary, interaction, synthesized_article
+
+SCHEMA = "benchmark_feed_history"
+TABLES = ["users", "synthesized_articles", "user_interactions"]
+
+
+async def load(conn, args) -> dict:
+    """A year of synthesized articles and one reader per history length."""
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    await conn.execute(text(f"SET search_path TO {SCHEMA}, public"))
+    # checkfirst would find the application's tables further down the search path
+    await conn.run_sync(lambda sync: Base.metadata.create_all(
+        sync, tables=[Base.metadata.tables[t] for t in TABLES], checkfirst=False
+    ))
+    now = month_start(datetime.now(timezone.utc))
+    for table in ("synthesized_articles", "user_interactions"):
+        for months in range(-12, 2):
+            await create_partition(conn, table, add_months(now, months))
+
+    vector = "('[' || array_to_string(ARRAY(SELECT round(random()::numeric, 3) FROM generate_series(1, 10) WHERE g > 0), ',') || ']')::vector"
+    await conn.execute(text(
+        "INSERT INTO synthesized_articles (id, title, content, generated_at, category_scores) "
+        f"SELECT gen_random_uuid(), 't', 'c', now() - (g::float / :per_day) * interval '1 day', {vector} "
+        "FROM generate_series(1, :n) g"
+    ), {"per_day": args.synthesized_per_day, "n": 365 * args.synthesized_per_day})
+    users = {length: uuid.uuid4() for length in args.history}
+    for length, user_id in users.items():
+        await conn.execute(text(
+            "INSERT INTO users (id, email, hashed_password) VALUES (:user, :email, 'x')"
+        ), {"user": user_id, "email": f"{user_id}@example.com"})
+        # The newest `length` articles, each read within two days of generation
+        await conn.execute(text(
+            "INSERT INTO user_interactions (id, user_id, synthesized_article_id, is_liked, created_at) "
+            "SELECT gen_random_uuid(), :user, id, random() < 0.5, least(now(), generated_at + random() * interval '2 days') "
+            "FROM (SELECT id, generated_at FROM synthesized_articles ORDER BY generated_at DESC LIMIT :n) s"
+        ), {"user": user_id, "n": length})
+    for table in TABLES:
+        await conn.execute(text(f"ANALYZE {table}"))
+    return users
+
+
+async def timed(call, runs: int) -> dict:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(timings), 2), "p95_ms": round(float(np.percentile(timings, 95)), 2)}
+
+
+async def main(args):
+    rng = np.random.default_rng(args.seed)
+    report = []
+    async with engine.connect() as conn:
+        users = await load(conn, args)
+        await conn.commit()
+        await conn.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        if args.work_mem:
+            await conn.execute(text(f"SET work_mem = '{args.work_mem}'"))
+        session = AsyncSession(bind=conn)
+        service = FeedService(session)
+
+        for length, user_id in users.items():
+            await session.execute(text("UPDATE users SET preferences = (:prefs)::vector WHERE id = :user"),
+                                  {"prefs": str(rng.random(10).round(3).tolist()), "user": user_id})
+
+            def not_in(window: bool):
+                # The feed query before the anti-join, with and without the feed window
+                async def call():
+                    since = datetime.now(timezone.utc) - timedelta(days=settings.FEED_WINDOW_DAYS)
+                    prefs, _ = await service.user_service.get_user_preferences(user_id)
+                    interacted = select(UserInteraction.synthesized_article_id).where(UserInteraction.user_id == user_id)
+                    stmt = select(SynthesizedArticle)
+                    if window:
+                        interacted = interacted.where(UserInteraction.created_at >= since)
+                        stmt = stmt.where(SynthesizedArticle.generated_at >= since)
+                    await session.execute(
+                        stmt.where(SynthesizedArticle.id.not_in(interacted))
+                        .order_by(SynthesizedArticle.category_scores.cosine_distance(prefs))
+                        .limit(50)
+                    )
+                    session.expunge_all()
+                return call
+
+            async def anti_join():
+                await service.get_personalized_feed(user_id)
+                session.expunge_all()
+
+            calls = {"unbounded_not_in": not_in(False), "window_not_in": not_in(True), "anti_join": anti_join}
+            in_window = (await conn.execute(text(
+                "SELECT count(*) FROM user_interactions WHERE user_id = :user AND created_at >= now() - :days * interval '1 day'"
+            ), {"user": user_id, "days": settings.FEED_WINDOW_DAYS})).scalar()
+            entry = {"history": length, "in_window": in_window}
+            for name, call in calls.items():
+                # One untimed pass warms the cache alike
+                await call()
+                entry[name] = await timed(call, args.runs)
+            report.append(entry)
+        await session.close()
+        await conn.rollback()
+        if not args.keep:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.commit()
+    await engine.dispose()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feed latency by the length of a reader's interaction history")
+    parser.add_argument("--history", type=int, nargs="+", default=[10, 100, 1000, 10000],
+                        help="Interactions of each benchmarked reader, newest articles first")
+    parser.add_argument("--synthesized-per-day", type=int, default=50)
+    parser.add_argument("--work-mem", default="", help="Session work_mem, e.g. 64kB to stand in for longer histories")
+    parser.add_argument("--runs", type=int, default=20, help="Timed feed requests per reader and query")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark schema")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    print(json.dumps(asyncio.run(main(args)), indent=2))
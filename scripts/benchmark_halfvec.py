@@ -0,0 +1,139 @@
+import asyncio
+import sys
+import os
+import time
+import json
+import argparse
+import logging
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.vector_codec import index_ops
+
+DIM = 10
+
+
+def synthetic_vectors(n: int, seed: int) -> np.ndarray:
+    """Category vectors shaped like the classifier's: non-negative scores summing to 5."""
+    rng = np.random.default_rng(seed)
+    return (rng.dirichlet(np.full(DIM, 0.3), size=n) * 5).astype(np.float32)
+
+
+def top_k(articles: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k articles closest to each query by cosine distance (the feed ranking)."""
+    a = articles / np.linalg.norm(articles, axis=1, keepdims=True)
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(q @ a.T), axis=1, kind="stable")[:, :k]
+
+
+def ranking_agreement(articles: np.ndarray, queries: np.ndarray, k: int) -> dict:
+    """How closely feed rankings over float16-stored vectors match the float32 ones."""
+    exact = top_k(articles, queries, k)
+    half = top_k(articles.astype(np.float16).astype(np.float32), queries.astype(np.float16).astype(np.float32), k)
+    overlap = [len(set(e) & set(h)) / k for e, h in zip(exact, half)]
+    return {
+        "queries": len(queries),
+        "k": k,
+        f"mean_overlap_at_{k}": round(float(np.mean(overlap)), 4),
+        f"min_overlap_at_{k}": round(float(np.min(overlap)), 4),
+        "identical_rankings": round(float(np.mean([np.array_equal(e, h) for e, h in zip(exact, half)])), 4),
+        "max_abs_error": float(np.abs(articles.astype(np.float16).astype(np.float32) - articles).max()),
+    }
+
+
+async def block_stats(conn, table: str) -> tuple:
+    """(blocks hit, blocks read) so far for the table and its indexes."""
+    from sqlalchemy import text
+
+    # Statistics are flushed asynchronously; make this backend's visible (PG 15+)
+    await conn.execute(text("SELECT pg_stat_force_next_flush()"))
+    await conn.commit()
+    row = (await conn.execute(text(
+        "SELECT coalesce(heap_blks_hit, 0) + coalesce(idx_blks_hit, 0), "
+        "coalesce(heap_blks_read, 0) + coalesce(idx_blks_read, 0) "
+        "FROM pg_statio_user_tables WHERE relname = :t"
+    ), {"t": table})).one()
+    await conn.commit()
+    return row
+
+
+async def database_sizes(vectors: np.ndarray, queries: np.ndarray, k: int) -> list:
+    """
+    Loads the vectors into scratch tables stored as vector and as halfvec, with
+    an HNSW cosine index on each, then runs the feed-style query for every
+    query vector. Reports table/index sizes and buffer cache hit ratios.
+    """
+    from sqlalchemy import text
+    from app.database import engine
+
+    results = []
+    async with engine.connect() as conn:
+        for storage in ("vector", "halfvec"):
+            table = f"benchmark_{storage}"
+            await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+            await conn.execute(text(f"CREATE TABLE {table} (id integer PRIMARY KEY, v {storage}({DIM}))"))
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                table, records=[(i, v) for i, v in enumerate(vectors)], columns=["id", "v"]
+            )
+            start = time.perf_counter()
+            await conn.execute(text(f"CREATE INDEX {table}_hnsw ON {table} USING hnsw (v {index_ops('cosine', storage)})"))
+            build_seconds = time.perf_counter() - start
+            await conn.execute(text(f"ANALYZE {table}"))
+            await conn.commit()
+            before = await block_stats(conn, table)
+
+            start = time.perf_counter()
+            for q in queries:
+                await conn.execute(
+                    text(f"SELECT id FROM {table} ORDER BY v <=> (:q)::{storage}({DIM}) LIMIT :k"),
+                    {"q": "[" + ",".join(str(float(x)) for x in q) + "]", "k": k}
+                )
+            query_ms = (time.perf_counter() - start) / len(queries) * 1000
+            after = await block_stats(conn, table)
+            hits, reads = after[0] - before[0], after[1] - before[1]
+
+            table_bytes, index_bytes = (await conn.execute(
+                text("SELECT pg_relation_size(:t), pg_relation_size(:i)"),
+                {"t": table, "i": f"{table}_hnsw"}
+            )).one()
+            results.append({
+                "storage": storage,
+                "rows": len(vectors),
+                "table_mb": round(table_bytes / 2**20, 2),
+                "hnsw_index_mb": round(index_bytes / 2**20, 2),
+                "index_build_seconds": round(build_seconds, 2),
+                "query_ms": round(query_ms, 2),
+                "cache_hit_ratio": round(hits / (hits + reads), 4) if hits + reads else None,
+            })
+            await conn.execute(text(f"DROP TABLE {table}"))
+            await conn.commit()
+    await engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare vector (float32) and halfvec (float16) storage of category vectors")
+    parser.add_argument("--articles", type=int, default=100000, help="Synthetic article vectors")
+    parser.add_argument("--queries", type=int, default=500, help="Synthetic user preference vectors")
+    parser.add_argument("--k", type=int, default=20, help="Feed page size")
+    parser.add_argument("--db", action="store_true",
+                        help="Also measure table/index size and cache hits in scratch tables (needs pgvector >= 0.7)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    articles = synthetic_vectors(args.articles, args.seed)
+    queries = synthetic_vectors(args.queries, args.seed + 1)
+
+    report = {
+        # pgvector stores 4 header bytes plus 4 (vector) or 2 (halfvec) bytes per dimension
+        "value_bytes": {"vector": 4 + 4 * DIM, "halfvec": 4 + 2 * DIM},
+        "ranking_agreement": ranking_agreement(articles, queries, args.k),
+    }
+    if args.db:
+        report["database"] = asyncio.run(database_sizes(articles, queries, args.k))
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,178 @@
+import asyncio
+import sys
+import os
+import json
+import argparse
+import logging
+import statistics
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.database import engine, Base
+from app.partitions import add_months, create_partition, month_start
+
+# Import models to ensure they are registered with Base
+from app.models import user, article, summary, interaction, synthesized_article
+
+TABLES = ["users", "articles", "synthesized_articles", "user_interactions", "daily_summaries"]
+
+# The hot queries, as the services issue them (:user and :prefs vary per run)
+QUERIES = {
+    "feed": """
+        SELECT id FROM synthesized_articles
+        WHERE generated_at >= now() - interval '30 days'
+          AND id NOT IN (SELECT synthesized_article_id FROM user_interactions
+                         WHERE user_id = :user AND created_at >= now() - interval '30 days')
+        ORDER BY category_scores <=> (:prefs)::vector LIMIT 50""",
+    # The feed before it was bounded by FEED_WINDOW_DAYS, for reference
+    "feed_unbounded": """
+        SELECT id FROM synthesized_articles
+        WHERE id NOT IN (SELECT synthesized_article_id FROM user_interactions WHERE user_id = :user)
+        ORDER BY category_scores <=> (:prefs)::vector LIMIT 50""",
+    "top_articles": """
+        SELECT id FROM articles
+        WHERE published_at >= now() - interval '24 hours' AND category_scores IS NOT NULL
+        ORDER BY category_scores <=> (:prefs)::vector LIMIT 15""",
+    "cluster_latest": "SELECT published_at FROM articles ORDER BY published_at DESC LIMIT 1",
+    "cluster_window": """
+        SELECT id FROM articles
+        WHERE published_at >= now() - interval '24 hours' AND published_at <= now()
+          AND category_scores IS NOT NULL""",
+    "daily_summary": "SELECT id FROM daily_summaries WHERE user_id = :user AND date = current_date LIMIT 1",
+}
+
+
+async def load(conn, schema: str, years: int, args):
+    """Fills `schema` with `years` of history at the given daily rates, ending now."""
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {schema}"))
+    await conn.execute(text(f"SET search_path TO {schema}, public"))
+    # checkfirst would find the application's tables further down the search path
+    await conn.run_sync(lambda sync: Base.metadata.create_all(
+        sync, tables=[Base.metadata.tables[t] for t in TABLES], checkfirst=False
+    ))
+    now = month_start(datetime.now(timezone.utc))
+    for table in TABLES[1:]:
+        for months in range(-12 * years, 2):
+            await create_partition(conn, table, add_months(now, months))
+
+    days = 365 * years
+    # Referencing g makes Postgres draw a new vector per row
+    vector = "('[' || array_to_string(ARRAY(SELECT round(random()::numeric, 3) FROM generate_series(1, 10) WHERE g > 0), ',') || ']')::vector"
+    await conn.execute(text(
+        "INSERT INTO users (id, email, hashed_password) "
+        "SELECT md5('u' || g)::uuid, 'u' || g || '@example.com', 'x' FROM generate_series(1, :n) g"
+    ), {"n": args.users})
+    await conn.execute(text(
+        "INSERT INTO articles (id, title, content, source_url, published_at, category_scores, stage) "
+        f"SELECT gen_random_uuid(), 't', 'c', 'https://example.com/' || g, now() - random() * (:days * interval '1 day'), "
+        f"{vector}, 'synthesized' FROM generate_series(1, :n) g"
+    ), {"days": days, "n": days * args.articles_per_day})
+    await conn.execute(text(
+        "INSERT INTO synthesized_articles (id, title, content, generated_at, category_scores) "
+        f"SELECT md5('s' || g)::uuid, 't', 'c', now() - (g::float / :per_day) * interval '1 day', {vector} "
+        "FROM generate_series(1, :n) g"
+    ), {"per_day": args.synthesized_per_day, "n": days * args.synthesized_per_day})
+    # Users interact with articles within two days of their generation
+    await conn.execute(text(
+        "INSERT INTO user_interactions (id, user_id, synthesized_article_id, is_liked, created_at) "
+        "SELECT gen_random_uuid(), md5('u' || (1 + floor(random() * :users))::int)::uuid, s.id, random() < 0.5, "
+        "least(now(), s.generated_at + random() * interval '2 days') "
+        "FROM synthesized_articles s, generate_series(1, :per_article)"
+    ), {"users": args.users, "per_article": max(1, args.interactions_per_day // args.synthesized_per_day)})
+    await conn.execute(text(
+        "INSERT INTO daily_summaries (id, user_id, date, status) "
+        "SELECT gen_random_uuid(), md5('u' || u)::uuid, current_date - d, 'completed' "
+        "FROM generate_series(1, :users) u, generate_series(0, :days - 1) d"
+    ), {"users": args.users, "days": days})
+    for table in TABLES:
+        await conn.execute(text(f"ANALYZE {table}"))
+
+
+async def copy_unpartitioned(conn, source: str, schema: str):
+    """Same rows and indexes in plain tables, as before partitioning."""
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {schema}"))
+    for table in TABLES:
+        await conn.execute(text(f"CREATE TABLE {schema}.{table} (LIKE {source}.{table} INCLUDING ALL)"))
+        await conn.execute(text(f"INSERT INTO {schema}.{table} SELECT * FROM {source}.{table}"))
+        await conn.execute(text(f"ANALYZE {schema}.{table}"))
+
+
+def _scanned(plan: dict) -> set:
+    """Relations the executed plan read."""
+    relations = {plan["Relation Name"]} if "Relation Name" in plan and plan.get("Actual Loops", 1) else set()
+    for child in plan.get("Plans", []):
+        relations |= _scanned(child)
+    return relations
+
+
+async def measure(conn, schema: str, runs: int, users: int, seed: int) -> dict:
+    await conn.execute(text(f"SET search_path TO {schema}, public"))
+    rng = np.random.default_rng(seed)
+    user_ids = (await conn.execute(text("SELECT id FROM users ORDER BY id LIMIT :n"), {"n": users})).scalars().all()
+    results = {}
+    for name, sql in QUERIES.items():
+        timings, buffers, scanned = [], [], set()
+        for i in range(runs):
+            params = {}
+            if ":user" in sql:
+                params["user"] = user_ids[i % len(user_ids)]
+            if ":prefs" in sql:
+                params["prefs"] = "[" + ",".join(f"{x:.3f}" for x in rng.random(10)) + "]"
+            plan = (await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params)).scalar()
+            plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]
+            timings.append(plan["Planning Time"] + plan["Execution Time"])
+            root = plan["Plan"]
+            buffers.append(root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0))
+            scanned |= _scanned(root)
+        results[name] = {
+            "median_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(float(np.percentile(timings, 95)), 2),
+            "buffers": int(statistics.median(buffers)),
+            "relations_scanned": len(scanned),
+        }
+    return results
+
+
+async def main(args):
+    report = []
+    async with engine.connect() as conn:
+        for years in args.years:
+            await load(conn, "benchmark_partitioned", years, args)
+            await conn.commit()
+            await copy_unpartitioned(conn, "benchmark_partitioned", "benchmark_plain")
+            await conn.commit()
+            for layout in ("plain", "partitioned"):
+                # One untimed pass warms the cache for both layouts alike
+                await measure(conn, f"benchmark_{layout}", 3, args.users, args.seed)
+                results = await measure(conn, f"benchmark_{layout}", args.runs, args.users, args.seed)
+                report.append({"years": years, "layout": layout, "queries": results})
+                await conn.commit()
+        if not args.keep:
+            for schema in ("benchmark_partitioned", "benchmark_plain"):
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            await conn.commit()
+    await engine.dispose()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hot query cost on plain vs monthly partitioned history tables")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 3], help="Years of simulated history")
+    parser.add_argument("--articles-per-day", type=int, default=300)
+    parser.add_argument("--synthesized-per-day", type=int, default=50)
+    parser.add_argument("--interactions-per-day", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=30, help="Timed executions per query")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark schemas")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    print(json.dumps(asyncio.run(main(args)), indent=2))
@@ -0,0 +1,59 @@
+import sys
+import os
+import time
+import json
+import argparse
+
+import numpy as np
+from pgvector import Vector
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.vector_codec import decode_vector, encode_vector
+
+
+def timed(fn, values, repeat: int) -> float:
+    """Best-of-`repeat` seconds to run fn over all values."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for value in values:
+            fn(value)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def text_decode(text):
+    # Text protocol plus the conversions the services used to apply
+    return np.array([float(x) for x in list(Vector._from_db(text))])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decode/encode cost of category vectors: text vs binary codec")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = (rng.dirichlet(np.ones(args.dim), size=args.rows) * 5).astype(np.float32)
+    # What Postgres sends for each row in the text and binary formats
+    texts = [Vector._to_db(v) for v in vectors]
+    binaries = [encode_vector(v) for v in vectors]
+    assert np.allclose(decode_vector(binaries[0]), text_decode(texts[0]), atol=1e-6)
+
+    per_rows = 10000 / args.rows * 1000
+    results = {
+        "rows": args.rows,
+        "dim": args.dim,
+        "decode_text_ms_per_10k": round(timed(Vector._from_db, texts, args.repeat) * per_rows, 1),
+        "decode_text_and_list_ms_per_10k": round(timed(text_decode, texts, args.repeat) * per_rows, 1),
+        "decode_binary_ms_per_10k": round(timed(decode_vector, binaries, args.repeat) * per_rows, 1),
+        "encode_text_ms_per_10k": round(timed(Vector._to_db, vectors, args.repeat) * per_rows, 1),
+        "encode_binary_ms_per_10k": round(timed(encode_vector, vectors, args.repeat) * per_rows, 1),
+        "bytes_text": sum(len(t) for t in texts) // args.rows,
+        "bytes_binary": sum(len(b) for b in binaries) // args.rows,
+    }
+    print(json.dumps(results, indent=2))
@@ -1,12 +1,14 @@
 import asyncio
+import copy
 import sys
 import os
 import json
+import hashlib
+import uuid
 import math
-import ollama
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional
 from sqlalchemy.future import select
 from sqlalchemy import desc
 from sklearn.cluster import KMeans
@@ -15,21 +17,61 @@ from sklearn.cluster import KMeans
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import AsyncSessionLocal
-from app.models.article import Article
+from app.models.article import Article, ArticleStage
 from app.models.synthesized_article import SynthesizedArticle, SynthesizedSource
+from app.models.cluster_snapshot import ClusterSnapshot
+from app.services.prompt_builder import prepare_texts, get_prompt_stats
+from app.services.llm_gateway import get_gateway, Priority
+from app.services.llm_validator import COMBINER_SCHEMA, repair_output, validate_combiner_output
+from app.services.llm_metrics import record_generation, record_sources, get_generation_stats
+from app.services.nlp_service import NLPService, SUMMARY_INSTRUCTIONS
+from app.services.near_duplicate import group_near_duplicates
+from app.services.clustering import (
+    ClusterState, EntityIndex, balanced_groups, cosine_similarity_matrix, entity_aware_similarity
+)
+from app.services.story_tracker import StoryIndex, article_entities, centroid
+from app.services import job_queue
+from app.config import settings
 
 class ClusterService:
     OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
     MODEL_NAME = "news-combiner"
+    # Row of cluster_snapshots holding the incremental clustering state
+    STATE_NAME = "daily_cluster"
+
+    # Static instructions first, articles last, so Ollama can reuse the cached prefix
+    PROMPT_PREFIX = """Analyze the following articles, write one combined news article based only on them, and return the JSON object as specified.
+Return ONLY the JSON object.
+
+ARTICLE SET:
+"""
+
+    # Delta prompt for a developing story: the published article plus only the new reports
+    UPDATE_PROMPT_PREFIX = """ARTICLE 1 is our published article on an ongoing story; the other articles are new reports.
+Update ARTICLE 1 with the new developments from the reports about the same story, keep what is still accurate, include 1 in combined_indices, and return the JSON object as specified.
+Return ONLY the JSON object.
+
+ARTICLE SET:
+"""
 
     logger = logging.getLogger("daily_cluster")
 
     def __init__(self):
-        self.client = ollama.Client(host=self.OLLAMA_HOST, timeout=600) # Longer timeout for generation
+        self.gateway = get_gateway(self.OLLAMA_HOST)
+        # Representative article id -> near-duplicate copies dropped from the prompts
+        self.twins: Dict[Any, List[Article]] = {}
+        # Named entities of the window's articles, for entity-aware grouping
+        self.entity_index = None
+        # Articles group_balanced could not place in a group this run
+        self.leftovers: List[Article] = []
+        # Recent synthesized articles by id, for story continuity
+        self.story_articles: Dict[Any, SynthesizedArticle] = {}
+        self.story_stats = {"created": 0, "updated": 0, "leftovers_attached": 0}
 
     async def run_daily_clustering(self):
         start_total = datetime.now()
         self.logger.info("Starting daily clustering...")
+        self.leftovers = []
         async with AsyncSessionLocal() as db:
             # 1. Fetch articles from the last 24 hours relative to the latest article
             # First, get the latest article date
@@ -48,41 +90,58 @@ class ClusterService:
             cutoff = latest_date - timedelta(hours=24)
             self.logger.info(f"Latest article date: {latest_date}. Fetching articles since {cutoff}...")
 
-            # Ensure we only fetch articles that have category scores
+            # 2. Pending work: classified articles not synthesized yet (ix_articles_pending_synthesis),
+            # including groups a crashed run left behind and failures with attempts left
             result = await db.execute(
                 select(Article).where(
+                    Article.stage.in_(ArticleStage.PENDING_SYNTHESIS),
+                    Article.stage_attempts < settings.STAGE_MAX_ATTEMPTS,
                     Article.published_at >= cutoff,
                     Article.published_at <= latest_date,
                     Article.category_scores.is_not(None)
                 )
             )
-            articles = result.scalars().all()
-            self.logger.info(f"Fetched {len(articles)} articles from the 24h window ending at {latest_date}.")
-
-            if not articles:
-                self.logger.info("No articles found. Exiting.")
-                return
-
-            # 2. Filter out articles that have already been used in synthesized articles
-            existing_sources_result = await db.execute(
-                select(SynthesizedSource.article_id).distinct()
-            )
-            already_synthesized_ids = set(row[0] for row in existing_sources_result.fetchall())
-            
-            # Filter to only new articles
-            new_articles = [a for a in articles if a.id not in already_synthesized_ids]
-            self.logger.info(f"After deduplication: {len(new_articles)} new articles (excluded {len(articles) - len(new_articles)} already synthesized).")
+            new_articles = result.scalars().all()
+            self.logger.info(f"Found {len(new_articles)} articles waiting for synthesis in the 24h window ending at {latest_date}.")
 
             if not new_articles:
                 self.logger.info("All articles have already been synthesized. Exiting.")
                 return
 
+            # The whole window feeds the incremental cluster state and the entity statistics
+            if settings.CLUSTER_INCREMENTAL or settings.CLUSTER_ENTITY_AWARE:
+                result = await db.execute(
+                    select(Article).where(
+                        Article.published_at >= cutoff,
+                        Article.published_at <= latest_date,
+                        Article.category_scores.is_not(None)
+                    )
+                )
+                articles = result.scalars().all()
+            else:
+                articles = new_articles
+
+            # Republished copies of the same story would only repeat themselves in the prompt
+            new_articles = self.drop_near_duplicates(new_articles)
+
             # 3. Cluster articles
             start_cluster = datetime.now()
-            # We want groups of roughly 5 articles
-            groups = self.group_articles_by_size(new_articles, num=5)
+            self.entity_index = self.build_entity_index(articles) if settings.CLUSTER_ENTITY_AWARE else None
+            # We want coherent groups of 3-5 articles
+            if settings.CLUSTER_INCREMENTAL:
+                groups = await self.group_incrementally(db, articles, new_articles, num=settings.CLUSTER_MAX_SIZE)
+            else:
+                groups = self.group_balanced(new_articles)
             cluster_duration = (datetime.now() - start_cluster).total_seconds()
             self.logger.info(f"Created {len(groups)} clusters in {cluster_duration:.2f} seconds.")
+            await self.mark_clustered(db, new_articles, groups)
+
+            stories = await self.load_recent_stories(db) if settings.STORY_TRACKING else None
+
+            # Load the combiner and prefill the shared instructions before the batch
+            # (with the job queue, the workers generate and warm up themselves)
+            if not settings.JOB_QUEUE_ENABLED:
+                await self.gateway.warm_up(self.MODEL_NAME, prefix=self.PROMPT_PREFIX)
 
             # 4. Process each group
             for i, group_ids in enumerate(groups):
@@ -98,15 +157,168 @@ class ClusterService:
                 if not target_articles:
                     continue
 
-                await self.process_cluster(db, target_articles)
+                if settings.JOB_QUEUE_ENABLED:
+                    story = self.match_story(stories, target_articles) if stories is not None else None
+                    await self.enqueue_combine(db, target_articles, story)
+                    continue
+
+                # A developing story is updated in place rather than synthesized again
+                if stories is not None and await self.continue_story(db, stories, target_articles):
+                    continue
+
+                synth = await self.process_cluster(db, target_articles)
+                if stories is not None and synth is not None:
+                    stories.add(synth.id, synth.category_scores, self._story_entities(synth.analysis, target_articles))
+                    self.story_articles[synth.id] = synth
+
+            # Articles too isolated to form a group can still extend a running story
+            if stories is not None and self.leftovers:
+                await self.attach_leftovers(db, stories)
+
+        # Users request their briefings after the batch: have the summarizer resident
+        await self.gateway.warm_up(NLPService.SUMMARY_MODEL, prefix=SUMMARY_INSTRUCTIONS)
+
+        prompt_stats = get_prompt_stats().get(self.MODEL_NAME)
+        if prompt_stats:
+            self.logger.info(
+                f"Combiner prompt input: {prompt_stats['final_tokens']} tokens "
+                f"({prompt_stats['tokens_saved']} saved by cleanup/budgeting)"
+            )
+
+        generation_stats = get_generation_stats().get(self.MODEL_NAME)
+        if generation_stats:
+            self.logger.info(
+                f"Combiner generations: {generation_stats.get('generations', 0)}, "
+                f"retries: {generation_stats.get('retries', 0)} (rate {generation_stats.get('retry_rate', 0.0)}), "
+                f"failures: {generation_stats.get('failures', 0)}, "
+                f"prefill saved: {generation_stats.get('prefill_saved_tokens', 0)} tokens "
+                f"({generation_stats.get('prefix_cache_hits', 0)} prefix cache hits), "
+                f"sources dropped: {generation_stats.get('sources_dropped', 0)} of {generation_stats.get('sources_sent', 0)} "
+                f"({generation_stats.get('dropped_per_cluster', 0.0)} per cluster)"
+            )
+
+        if settings.STORY_TRACKING:
+            self.logger.info(
+                f"Stories: {self.story_stats['created']} created, {self.story_stats['updated']} updated with delta prompts "
+                f"({self.story_stats['leftovers_attached']} ungrouped articles attached to running stories)."
+            )
 
         total_duration = (datetime.now() - start_total).total_seconds()
         self.logger.info(f"Daily clustering finished in {total_duration:.2f} seconds.")
 
+    def drop_near_duplicates(self, articles: List[Article]) -> List[Article]:
+        """
+        Keeps one article per near-duplicate set (the longest, i.e. most
+        complete copy) and remembers the others in `self.twins`, so they are
+        still linked as sources of the synthesized article.
+        """
+        by_length = sorted(articles, key=lambda a: len(a.content or ""), reverse=True)
+        groups = group_near_duplicates(
+            [(a.id, a.content) for a in by_length], settings.NEAR_DUPLICATE_MAX_DISTANCE
+        )
+        by_id = {a.id: a for a in articles}
+        self.twins = {rep: [by_id[t] for t in twins] for rep, twins in groups.items() if twins}
+
+        dropped = sum(len(t) for t in self.twins.values())
+        if dropped:
+            self.logger.info(f"Dropped {dropped} near-duplicate articles ({len(self.twins)} stories published more than once).")
+        return [a for a in articles if a.id in groups]
+
+    async def group_incrementally(self, db, window_articles: List[Article], new_articles: List[Article], num: int) -> List[List[Any]]:
+        """
+        Assigns the window's unseen articles to the clusters the previous run
+        saved in the database (whichever node ran it) and groups the unsynthesized articles (with group_balanced)
+        of the clusters whose membership changed or that still hold pending
+        articles: those a crashed run clustered, failed syntheses with attempts
+        left and earlier leftovers. Other clusters are not regrouped.
+        """
+        snapshot = await db.get(ClusterSnapshot, self.STATE_NAME)
+        state = ClusterState.from_dict(
+            snapshot.data if snapshot else None,
+            max_distance=settings.CLUSTER_ASSIGN_MAX_DISTANCE,
+            target_size=num
+        )
+        state.retain({str(a.id) for a in window_articles})
+        known = len(state.members)
+
+        candidates = [a for a in window_articles if a.category_scores is not None]
+        changed = state.assign(
+            [str(a.id) for a in candidates],
+            [a.category_scores for a in candidates]
+        )
+        await ClusterSnapshot.save(db, self.STATE_NAME, state.to_dict())
+        await db.commit()
+        self.logger.info(
+            f"Incremental clustering: {len(state.members) - known} new articles assigned, "
+            f"{len(changed)} of {len(state.centroids)} clusters changed."
+        )
+
+        pending = {str(a.id): a for a in new_articles}
+        # The state is saved before synthesis, so membership alone cannot tell
+        # which clusters still have work: the pending articles do
+        regroup = set(changed) | {state.members[article_id] for article_id in pending if article_id in state.members}
+        clusters = state.clusters()
+        groups: List[List[Any]] = []
+        for label in sorted(regroup):
+            members = [pending[article_id] for article_id in clusters.get(label, []) if article_id in pending]
+            groups.extend(self.group_balanced(members))
+        return groups
+
+    def build_entity_index(self, articles: List[Article]) -> EntityIndex:
+        """Inverted index of the Named Entities the classifier stored for each article."""
+        index = EntityIndex()
+        for article in articles:
+            index.add(article.id, article_entities(getattr(article, "metadata_", None)))
+        return index
+
+    def group_balanced(self, articles: List[Article], entity_aware: bool = None) -> List[List[Any]]:
+        """
+        Groups articles into CLUSTER_MIN_SIZE..CLUSTER_MAX_SIZE sets whose
+        members are all pairwise similar (see clustering.balanced_groups).
+        With entity-aware grouping, articles that name entities must share some
+        to be grouped (see clustering.entity_aware_similarity).
+        Leftovers are not synthesized this run; they stay unsynthesized and
+        can join a group once related coverage arrives.
+        """
+        articles = [a for a in articles if a.category_scores is not None]
+        if not articles:
+            return []
+        if entity_aware is None:
+            entity_aware = settings.CLUSTER_ENTITY_AWARE
+
+        similarity = cosine_similarity_matrix([a.category_scores for a in articles])
+        if entity_aware:
+            index = self.entity_index
+            if index is None or any(a.id not in index for a in articles):
+                index = self.build_entity_index(articles)
+            entity_similarity, has_entities = index.similarity_matrix([a.id for a in articles])
+            similarity = entity_aware_similarity(
+                similarity, entity_similarity, has_entities,
+                entity_weight=settings.CLUSTER_ENTITY_WEIGHT,
+                min_entity_similarity=settings.CLUSTER_MIN_ENTITY_SIMILARITY
+            )
+        groups, leftovers = balanced_groups(
+            similarity,
+            min_size=settings.CLUSTER_MIN_SIZE,
+            max_size=settings.CLUSTER_MAX_SIZE,
+            min_similarity=settings.CLUSTER_MIN_SIMILARITY
+        )
+        if leftovers:
+            self.logger.info(f"{len(leftovers)} of {len(articles)} articles left ungrouped (no coherent group of {settings.CLUSTER_MIN_SIZE}+).")
+            self.leftovers.extend(articles[i] for i in leftovers)
+
+        result = []
+        for group in groups:
+            members = sorted((articles[i] for i in group), key=lambda x: x.published_at or datetime.min, reverse=True)
+            result.append([a.id for a in members])
+        return result
+
     def group_articles_by_size(self, articles: List[Article], num: int, random_state: int = 42) -> List[List[Any]]:
         """
         Group articles into chunks of size `num`, ensuring that articles
         inside each group are as similar as possible (via clustering).
+        Superseded by group_balanced; kept as the baseline for
+        scripts/benchmark_clustering.py.
         """
         if num <= 0:
             raise ValueError("num must be positive")
@@ -115,15 +327,12 @@ class ClusterService:
         if total == 0:
             return []
 
-        # Extract vectors. Note: category_scores is a Vector object or list
-        # We need to ensure it's a list of floats for KMeans
+        # category_scores arrive as float32 arrays (binary vector codec)
         vectors = []
         valid_articles = []
         for a in articles:
             if a.category_scores is not None:
-                # Convert to list if it's not already
-                vec = list(a.category_scores) if hasattr(a.category_scores, '__iter__') else a.category_scores
-                vectors.append(vec)
+                vectors.append(a.category_scores)
                 valid_articles.append(a)
 
         if not vectors:
@@ -178,41 +387,86 @@ class ClusterService:
 
     async def process_cluster(self, db, articles: List[Article]):
         # Prepare prompt
+        # Cleaned and truncated to share the combiner's context budget
+        contents = prepare_texts([article.content for article in articles], self.MODEL_NAME)
         prompt_articles = ""
-        for i, article in enumerate(articles):
+        for i, (article, content) in enumerate(zip(articles, contents)):
             prompt_articles += f"ARTICLE {i+1}:\n"
             prompt_articles += f"Title: {article.title}\n"
-            prompt_articles += f"Content: {article.content}\n\n" # Truncate content to fit context
+            prompt_articles += f"Content: {content}\n\n"
 
-        prompt = f"""Analyze the following articles, write one combined news article based only on them, and return the JSON object as specified:
+        prompt = self.PROMPT_PREFIX + prompt_articles
 
-ARTICLE SET:
-{prompt_articles}
+        self.logger.info(f"Sending {len(articles)} articles to Ollama...")
 
-Return ONLY the JSON object.
-"""
+        result = await self._generate(prompt, len(articles), stage="combine")
+        if result:
+            combined = {idx for idx in result.get("combined_indices") or [] if 1 <= idx <= len(articles)}
+            record_sources(self.MODEL_NAME, len(articles), len(combined) or len(articles))
+            return await self.save_synthesized_article(db, result, articles, prompt)
+        self.logger.error("Failed to get a valid combiner result after 3 attempts.")
+        await self.mark_failed(db, articles, "No valid combiner result after 3 attempts")
+        return None
+
+    async def mark_clustered(self, db, articles: List[Article], groups: List[List[Any]]):
+        """Records which pending articles were put in a group this run."""
+        grouped = {article_id for group in groups for article_id in group}
+        for article in articles:
+            # Failed articles keep their state (and attempt count) until they succeed
+            if article.id in grouped and article.stage == ArticleStage.CLASSIFIED:
+                article.set_stage(ArticleStage.CLUSTERED)
+        try:
+            await db.commit()
+        except Exception as e:
+            self.logger.error(f"Error recording clustered articles: {e}")
+            await db.rollback()
 
-        self.logger.info(f"Sending {len(articles)} articles to Ollama...")
+    async def mark_failed(self, db, articles: List[Article], error: str):
+        """Counts a failed synthesis attempt; articles are retried until STAGE_MAX_ATTEMPTS."""
+        for article in articles:
+            article.set_stage(ArticleStage.SYNTHESIZE_FAILED, error=error)
         try:
-            start_ollama = datetime.now()
-            response = self.client.chat(
-                model=self.MODEL_NAME,
-                messages=[{"role": "user", "content": prompt}],
-                stream=False
-            )
-            ollama_duration = (datetime.now() - start_ollama).total_seconds()
-            self.logger.info(f"Ollama generation finished in {ollama_duration:.2f} seconds.")
+            await db.commit()
+        except Exception as e:
+            self.logger.error(f"Error recording failed synthesis: {e}")
+            await db.rollback()
+
+    async def _generate(self, prompt: str, num_sources: int, stage: str):
+        """Runs a combiner prompt with up to 3 attempts; returns the validated result or None."""
+        result = None
+        for attempt in range(3):
+            try:
+                start_ollama = datetime.now()
+                response = await self.gateway.chat(
+                    model=self.MODEL_NAME,
+                    messages=[{"role": "user", "content": prompt}],
+                    priority=Priority.BATCH,
+                    stage=stage,
+                    attempt=attempt + 1,
+                    format=COMBINER_SCHEMA
+                )
+                ollama_duration = (datetime.now() - start_ollama).total_seconds()
+                self.logger.info(f"Ollama generation finished in {ollama_duration:.2f} seconds.")
 
-            raw_response = response.message.content
-            result = self._parse_ollama_json(raw_response)
+                raw_result = self._parse_ollama_json(response.message.content)
+                if raw_result is None:
+                    self.logger.warning(f"Failed to parse Ollama response (Attempt {attempt + 1}).")
+                    continue
 
-            if result:
-                await self.save_synthesized_article(db, result, articles, prompt)
-            else:
-                self.logger.error("Failed to parse Ollama response.")
+                if isinstance(raw_result.get("analysis"), dict):
+                    repair_output(raw_result["analysis"])
 
-        except Exception as e:
-            self.logger.error(f"Error calling Ollama: {e}")
+                is_valid, error_msg = validate_combiner_output(raw_result, num_sources)
+                if is_valid:
+                    result = raw_result
+                    break
+                self.logger.warning(f"Combiner validation failed (Attempt {attempt + 1}): {error_msg}")
+
+            except Exception as e:
+                self.logger.error(f"Error calling Ollama (Attempt {attempt + 1}): {e}")
+
+        record_generation(self.MODEL_NAME, attempt + 1, success=result is not None)
+        return result
 
     def _parse_ollama_json(self, raw_response):
         try:
@@ -235,38 +489,9 @@ Return ONLY the JSON object.
 
             if not generated_article or not analysis:
                 self.logger.error("Missing generated_article or analysis in result.")
-                return
+                return None
 
-            # Extract category scores in a strict order
-            category_keys = [
-                "Politics & Law", "Economy & Business", "Science & Technology",
-                "Health & Wellness", "Education & Society", "Culture & Entertainment",
-                "Religion & Belief", "Sports", "World & International Affairs",
-                "Opinion & General News"
-            ]
-
-            category_scores = []
-            for key in category_keys:
-                category_scores.append(float(analysis.get(key, 0.0)))
-
-            # Extract Metadata
-            # Helper to safely ge float
-            def get_score(key, default=0.5):
-                val = analysis.get(key)
-                if isinstance(val, (int, float)):
-                    return float(val)
-                # Handle nested tone if present
-                if key in ["Neutral", "Informative", "Emotional"] and "Tone" in analysis and isinstance(analysis["Tone"], dict):
-                    return float(analysis["Tone"].get(key, default))
-                return default
-
-            metadata_scores = {
-                "Length": get_score("Length"),
-                "Complexity": get_score("Complexity"),
-                "Neutral": get_score("Neutral"),
-                "Informative": get_score("Informative"),
-                "Emotional": get_score("Emotional")
-            }
+            category_scores, metadata_scores = self._scores_from_analysis(analysis)
 
             # Determine which articles to link based on combined_indices
             # combined_indices are 1-based indices from the LLM
@@ -301,20 +526,291 @@ Return ONLY the JSON object.
             db.add(synth)
             await db.flush() # Get ID
 
-            # Link only the articles that were actually combined
-            for article in linked_articles:
+            # Link only the articles that were actually combined, plus their near-duplicate copies
+            twins = [twin for article in linked_articles for twin in self.twins.get(article.id, [])]
+            for article in linked_articles + twins:
                 source = SynthesizedSource(
                     synthesized_id=synth.id,
                     article_id=article.id
                 )
                 db.add(source)
+                article.set_stage(ArticleStage.SYNTHESIZED)
 
             await db.commit()
+            self.story_stats["created"] += 1
             self.logger.info(f"Saved synthesized article {synth.id} with {len(linked_articles)} source links")
+            return synth
 
         except Exception as e:
             self.logger.error(f"Error saving synthesized article: {e}")
             await db.rollback()
+            return None
+
+    @staticmethod
+    def _scores_from_analysis(analysis: dict):
+        """Category vector and metadata scores of a combiner analysis, as stored on SynthesizedArticle."""
+        # Extract category scores in a strict order
+        category_keys = [
+            "Politics & Law", "Economy & Business", "Science & Technology",
+            "Health & Wellness", "Education & Society", "Culture & Entertainment",
+            "Religion & Belief", "Sports", "World & International Affairs",
+            "Opinion & General News"
+        ]
+
+        category_scores = []
+        for key in category_keys:
+            category_scores.append(float(analysis.get(key, 0.0)))
+
+        # Extract Metadata
+        # Helper to safely ge float
+        def get_score(key, default=0.5):
+            val = analysis.get(key)
+            if isinstance(val, (int, float)):
+                return float(val)
+            # Handle nested tone if present
+            if key in ["Neutral", "Informative", "Emotional"] and "Tone" in analysis and isinstance(analysis["Tone"], dict):
+                return float(analysis["Tone"].get(key, default))
+            return default
+
+        metadata_scores = {
+            "Length": get_score("Length"),
+            "Complexity": get_score("Complexity"),
+            "Neutral": get_score("Neutral"),
+            "Informative": get_score("Informative"),
+            "Emotional": get_score("Emotional")
+        }
+
+        return category_scores, metadata_scores
+
+    # ------------------------------------------------------------------
+    # Story continuity
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _story_entities(analysis: dict, articles: List[Article]):
+        entities = article_entities(analysis)
+        for article in articles:
+            entities |= article_entities(article.metadata_)
+        return entities
+
+    async def load_recent_stories(self, db) -> StoryIndex:
+        """Indexes the synthesized articles of the last STORY_WINDOW_DAYS for continue_story."""
+        since = datetime.now(timezone.utc) - timedelta(days=settings.STORY_WINDOW_DAYS)
+        result = await db.execute(
+            select(SynthesizedArticle).where(
+                SynthesizedArticle.generated_at >= since,
+                SynthesizedArticle.category_scores.is_not(None)
+            )
+        )
+        stories = StoryIndex(settings.STORY_MIN_SIMILARITY, settings.STORY_MIN_ENTITY_OVERLAP)
+        self.story_articles = {}
+        for synth in result.scalars().all():
+            sources = [s.article for s in synth.sources if s.article is not None]
+            stories.add(synth.id, synth.category_scores, self._story_entities(synth.analysis, sources))
+            self.story_articles[synth.id] = synth
+        self.logger.info(f"Tracking {len(stories)} stories synthesized since {since:%Y-%m-%d %H:%M}.")
+        return stories
+
+    async def continue_story(self, db, stories: StoryIndex, articles: List[Article]) -> bool:
+        """
+        Updates the recent story the group matches, if any. Returns True when
+        the group was handled (updated, or failed to generate) and False when
+        it should be synthesized as a new story.
+        """
+        story = self.match_story(stories, articles)
+        if story is None:
+            return False
+        return await self.update_story(db, stories, story, articles)
+
+    def match_story(self, stories: StoryIndex, articles: List[Article]) -> Optional[SynthesizedArticle]:
+        entities = set()
+        for article in articles:
+            entities |= article_entities(article.metadata_)
+        match = stories.match(centroid([a.category_scores for a in articles]), entities)
+        if match is None:
+            return None
+
+        story = self.story_articles[match[0]]
+        self.logger.info(f"Cluster continues story {story.id} ('{story.title}', match score {match[1]:.2f}).")
+        return story
+
+    async def attach_leftovers(self, db, stories: StoryIndex):
+        """Sends ungrouped articles that match a running story to it as delta updates."""
+        by_story: Dict[Any, List[Article]] = {}
+        for article in self.leftovers:
+            if article.category_scores is None:
+                continue
+            match = stories.match(article.category_scores, article_entities(article.metadata_))
+            if match is not None:
+                by_story.setdefault(match[0], []).append(article)
+
+        for story_id, articles in by_story.items():
+            articles.sort(key=lambda x: x.published_at or datetime.min, reverse=True)
+            for i in range(0, len(articles), settings.CLUSTER_MAX_SIZE):
+                batch = articles[i:i + settings.CLUSTER_MAX_SIZE]
+                if settings.JOB_QUEUE_ENABLED:
+                    await self.enqueue_combine(db, batch, self.story_articles[story_id])
+                    continue
+                updated = self.story_stats["updated"]
+                await self.update_story(db, stories, self.story_articles[story_id], batch)
+                if self.story_stats["updated"] > updated:
+                    self.story_stats["leftovers_attached"] += len(batch)
+
+    async def update_story(self, db, stories: Optional[StoryIndex], story: SynthesizedArticle, articles: List[Article]) -> bool:
+        """
+        Delta update of a synthesized article: the prompt holds the article
+        itself (as ARTICLE 1) and only the new sources. Returns False when the
+        combiner did not merge the new articles into the story.
+        """
+        contents = prepare_texts([story.content] + [article.content for article in articles], self.MODEL_NAME)
+        prompt_articles = f"ARTICLE 1:\nTitle: {story.title}\nContent: {contents[0]}\n\n"
+        for i, (article, content) in enumerate(zip(articles, contents[1:])):
+            prompt_articles += f"ARTICLE {i+2}:\n"
+            prompt_articles += f"Title: {article.title}\n"
+            prompt_articles += f"Content: {content}\n\n"
+
+        prompt = self.UPDATE_PROMPT_PREFIX + prompt_articles
+
+        self.logger.info(f"Sending story {story.id} with {len(articles)} new articles to Ollama...")
+
+        result = await self._generate(prompt, len(articles) + 1, stage="combine_update")
+        if result is None:
+            self.logger.error(f"Failed to update story {story.id}; its new articles stay unsynthesized.")
+            await self.mark_failed(db, articles, f"No valid update of story {story.id} after 3 attempts")
+            return True
+
+        indices = result.get("combined_indices") or list(range(1, len(articles) + 2))
+        linked_articles = [articles[idx - 2] for idx in indices if 2 <= idx <= len(articles) + 1]
+        record_sources(self.MODEL_NAME, len(articles), len(set(linked_articles)) if 1 in indices else 0)
+        if 1 not in indices or not linked_articles:
+            self.logger.info(f"Combiner did not merge the new articles into story {story.id}.")
+            return False
+
+        if not await self.save_story_update(db, story, result, linked_articles, prompt):
+            return True
+        if stories is not None:
+            stories.add(story.id, story.category_scores, self._story_entities(story.analysis, linked_articles))
+        return True
+
+    # ------------------------------------------------------------------
+    # Job queue
+    # ------------------------------------------------------------------
+
+    async def enqueue_combine(self, db, articles: List[Article], story: Optional[SynthesizedArticle] = None):
+        """
+        Queues a group for the workers: a new synthesis, or a delta update of
+        `story`. A group whose earlier job failed for good is queued again (its
+        articles are still pending while they have attempts left).
+        """
+        ids = sorted(str(a.id) for a in articles)
+        payload = {
+            "article_ids": [str(a.id) for a in articles],
+            "twins": {str(a.id): [str(t.id) for t in self.twins[a.id]] for a in articles if self.twins.get(a.id)},
+            "story_id": str(story.id) if story is not None else None,
+        }
+        dedupe_key = "combine:" + hashlib.sha1(",".join(ids).encode()).hexdigest()
+        try:
+            if await job_queue.enqueue(db, "combine", payload, dedupe_key=dedupe_key):
+                self.logger.info(f"Queued combine job for {len(articles)} articles" + (f" (story {story.id})" if story else ""))
+            await db.commit()
+        except Exception as e:
+            self.logger.error(f"Error queueing combine job: {e}")
+            await db.rollback()
+
+    def _job_copy(self) -> "ClusterService":
+        """
+        A copy sharing the gateway but with its own twins and story stats: a
+        worker runs several combine jobs at once on one service, and each job
+        reads them back after awaiting the combiner.
+        """
+        job = copy.copy(self)
+        job.twins = {}
+        job.leftovers = []
+        job.story_articles = {}
+        job.story_stats = dict.fromkeys(self.story_stats, 0)
+        return job
+
+    async def combine_job(self, payload: dict):
+        """
+        Job handler: synthesizes (or, with a story_id, updates a story from) one
+        queued group. Articles synthesized in the meantime are skipped. Raises
+        when no article was produced, so the queue retries the job.
+        """
+        job = self._job_copy()
+        try:
+            await job._combine(payload)
+        finally:
+            for key, count in job.story_stats.items():
+                self.story_stats[key] += count
+
+    async def _combine(self, payload: dict):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Article).where(
+                    Article.id.in_([uuid.UUID(i) for i in payload["article_ids"]]),
+                    Article.stage.in_(ArticleStage.PENDING_SYNTHESIS)
+                )
+            )
+            articles = sorted(result.scalars().all(), key=lambda x: x.published_at or datetime.min, reverse=True)
+            if not articles:
+                return
+
+            twin_ids = {uuid.UUID(t) for twins in payload.get("twins", {}).values() for t in twins}
+            twins_by_id = {}
+            if twin_ids:
+                result = await db.execute(select(Article).where(Article.id.in_(twin_ids)))
+                twins_by_id = {a.id: a for a in result.scalars().all()}
+            self.twins = {
+                uuid.UUID(rep): [twins_by_id[uuid.UUID(t)] for t in twins if uuid.UUID(t) in twins_by_id]
+                for rep, twins in payload.get("twins", {}).items()
+            }
+
+            story = None
+            if payload.get("story_id"):
+                story = await db.get(SynthesizedArticle, uuid.UUID(payload["story_id"]))
+            if story is not None:
+                if await self.update_story(db, None, story, articles):
+                    if not self.story_stats["updated"]:
+                        raise RuntimeError(f"Story {story.id} was not updated")
+                    return
+
+            if await self.process_cluster(db, articles) is None:
+                raise RuntimeError(f"No synthesized article for {len(articles)} articles")
+
+    async def save_story_update(self, db, story: SynthesizedArticle, result, linked_articles: List[Article], prompt) -> bool:
+        try:
+            analysis = result["analysis"]
+            category_scores, metadata_scores = self._scores_from_analysis(analysis)
+
+            story.title = result.get("title", story.title)
+            story.content = result["generated_article"]
+            story.analysis = analysis
+            story.category_scores = category_scores
+            story.metadata_scores = metadata_scores
+            story.generation_prompt = prompt
+            # Move the updated story back to the top of the feeds
+            story.generated_at = datetime.now(timezone.utc)
+            note = f"Updated {story.generated_at:%Y-%m-%d %H:%M} UTC with {len(linked_articles)} new sources"
+            story.notes = f"{story.notes}\n{note}" if story.notes else note
+
+            # Link the new sources (and their near-duplicate copies) to the existing article
+            linked = {s.article_id for s in story.sources}
+            twins = [twin for article in linked_articles for twin in self.twins.get(article.id, [])]
+            for article in linked_articles + twins:
+                if article.id not in linked:
+                    story.sources.append(SynthesizedSource(article_id=article.id))
+                    linked.add(article.id)
+                article.set_stage(ArticleStage.SYNTHESIZED)
+
+            await db.commit()
+            self.story_stats["updated"] += 1
+            self.logger.info(f"Updated synthesized article {story.id} with {len(linked_articles)} new sources")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error updating synthesized article {story.id}: {e}")
+            await db.rollback()
+            return False
 
 if __name__ == "__main__":
     logging.basicConfig(
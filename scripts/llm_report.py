@@ -0,0 +1,63 @@
+import sys
+import os
+import json
+import argparse
+from datetime import datetime, timedelta, timezone
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.llm_call_log import read_calls, aggregate_calls
+
+COLUMNS = [
+    ("calls", "calls"),
+    ("failures", "fail"),
+    ("retries", "retry"),
+    ("prompt_tokens", "prompt_tok"),
+    ("output_tokens", "output_tok"),
+    ("prefill_tokens_per_sec", "prefill_t/s"),
+    ("decode_tokens_per_sec", "decode_t/s"),
+    ("retry_token_share", "retry_tok%"),
+    ("retry_time_share", "retry_time%"),
+    ("p50_latency_ms", "p50_ms"),
+    ("p95_latency_ms", "p95_ms"),
+]
+
+
+def _format(key, value):
+    if value is None:
+        return "-"
+    if key.endswith("_share"):
+        return f"{value * 100:.1f}"
+    return str(value)
+
+
+def print_report(report: dict):
+    header = f"{'day':<10}  {'stage':<18}" + "".join(f"{label:>13}" for _, label in COLUMNS)
+    print(header)
+    print("-" * len(header))
+    for day, stages in sorted(report.items()):
+        for stage, row in sorted(stages.items()):
+            print(f"{day:<10}  {stage:<18}" + "".join(f"{_format(key, row[key]):>13}" for key, _ in COLUMNS))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM capacity report from the per-call log")
+    parser.add_argument("--path", default=settings.LLM_CALL_LOG_PATH, help="Call log to read (JSONL)")
+    parser.add_argument("--days", type=int, default=7, help="Only include the last N days (0 for all)")
+    parser.add_argument("--json", action="store_true", help="Print the aggregates as JSON")
+    args = parser.parse_args()
+
+    records = read_calls(args.path)
+    if args.days:
+        since = (datetime.now(timezone.utc) - timedelta(days=args.days)).date().isoformat()
+        records = (r for r in records if r.get("ts", "")[:10] >= since)
+
+    report = aggregate_calls(records)
+    if not report:
+        print(f"No LLM calls recorded in {args.path}")
+    elif args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
@@ -0,0 +1,36 @@
+import asyncio
+import sys
+import os
+import logging
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine, Base
+from app.migrations import run_migrations, sync_vector_storage
+from app.partitions import partition_tables
+
+# Import models to ensure they are registered with Base
+from app.models import user, article, summary, interaction, synthesized_article, job, job_run, cluster_snapshot
+
+logger = logging.getLogger("migrate")
+
+
+async def main():
+    """Same schema setup the API runs on startup, for deploys that migrate before starting it."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        applied = await run_migrations(conn)
+        applied += await sync_vector_storage(conn)
+        applied += [f"partitioned {table}" for table in await partition_tables(conn)]
+    await engine.dispose()
+    logger.info(f"Applied {len(applied)} migrations: {', '.join(applied)}" if applied else "Schema is up to date")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+import sys
+import os
+import logging
+import argparse
+import importlib.util
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+
+from app.config import settings
+
+logger = logging.getLogger("serve")
+
+
+def server_options(workers: int, reload: bool) -> dict:
+    """
+    uvicorn options for the API. Production runs several worker processes on
+    uvloop and httptools (falling back to the pure-Python implementations if
+    they are not installed); --reload implies a single process.
+    """
+    has_uvloop = importlib.util.find_spec("uvloop") is not None
+    has_httptools = importlib.util.find_spec("httptools") is not None
+    if not (has_uvloop and has_httptools):
+        logger.warning("uvloop/httptools not installed; using the asyncio loop and h11")
+    return {
+        "workers": 1 if reload else max(1, workers),
+        "reload": reload,
+        "loop": "uvloop" if has_uvloop else "asyncio",
+        "http": "httptools" if has_httptools else "h11",
+        # Behind the HTTPS reverse proxy
+        "proxy_headers": True,
+        "forwarded_allow_ips": "*",
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s",
+    )
+    parser = argparse.ArgumentParser(description="Run the Nuze API server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY,
+                        help="Worker processes (default: WEB_CONCURRENCY)")
+    parser.add_argument("--reload", action="store_true", help="Development mode: one process, reload on code changes")
+    args = parser.parse_args()
+
+    options = server_options(args.workers, args.reload)
+    logger.info(f"Serving on {args.host}:{args.port} with {options['workers']} workers "
+                f"({options['loop']}, {options['http']})")
+    uvicorn.run("app.main:app", host=args.host, port=args.port, **options)
@@ -0,0 +1,77 @@
+import asyncio
+import sys
+import os
+import json
+import random
+import logging
+import argparse
+from sqlalchemy.future import select
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.article import Article
+from app.services.preclassifier import PreClassifier, evaluate, usable_labels
+
+logger = logging.getLogger("train_preclassifier")
+
+
+async def load_labelled_articles(limit: int = None):
+    """Fetches (content, LLM classification) pairs from the articles table."""
+    async with AsyncSessionLocal() as db:
+        query = select(Article.content, Article.metadata_).where(Article.metadata_.is_not(None))
+        query = query.order_by(Article.scraped_at.desc())
+        if limit:
+            query = query.limit(limit)
+        result = await db.execute(query)
+        rows = result.all()
+    return [row[0] for row in rows], [row[1] for row in rows]
+
+
+async def main(args):
+    texts, labels = await load_labelled_articles(args.limit)
+    texts, labels = usable_labels(texts, labels)
+    logger.info(f"Loaded {len(texts)} articles with valid LLM labels")
+
+    # Hold out a random share for the agreement report
+    indices = list(range(len(texts)))
+    random.Random(args.seed).shuffle(indices)
+    split = int(len(indices) * (1 - args.holdout))
+    train_idx, test_idx = indices[:split], indices[split:]
+
+    model = PreClassifier.train([texts[i] for i in train_idx], [labels[i] for i in train_idx])
+    logger.info(f"Trained on {model.n_samples} articles, {len(model.entities)} known entities")
+
+    report = evaluate(model, [texts[i] for i in test_idx], [labels[i] for i in test_idx], args.min_confidence)
+    print(json.dumps(report, indent=2))
+
+    if args.dry_run:
+        logger.info("Dry run: model not saved")
+        return
+
+    # Retrain on everything for the deployed model; the report above is the holdout estimate
+    if test_idx:
+        model = PreClassifier.train(texts, labels)
+    model.save(args.output)
+    logger.info(f"Saved pre-classifier to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the local pre-classifier on stored LLM classifications")
+    parser.add_argument("--output", default=settings.PRECLASSIFIER_MODEL_PATH, help="Where to write the model")
+    parser.add_argument("--limit", type=int, default=None, help="Use only the N most recent articles")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of articles held out for the report")
+    parser.add_argument("--min-confidence", type=float, default=settings.PRECLASSIFIER_MIN_CONFIDENCE,
+                        help="Confidence at which the report counts an article as accepted")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dry-run", action="store_true", help="Print the agreement report without saving")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    asyncio.run(main(args))
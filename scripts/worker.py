@@ -0,0 +1,73 @@
+import asyncio
+import signal
+import sys
+import os
+import logging
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.job_worker import JobWorker
+from app.services.ingestion_service import IngestionService
+from scripts.daily_cluster import ClusterService
+
+logger = logging.getLogger("worker")
+
+KINDS = ("classify", "combine")
+
+
+async def build_handlers(kinds):
+    """Job handlers for `kinds`, with their models loaded and prompt prefixes prefilled."""
+    handlers = {}
+    if "classify" in kinds:
+        ingestion = IngestionService()
+        await ingestion._load_near_duplicate_index()
+        await ingestion.gateway.warm_up(
+            ingestion.MODEL_NAME, prefix=ingestion.PROMPT_TEMPLATE.split("{article_text}")[0]
+        )
+        handlers["classify"] = ingestion.classify_job
+    if "combine" in kinds:
+        cluster = ClusterService()
+        await cluster.gateway.warm_up(cluster.MODEL_NAME, prefix=cluster.PROMPT_PREFIX)
+        handlers["combine"] = cluster.combine_job
+    return handlers
+
+
+async def main(args):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        # Finish the running jobs, then exit; unfinished ones are requeued by other workers
+        loop.add_signal_handler(sig, stop.set)
+
+    worker = JobWorker(
+        await build_handlers(args.kinds),
+        worker_id=args.worker_id,
+        concurrency=args.concurrency,
+        heartbeat_interval=settings.JOB_HEARTBEAT_SECONDS,
+        stale_after=settings.JOB_STALE_SECONDS,
+    )
+    await worker.run(stop, drain=args.drain)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process queued classify/combine jobs (run one or more per node)")
+    parser.add_argument("--kinds", default=",".join(KINDS), help="Comma-separated job kinds to process")
+    parser.add_argument("--concurrency", type=int, default=settings.WORKER_CONCURRENCY,
+                        help="Jobs run at once (match the Ollama host's parallel slots)")
+    parser.add_argument("--worker-id", default=None, help="Defaults to host:pid")
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    args = parser.parse_args()
+    args.kinds = [k.strip() for k in args.kinds.split(",") if k.strip()]
+    unknown = set(args.kinds) - set(KINDS)
+    if unknown:
+        parser.error(f"Unknown job kinds: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    asyncio.run(main(args))
@@ -3,12 +3,20 @@ import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from app.database import Base, get_db
+from sqlalchemy import event
+from app.database import Base, get_db, _register_codecs
 from app.main import app
 from app.config import settings
 import asyncio
 from sqlalchemy import text
 
+@pytest.fixture(autouse=True)
+def llm_call_log(tmp_path, monkeypatch):
+    # Keep the per-call LLM log out of the working tree
+    path = tmp_path / "llm_calls.jsonl"
+    monkeypatch.setattr(settings, "LLM_CALL_LOG_PATH", str(path))
+    return path
+
 # Use a separate test database to avoid wiping production data
 TEST_DATABASE_URL = settings.DATABASE_URL.replace("/news_db", "/news_db_test")
 
@@ -16,12 +24,14 @@ TEST_DATABASE_URL = settings.DATABASE_URL.replace("/news_db", "/news_db_test")
 async def db_session():
     # Create engine per test to avoid loop issues
     engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+    # Same binary vector codec as the app's engines
+    event.listen(engine.sync_engine, "connect", _register_codecs)
     TestingSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
     # Create tables
     async with engine.begin() as conn:
         # Drop tables with CASCADE to handle dependencies
-        tables = ["daily_summaries", "user_interactions", "synthesized_sources", "synthesized_articles", "article_reads", "articles", "users"]
+        tables = ["cluster_snapshots", "jobs", "job_runs", "daily_summaries", "user_interaction_keys", "user_interactions", "article_urls", "synthesized_sources", "synthesized_articles", "article_reads", "articles", "users"]
         for table in tables:
             await conn.execute(text(f"DROP TABLE IF EXISTS {table} CASCADE"))
 
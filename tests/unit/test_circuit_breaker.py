@@ -0,0 +1,89 @@
+"""Unit tests for the circuit breaker."""
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker state transitions"""
+
+    def test_opens_after_consecutive_failures(self):
+        """Opens once the failure threshold is reached and refuses calls."""
+        from app.services.circuit_breaker import CircuitBreaker
+
+        breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30, clock=FakeClock())
+
+        breaker.record_failure(ConnectionError())
+        breaker.record_failure(ConnectionError())
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        breaker.record_failure(ConnectionError())
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request() is False
+        assert breaker.stats()["rejected"] == 1
+        assert breaker.retry_after() == 30
+
+    def test_success_resets_failure_count(self):
+        """Failures must be consecutive to open the circuit."""
+        from app.services.circuit_breaker import CircuitBreaker
+
+        breaker = CircuitBreaker("test", failure_threshold=2, clock=FakeClock())
+
+        breaker.record_failure(ConnectionError())
+        breaker.record_success()
+        breaker.record_failure(ConnectionError())
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_allows_single_probe(self):
+        """After the reset timeout only one probe is let through."""
+        from app.services.circuit_breaker import CircuitBreaker
+
+        clock = FakeClock()
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30, clock=clock)
+        breaker.record_failure(ConnectionError())
+
+        clock.now = 31
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request() is True
+        assert breaker.allow_request() is False
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request() is True
+
+    def test_failed_probe_reopens(self):
+        """A failed probe opens the circuit for another reset timeout."""
+        from app.services.circuit_breaker import CircuitBreaker
+
+        clock = FakeClock()
+        breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout=30, clock=clock)
+        for _ in range(5):
+            breaker.record_failure(ConnectionError())
+
+        clock.now = 31
+        assert breaker.allow_request() is True
+        breaker.record_failure(TimeoutError())
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.retry_after() == 30
+        assert breaker.stats()["times_opened"] == 2
+
+    def test_ignored_outcome_frees_probe(self):
+        """A cancelled probe lets the next call probe instead."""
+        from app.services.circuit_breaker import CircuitBreaker
+
+        clock = FakeClock()
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30, clock=clock)
+        breaker.record_failure(ConnectionError())
+        clock.now = 31
+
+        assert breaker.allow_request() is True
+        breaker.record_ignored()
+        assert breaker.allow_request() is True
@@ -0,0 +1,422 @@
+"""Unit tests for the clustering engine."""
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+SPORTS = [0, 0, 0, 0, 0, 0, 0, 5, 0, 0]
+POLITICS = [5, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+
+
+def _article(vector, hours_ago=0, entities=None):
+    article = MagicMock()
+    article.id = uuid.uuid4()
+    article.category_scores = vector
+    article.metadata_ = {"Named Entities": entities} if entities is not None else None
+    article.published_at = datetime(2026, 1, 5, 12) - timedelta(hours=hours_ago)
+    return article
+
+
+class TestClusterState:
+    """Tests for incremental ClusterState"""
+
+    def test_first_run_seeds_clusters(self):
+        """Without previous state every article seeds a cluster."""
+        from app.services.clustering import ClusterState
+
+        state = ClusterState(target_size=2)
+        changed = state.assign(["a", "b", "c", "d"], [SPORTS, SPORTS, POLITICS, POLITICS])
+
+        clusters = state.clusters()
+        assert len(changed) == 2
+        assert sorted(sorted(members) for members in clusters.values()) == [["a", "b"], ["c", "d"]]
+
+    def test_new_articles_join_nearest_cluster(self):
+        """Only the cluster that receives new articles is reported as changed."""
+        from app.services.clustering import ClusterState
+
+        state = ClusterState(target_size=2)
+        state.assign(["a", "b", "c", "d"], [SPORTS, SPORTS, POLITICS, POLITICS])
+        sports_label = state.members["a"]
+
+        changed = state.assign(["a", "e"], [SPORTS, [0, 0, 0, 0, 0, 0, 0, 4.8, 0.2, 0]])
+
+        assert changed == {sports_label}
+        assert state.members["e"] == sports_label
+        assert state.counts[sports_label] == 3
+
+    def test_outliers_seed_new_clusters(self):
+        """Articles far from every centroid start a new cluster."""
+        from app.services.clustering import ClusterState
+
+        state = ClusterState(target_size=5)
+        state.assign(["a"], [SPORTS])
+
+        changed = state.assign(["b"], [POLITICS])
+
+        assert state.members["b"] in changed
+        assert state.members["b"] != state.members["a"]
+
+    def test_retain_drops_expired_articles_and_clusters(self):
+        """Articles leaving the window are forgotten with their empty clusters."""
+        from app.services.clustering import ClusterState
+
+        state = ClusterState(target_size=5)
+        state.assign(["a", "b"], [SPORTS, POLITICS])
+        state.retain({"a"})
+
+        assert list(state.members) == ["a"]
+        assert list(state.centroids) == [state.members["a"]]
+
+    def test_save_and_load(self):
+        """State round-trips through its JSON document."""
+        import json
+        from app.services.clustering import ClusterState
+
+        state = ClusterState(target_size=2)
+        state.assign(["a", "b", "c"], [SPORTS, SPORTS, POLITICS])
+
+        loaded = ClusterState.from_dict(json.loads(json.dumps(state.to_dict())))
+        assert loaded.members == state.members
+        assert loaded.next_label == state.next_label
+        assert ClusterState.from_dict(None).members == {}
+
+
+class TestBalancedGroups:
+    """Tests for size-balanced grouping"""
+
+    def test_groups_respect_size_and_similarity(self):
+        """Groups stay within the size bounds and above the similarity floor."""
+        import numpy as np
+        from app.services.clustering import balanced_groups, cosine_similarity_matrix
+
+        vectors = [SPORTS] * 7 + [POLITICS] * 3 + [[0, 0, 5, 0, 0, 0, 0, 0, 0, 0]]
+        similarity = cosine_similarity_matrix(vectors)
+        groups, leftovers = balanced_groups(similarity, min_size=3, max_size=5, min_similarity=0.9)
+
+        assert sorted(len(g) for g in groups) == [3, 5]
+        assert all(similarity[np.ix_(g, g)].min() >= 0.9 for g in groups)
+        # Two sports articles cannot form a group of 3; the lone science story is incoherent
+        assert len(leftovers) == 3
+        assert 10 in leftovers
+
+    def test_complete_linkage(self):
+        """A chain of pairwise-similar items is not merged end to end."""
+        import numpy as np
+        from app.services.clustering import balanced_groups
+
+        similarity = np.array([
+            [1.0, 0.95, 0.95, 0.5],
+            [0.95, 1.0, 0.95, 0.95],
+            [0.95, 0.95, 1.0, 0.5],
+            [0.5, 0.95, 0.5, 1.0],
+        ])
+        groups, leftovers = balanced_groups(similarity, min_size=3, max_size=5, min_similarity=0.9)
+
+        assert [sorted(g) for g in groups] == [[0, 1, 2]]
+        assert leftovers == [3]
+
+    def test_group_cohesion(self):
+        """Cohesion is the mean off-diagonal similarity."""
+        import numpy as np
+        from app.services.clustering import group_cohesion
+
+        similarity = np.array([[1.0, 0.8], [0.8, 1.0]])
+        assert group_cohesion(similarity, [0, 1]) == pytest.approx(0.8)
+        assert group_cohesion(similarity, [0]) == 1.0
+
+
+class TestEntityIndex:
+    """Tests for the inverted entity index and entity-aware similarity"""
+
+    def test_similarity_is_idf_weighted_jaccard(self):
+        """Shared rare entities count; entities most articles mention do not."""
+        from app.services.clustering import EntityIndex
+
+        index = EntityIndex(max_share=0.5, min_common_count=1)
+        index.add("a", {"lakers", "celtics", "usa"})
+        index.add("b", {"lakers", "celtics", "usa"})
+        index.add("c", {"yankees", "usa"})
+        index.add("d", {"red sox", "usa"})
+
+        similarity, has_entities = index.similarity_matrix(["a", "b", "c", "d"])
+        assert similarity[0, 1] == pytest.approx(1.0)
+        assert similarity[0, 2] == 0.0
+        assert similarity[2, 3] == 0.0
+        assert has_entities.tolist() == [True, True, True, True]
+
+    def test_readding_replaces_entities(self):
+        """Updating an article's entities removes its old postings."""
+        from app.services.clustering import EntityIndex
+
+        index = EntityIndex()
+        index.add("a", {"lakers"})
+        index.add("b", {"lakers"})
+        index.add("b", {"nasa"})
+
+        similarity, has_entities = index.similarity_matrix(["a", "b", "missing"])
+        assert similarity[0, 1] == 0.0
+        assert has_entities.tolist() == [True, True, False]
+
+    def test_entity_aware_similarity(self):
+        """Disjoint entities veto a pair; shared ones boost it; no entities fall back to vectors."""
+        import numpy as np
+        from app.services.clustering import entity_aware_similarity
+
+        vector = np.full((3, 3), 0.88)
+        entity = np.array([[1.0, 0.5, 0.0], [0.5, 1.0, 0.0], [0.0, 0.0, 1.0]])
+        has_entities = np.array([True, True, False])
+
+        combined = entity_aware_similarity(vector, entity, has_entities, entity_weight=0.2, min_entity_similarity=0.1)
+        assert combined[0, 1] == pytest.approx(0.98)
+        assert combined[0, 2] == pytest.approx(0.88)
+
+        entity[0, 1] = entity[1, 0] = 0.0
+        combined = entity_aware_similarity(vector, entity, has_entities, entity_weight=0.2, min_entity_similarity=0.1)
+        assert combined[0, 1] == 0.0
+
+    def test_group_balanced_separates_stories_with_same_profile(self, monkeypatch):
+        """Two games with identical category scores are not merged into one group."""
+        from app.config import settings
+        from scripts.daily_cluster import ClusterService
+
+        monkeypatch.setattr(settings, "CLUSTER_MIN_SIZE", 2)
+        monkeypatch.setattr(settings, "CLUSTER_MAX_SIZE", 4)
+        service = ClusterService()
+        lakers = [_article(SPORTS, h, ["Lakers", "Celtics"]) for h in range(2)]
+        yankees = [_article(SPORTS, h, ["Yankees", "Red Sox"]) for h in range(2)]
+
+        assert len(service.group_balanced(lakers + yankees, entity_aware=False)) == 1
+        groups = service.group_balanced(lakers + yankees, entity_aware=True)
+        assert {frozenset(g) for g in groups} == {frozenset(a.id for a in lakers), frozenset(a.id for a in yankees)}
+
+
+class TestGroupIncrementally:
+    """Tests for ClusterService.group_incrementally"""
+
+    @pytest.mark.asyncio
+    async def test_only_changed_clusters_are_regrouped(self, db_session, monkeypatch):
+        """A second run only groups the new articles of the clusters they joined."""
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from app.config import settings
+        from scripts.daily_cluster import ClusterService
+
+        monkeypatch.setattr(settings, "CLUSTER_MIN_SIZE", 1)
+        monkeypatch.setattr(settings, "CLUSTER_MAX_SIZE", 2)
+        service = ClusterService()
+
+        first = [_article(SPORTS, 3), _article(SPORTS, 2), _article(POLITICS, 3), _article(POLITICS, 2)]
+        groups = await service.group_incrementally(db_session, first, first, num=2)
+        assert sorted(len(g) for g in groups) == [2, 2]
+
+        # Next run, by another process (another node): first batch synthesized,
+        # one new sports article arrives
+        new_sports = _article(SPORTS, 0)
+        async with AsyncSession(db_session.bind) as other_session:
+            groups = await ClusterService().group_incrementally(
+                other_session, first + [new_sports], [new_sports], num=2
+            )
+
+        assert groups == [[new_sports.id]]
+
+    @pytest.mark.asyncio
+    async def test_pending_articles_are_regrouped_until_synthesized(self, db_session, monkeypatch):
+        """Articles still pending on the next run are grouped again though their cluster did not change."""
+        from app.config import settings
+        from scripts.daily_cluster import ClusterService
+
+        monkeypatch.setattr(settings, "CLUSTER_MIN_SIZE", 2)
+        monkeypatch.setattr(settings, "CLUSTER_MAX_SIZE", 4)
+        service = ClusterService()
+
+        pending = [_article(SPORTS, h) for h in range(4)]
+        first = await service.group_incrementally(db_session, pending, pending, num=4)
+        # Nothing was synthesized (crash, failed synthesis): same pending articles, no new ones
+        second = await service.group_incrementally(db_session, pending, pending, num=4)
+
+        assert first == [[a.id for a in pending]]
+        assert second == first
+
+
+class TestPipelineStages:
+    """Tests for the article stages ClusterService records"""
+
+    @pytest.mark.asyncio
+    async def test_mark_clustered_keeps_failed_attempts(self):
+        """Grouped classified articles become clustered; failed ones keep their attempt count."""
+        from unittest.mock import AsyncMock
+        from app.models.article import Article, ArticleStage
+        from scripts.daily_cluster import ClusterService
+
+        fresh = Article(id=uuid.uuid4(), stage=ArticleStage.CLASSIFIED, stage_attempts=0)
+        failed = Article(id=uuid.uuid4(), stage=ArticleStage.SYNTHESIZE_FAILED, stage_attempts=1)
+        leftover = Article(id=uuid.uuid4(), stage=ArticleStage.CLASSIFIED, stage_attempts=0)
+        db = AsyncMock()
+
+        await ClusterService().mark_clustered(db, [fresh, failed, leftover], [[fresh.id, failed.id]])
+
+        assert fresh.stage == ArticleStage.CLUSTERED
+        assert (failed.stage, failed.stage_attempts) == (ArticleStage.SYNTHESIZE_FAILED, 1)
+        assert leftover.stage == ArticleStage.CLASSIFIED
+        db.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_mark_failed_counts_attempts(self):
+        """A failed synthesis is recorded with its attempt count for later retries."""
+        from unittest.mock import AsyncMock
+        from app.models.article import Article, ArticleStage
+        from scripts.daily_cluster import ClusterService
+
+        article = Article(id=uuid.uuid4(), stage=ArticleStage.CLUSTERED, stage_attempts=0)
+        service = ClusterService()
+        db = AsyncMock()
+
+        await service.mark_failed(db, [article], "timeout")
+        await service.mark_failed(db, [article], "timeout")
+
+        assert article.stage == ArticleStage.SYNTHESIZE_FAILED
+        assert article.stage_attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_enqueue_combine_payload(self, monkeypatch):
+        """Queued groups carry their near-duplicate copies and the story they continue."""
+        from unittest.mock import AsyncMock
+        from app.services import job_queue
+        from scripts.daily_cluster import ClusterService
+
+        enqueue = AsyncMock(return_value=True)
+        monkeypatch.setattr(job_queue, "enqueue", enqueue)
+        service = ClusterService()
+        first, second, twin = _article(SPORTS), _article(SPORTS), _article(SPORTS)
+        service.twins = {first.id: [twin]}
+        story = MagicMock(id=uuid.uuid4())
+        db = AsyncMock()
+
+        await service.enqueue_combine(db, [first, second], story)
+        await service.enqueue_combine(db, [second, first], story)
+
+        (_, kind, payload), kwargs = enqueue.call_args_list[0]
+        assert kind == "combine"
+        assert payload["article_ids"] == [str(first.id), str(second.id)]
+        assert payload["twins"] == {str(first.id): [str(twin.id)]}
+        assert payload["story_id"] == str(story.id)
+        # The same group enqueued twice maps to one job
+        assert enqueue.call_args_list[1].kwargs["dedupe_key"] == kwargs["dedupe_key"]
+
+
+class TestResumeAfterCrash:
+    """Tests for resuming the clustering pipeline where a crashed run stopped"""
+
+    @pytest.mark.asyncio
+    async def test_next_run_synthesizes_articles_a_crashed_run_clustered(self, db_session, monkeypatch):
+        """Articles left clustered by a run that died before synthesis are synthesized by the next run."""
+        from unittest.mock import AsyncMock
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.future import select
+        from sqlalchemy.orm import sessionmaker
+        from app.config import settings
+        from app.models.article import Article, ArticleStage
+        import scripts.daily_cluster as daily_cluster
+
+        monkeypatch.setattr(daily_cluster, "AsyncSessionLocal",
+                            sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False))
+        monkeypatch.setattr(settings, "CLUSTER_INCREMENTAL", True)
+        monkeypatch.setattr(settings, "CLUSTER_MIN_SIZE", 2)
+        monkeypatch.setattr(settings, "CLUSTER_MAX_SIZE", 4)
+        monkeypatch.setattr(settings, "STORY_TRACKING", False)
+        monkeypatch.setattr(settings, "JOB_QUEUE_ENABLED", False)
+
+        now = datetime.now().astimezone()
+        articles = [
+            Article(id=uuid.uuid4(), title=f"Game {i}", content=f"Report {i}: " + " ".join(str(i * n) for n in range(60)),
+                    published_at=now - timedelta(hours=i), category_scores=SPORTS, stage=ArticleStage.CLASSIFIED)
+            for i in range(4)
+        ]
+        db_session.add_all(articles)
+        await db_session.commit()
+        ids = {a.id for a in articles}
+
+        def service(process_cluster):
+            cluster_service = daily_cluster.ClusterService()
+            cluster_service.gateway = MagicMock(warm_up=AsyncMock())
+            cluster_service.process_cluster = process_cluster
+            return cluster_service
+
+        # First run dies right after recording the groups
+        with pytest.raises(RuntimeError):
+            await service(AsyncMock(side_effect=RuntimeError("worker killed"))).run_daily_clustering()
+        result = await db_session.execute(select(Article.stage).where(Article.id.in_(ids)))
+        assert set(result.scalars().all()) == {ArticleStage.CLUSTERED}
+
+        # Next run (new process, same cluster state file) picks the group up again
+        process_cluster = AsyncMock()
+        await service(process_cluster).run_daily_clustering()
+
+        synthesized = {a.id for call in process_cluster.await_args_list for a in call.args[1]}
+        assert synthesized == ids
+
+
+class TestCombineJobs:
+    """Tests for ClusterService.combine_job as run by the queue workers"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_jobs_link_their_own_twins(self, db_session, monkeypatch):
+        """Two combine jobs running at once on one service each link and finish their own near-duplicates."""
+        import asyncio
+        import json
+        from unittest.mock import AsyncMock
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.future import select
+        from sqlalchemy.orm import sessionmaker
+        from app.models.article import Article, ArticleStage
+        from app.models.synthesized_article import SynthesizedSource
+        from app.services.llm_validator import CATEGORIES
+        import scripts.daily_cluster as daily_cluster
+
+        monkeypatch.setattr(daily_cluster, "AsyncSessionLocal",
+                            sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False))
+
+        groups = []
+        for i in range(2):
+            rep, twin = (Article(id=uuid.uuid4(), title=f"Game {i}", content=f"Report {i}",
+                                 category_scores=SPORTS, stage=ArticleStage.CLASSIFIED) for _ in range(2))
+            db_session.add_all([rep, twin])
+            groups.append((rep.id, twin.id))
+        await db_session.commit()
+
+        analysis = {cat: 0.0 for cat in CATEGORIES}
+        analysis.update({"Sports": 5.0, "Length": 0.5, "Complexity": 0.4,
+                         "Tone": {"Neutral": 0.8, "Informative": 0.9, "Emotional": 0.2},
+                         "Content_type": "News", "Named Entities": []})
+        response = MagicMock()
+        response.message.content = json.dumps({
+            "articles_combined": 1, "combined_indices": [1], "title": "Game",
+            "generated_article": "The game was played.", "analysis": analysis,
+        })
+        # Both jobs are waiting on the combiner before either gets its answer
+        waiting, both_waiting = [], asyncio.Event()
+
+        async def chat(**kwargs):
+            waiting.append(kwargs)
+            if len(waiting) == 2:
+                both_waiting.set()
+            await both_waiting.wait()
+            return response
+
+        service = daily_cluster.ClusterService()
+        service.gateway = MagicMock(chat=AsyncMock(side_effect=chat))
+
+        await asyncio.gather(*(
+            service.combine_job({"article_ids": [str(rep)], "twins": {str(rep): [str(twin)]}, "story_id": None})
+            for rep, twin in groups
+        ))
+
+        result = await db_session.execute(select(SynthesizedSource.synthesized_id, SynthesizedSource.article_id))
+        sources = {}
+        for synthesized_id, article_id in result.all():
+            sources.setdefault(synthesized_id, set()).add(article_id)
+        assert sorted(map(sorted, sources.values())) == sorted(sorted(group) for group in groups)
+
+        result = await db_session.execute(select(Article.stage).execution_options(populate_existing=True))
+        assert set(result.scalars().all()) == {ArticleStage.SYNTHESIZED}
+        assert service.story_stats["created"] == 2
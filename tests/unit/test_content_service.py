@@ -0,0 +1,42 @@
+"""Unit tests for ContentService."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.services.content_service import ContentService
+
+
+class TestIngestArticle:
+    """Tests for ContentService.ingest_article"""
+
+    @pytest.mark.asyncio
+    @patch('app.services.content_service.NLPService')
+    async def test_concurrent_ingests_of_one_url_store_one_article(self, mock_nlp_class, db_session):
+        """The same URL ingested twice at once is stored once; the second call returns None."""
+        from sqlalchemy import func, text
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.future import select
+        from app.models.article import Article
+
+        mock_nlp_class.return_value.classify_article = AsyncMock(return_value=[0.1] * 10)
+        url = "http://example.com/story"
+
+        sessions = [AsyncSession(db_session.bind, expire_on_commit=False) for _ in range(2)]
+        try:
+            # Connected up front, so the two calls interleave statement by statement
+            for session in sessions:
+                await session.execute(text("SELECT 1"))
+            results = await asyncio.gather(*(
+                ContentService(session).ingest_article("Story", "Content", url, "Example")
+                for session in sessions
+            ))
+        finally:
+            for session in sessions:
+                await session.close()
+
+        assert sum(result is not None for result in results) == 1
+        count = await db_session.execute(select(func.count()).select_from(Article).where(Article.source_url == url))
+        assert count.scalar() == 1
+
+        # Later ingests see the stored article
+        assert await ContentService(db_session).ingest_article("Story", "Content", url, "Example") is None
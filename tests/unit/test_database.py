@@ -0,0 +1,75 @@
+"""Unit tests for engine configuration, pool metrics and read routing."""
+import pytest
+from unittest.mock import AsyncMock
+
+
+class TestEnginePool:
+    """Tests for app.database engine setup"""
+
+    def test_pool_settings_applied(self):
+        """The primary engine uses the configured pool size and overflow."""
+        from app.config import settings
+        from app.database import engine
+
+        assert engine.pool.size() == settings.DB_POOL_SIZE
+        assert engine.pool._max_overflow == settings.DB_MAX_OVERFLOW
+        assert engine.pool._pre_ping == settings.DB_POOL_PRE_PING
+
+    @pytest.mark.asyncio
+    async def test_checkout_wait_is_recorded(self):
+        """Every checkout attempt is timed, including ones that fail to connect."""
+        from app import database
+
+        test_engine = database._create_engine("postgresql+asyncpg://u:p@127.0.0.1:9/none", "test")
+        try:
+            with pytest.raises(Exception):
+                async with test_engine.connect():
+                    pass
+        finally:
+            await test_engine.dispose()
+
+        waits = database._pool_waits["test"]
+        assert waits["count"] == 1
+        assert waits["total"] > 0
+
+    def test_pool_stats(self, monkeypatch):
+        """Stats report occupancy and average/max wait per engine."""
+        from app import database
+
+        monkeypatch.setattr(database, "_pool_waits", {})
+        database._record_wait("primary", 0.002)
+        database._record_wait("primary", 0.3)
+
+        stats = database.get_pool_stats()["primary"]
+        assert stats["wait_count"] == 2
+        assert stats["wait_avg_ms"] == 151.0
+        assert stats["wait_max_ms"] == 300.0
+        assert stats["waits_over_100ms"] == 1
+        assert stats["size"] == database.settings.DB_POOL_SIZE
+
+
+class TestReadRouting:
+    """Tests for routing read-only work to the replica session"""
+
+    @pytest.mark.asyncio
+    async def test_read_db_defaults_to_primary_session(self):
+        """Without a replica the request's primary session is reused."""
+        from app.database import get_read_db
+
+        db = object()
+        sessions = get_read_db(db)
+        assert await sessions.__anext__() is db
+
+    @pytest.mark.asyncio
+    async def test_summary_reads_articles_from_replica(self):
+        """Top articles come from the read session, which is released before generation."""
+        from app.services.summary_service import SummaryService
+
+        db, read_db = AsyncMock(), AsyncMock()
+        service = SummaryService(db, read_db)
+        service.feed_service.get_top_articles = AsyncMock(return_value=[])
+
+        assert service.feed_service.db is read_db
+        assert await service.generate_daily_summary("user") is None
+        read_db.commit.assert_awaited_once()
+        db.commit.assert_not_awaited()
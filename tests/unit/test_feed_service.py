@@ -143,6 +143,143 @@ class TestGetPersonalizedFeed:
         assert len(result) == 1
         assert result[0].id == unseen_id
 
+    @pytest.mark.asyncio
+    async def test_get_personalized_feed_ignores_interactions_without_article(self, db_session):
+        """An interaction without an article id does not hide anything."""
+        from app.models.user import User
+        from app.models.synthesized_article import SynthesizedArticle
+        from app.models.interaction import UserInteraction
+        from app.services.feed_service import FeedService
+
+        user_id = uuid4()
+        db_session.add(User(
+            id=user_id,
+            email=f"test_{user_id}@example.com",
+            hashed_password="hashed",
+            preferences=[0.5] * 10
+        ))
+        db_session.add(SynthesizedArticle(id=uuid4(), title="Article", content="Content", category_scores=[0.5] * 10))
+        await db_session.commit()
+        db_session.add(UserInteraction(user_id=user_id, synthesized_article_id=None))
+        await db_session.commit()
+
+        service = FeedService(db_session)
+        result = await service.get_personalized_feed(user_id)
+
+        assert len(result) == 1
+
+    @pytest.mark.asyncio
+    async def test_get_personalized_feed_reads_past_seen_head(self, db_session):
+        """A ranking head the user saw before the epoch is skipped, and skip counts unseen articles only."""
+        from datetime import timedelta
+        from app.models.user import User
+        from app.models.synthesized_article import SynthesizedArticle
+        from app.models.interaction import UserInteraction
+        from app.services.feed_service import FeedService
+
+        user_id = uuid4()
+        db_session.add(User(
+            id=user_id,
+            email=f"test_{user_id}@example.com",
+            hashed_password="hashed",
+            preferences=None
+        ))
+        now = datetime.now()
+        # The 120 newest articles were seen yesterday, the 10 oldest not
+        articles = [
+            SynthesizedArticle(id=uuid4(), title=f"Article {i}", content="Content",
+                               category_scores=[0.5] * 10, generated_at=now - timedelta(days=2, minutes=i))
+            for i in range(130)
+        ]
+        db_session.add_all(articles)
+        await db_session.commit()
+        db_session.add_all([
+            UserInteraction(user_id=user_id, synthesized_article_id=article.id, created_at=now - timedelta(days=1))
+            for article in articles[:120]
+        ])
+        await db_session.commit()
+
+        service = FeedService(db_session)
+        result = await service.get_personalized_feed(user_id, limit=5, skip=3)
+
+        assert [article.id for article in result] == [article.id for article in articles[123:128]]
+
+    @pytest.mark.asyncio
+    async def test_get_personalized_feed_pages_are_stable_within_epoch(self, db_session):
+        """Within an epoch pages repeat exactly and do not overlap; the next epoch draws anew."""
+        import numpy as np
+        from app.models.user import User
+        from app.models.synthesized_article import SynthesizedArticle
+        from app.services.feed_service import FeedService, feed_epoch
+
+        user_id = uuid4()
+        db_session.add(User(
+            id=user_id,
+            email=f"test_{user_id}@example.com",
+            hashed_password="hashed",
+            preferences=[1.0] + [0.0] * 9
+        ))
+        rng = np.random.default_rng(7)
+        db_session.add_all([
+            SynthesizedArticle(id=uuid4(), title=f"Article {i}", content="Content",
+                               category_scores=rng.random(10).tolist())
+            for i in range(80)
+        ])
+        await db_session.commit()
+
+        service = FeedService(db_session)
+        epoch = feed_epoch()
+        first = await service.get_personalized_feed(user_id, limit=10, epoch=epoch)
+        second = await service.get_personalized_feed(user_id, limit=10, skip=10, epoch=epoch)
+        across_blocks = await service.get_personalized_feed(user_id, limit=20, skip=40, epoch=epoch)
+
+        assert await service.get_personalized_feed(user_id, limit=10, epoch=epoch) == first
+        assert await service.get_personalized_feed(user_id, limit=20, epoch=epoch) == first + second
+        assert len(across_blocks) == 20
+        assert not set(first + second) & set(across_blocks)
+        assert await service.get_personalized_feed(user_id, limit=20, epoch=epoch + 1) != first + second
+
+    @pytest.mark.asyncio
+    async def test_get_personalized_feed_interactions_in_epoch_keep_pages_aligned(self, db_session):
+        """Feedback during the epoch removes the article from its page; the other pages do not shift."""
+        import numpy as np
+        from app.models.user import User
+        from app.models.synthesized_article import SynthesizedArticle
+        from app.services.feed_service import FeedService, feed_epoch
+        from app.services.feedback_service import FeedbackService
+
+        user_id = uuid4()
+        db_session.add(User(
+            id=user_id,
+            email=f"test_{user_id}@example.com",
+            hashed_password="hashed",
+            preferences=[1.0] + [0.0] * 9
+        ))
+        rng = np.random.default_rng(11)
+        db_session.add_all([
+            SynthesizedArticle(id=uuid4(), title=f"Article {i}", content="Content",
+                               category_scores=rng.random(10).tolist())
+            for i in range(80)
+        ])
+        await db_session.commit()
+
+        service = FeedService(db_session)
+        epoch = feed_epoch()
+        first = await service.get_personalized_feed(user_id, limit=10, epoch=epoch)
+        second = await service.get_personalized_feed(user_id, limit=10, skip=10, epoch=epoch)
+        later = await service.get_personalized_feed(user_id, limit=10, skip=50, epoch=epoch)
+
+        # Likes and reads move the user's preferences
+        await FeedbackService(db_session).record_feedback(str(user_id), str(first[0].id), is_liked=True)
+        await FeedbackService(db_session).record_feedback(str(user_id), str(second[0].id), is_liked=None)
+        user = await db_session.get(User, user_id)
+        await db_session.refresh(user)
+        assert not np.allclose(user.preferences, [1.0] + [0.0] * 9)
+
+        assert await service.get_personalized_feed(user_id, limit=10, epoch=epoch) == first[1:]
+        assert await service.get_personalized_feed(user_id, limit=10, skip=10, epoch=epoch) == second[1:]
+        assert await service.get_personalized_feed(user_id, limit=10, skip=50, epoch=epoch) == later
+
     @pytest.mark.asyncio
     async def test_get_personalized_feed_pagination(self, db_session):
         """Tests skip/limit parameters."""
@@ -199,6 +336,31 @@ class TestGetPersonalizedFeed:
 
         assert result == []
 
+    @pytest.mark.asyncio
+    async def test_get_feed_version(self, db_session):
+        """The feed version follows the user's preferences and the newest article in the window."""
+        from datetime import timedelta, timezone
+        from app.models.user import User
+        from app.models.synthesized_article import SynthesizedArticle
+        from app.services.feed_service import FeedService, feed_epoch
+
+        user_id = uuid4()
+        db_session.add(User(id=user_id, email=f"test_{user_id}@example.com", hashed_password="hashed"))
+        await db_session.commit()
+
+        service = FeedService(db_session)
+        epoch = feed_epoch()
+        assert await service.get_feed_version(user_id, epoch) == (0, None)
+
+        newest = datetime.now(timezone.utc)
+        db_session.add(SynthesizedArticle(id=uuid4(), title="Old", content="c", generated_at=newest - timedelta(days=400)))
+        db_session.add(SynthesizedArticle(id=uuid4(), title="New", content="c", generated_at=newest))
+        await db_session.commit()
+        assert await service.get_feed_version(user_id, epoch) == (0, newest)
+
+        await service.user_service.update_user_preferences(user_id, [0.5] * 10)
+        assert await service.get_feed_version(user_id, epoch) == (1, newest)
+
 
 class TestGetTopArticles:
     """Tests for FeedService.get_top_articles"""
@@ -33,6 +33,64 @@ class TestRecordFeedback:
 
         assert exc_info.value.status_code == 404
 
+    @pytest.mark.asyncio
+    async def test_concurrent_first_interactions_store_one_row(self, db_session):
+        """Two simultaneous likes of the same article keep one interaction, which later feedback updates."""
+        import asyncio
+        from sqlalchemy import func, text
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.future import select
+        from app.models.user import User
+        from app.models.synthesized_article import SynthesizedArticle
+        from app.models.interaction import UserInteraction
+
+        user_id, article_id = uuid4(), uuid4()
+        db_session.add(User(id=user_id, email=f"test_{user_id}@example.com", hashed_password="hashed",
+                            preferences=[0.5] * 10))
+        db_session.add(SynthesizedArticle(id=article_id, title="Story", content="c", category_scores=[0.5] * 10))
+        await db_session.commit()
+
+        sessions = [AsyncSession(db_session.bind, expire_on_commit=False) for _ in range(2)]
+        try:
+            # Connected up front, so the two calls interleave statement by statement
+            for session in sessions:
+                await session.execute(text("SELECT 1"))
+            await asyncio.gather(*(
+                FeedbackService(session).record_feedback(str(user_id), str(article_id), is_liked=True)
+                for session in sessions
+            ))
+        finally:
+            for session in sessions:
+                await session.close()
+
+        count = await db_session.execute(select(func.count()).select_from(UserInteraction))
+        assert count.scalar() == 1
+
+        interaction = await FeedbackService(db_session).record_feedback(str(user_id), str(article_id), is_liked=False)
+        assert interaction.is_liked is False
+
+    @pytest.mark.asyncio
+    async def test_interaction_whose_row_was_archived_is_recorded_again(self, db_session):
+        """A key left pointing at an archived interaction moves to the new one."""
+        from sqlalchemy.future import select
+        from app.models.user import User
+        from app.models.synthesized_article import SynthesizedArticle
+        from app.models.interaction import UserInteraction, UserInteractionKey
+
+        user_id, article_id = uuid4(), uuid4()
+        db_session.add(User(id=user_id, email=f"test_{user_id}@example.com", hashed_password="hashed"))
+        db_session.add(SynthesizedArticle(id=article_id, title="Story", content="c", category_scores=[0.5] * 10))
+        await db_session.commit()
+        db_session.add(UserInteractionKey(user_id=user_id, synthesized_article_id=article_id, interaction_id=uuid4()))
+        await db_session.commit()
+
+        interaction = await FeedbackService(db_session).record_feedback(str(user_id), str(article_id), is_liked=True)
+
+        key = await db_session.execute(select(UserInteractionKey.interaction_id))
+        assert key.scalar_one() == interaction.id
+        rows = await db_session.execute(select(UserInteraction.is_liked))
+        assert rows.scalars().all() == [True]
+
 
 class TestCalculateUpdate:
     """Tests for FeedbackService._calculate_update"""
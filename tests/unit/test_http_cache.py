@@ -0,0 +1,167 @@
+"""Unit tests for ETag handling and the precompressed payload cache."""
+import gzip
+import json
+import pytest
+from unittest.mock import AsyncMock
+
+
+def _request(**headers):
+    from starlette.requests import Request
+
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    from app.http_cache import payload_cache
+
+    payload_cache.clear()
+    yield
+    payload_cache.clear()
+
+
+class TestEtags:
+    """Tests for make_etag and etag_matches"""
+
+    def test_make_etag_is_strong_and_stable(self):
+        """ETags are quoted, not weak, and depend only on the versions given."""
+        from app.http_cache import make_etag
+
+        etag = make_etag("summary", "user", 1, "completed")
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag == make_etag("summary", "user", 1, "completed")
+        assert etag != make_etag("summary", "user", 1, "pending")
+        assert etag != make_etag("summary", "other", 1, "completed")
+
+    def test_make_etag_changes_with_the_build(self, monkeypatch):
+        """A deploy gets new ETags for the same versions, so clients refetch the new shape."""
+        from app.config import settings
+        from app.http_cache import build_version, make_etag
+
+        monkeypatch.setattr(settings, "BUILD_VERSION", "")
+        build_version.cache_clear()
+        # Without BUILD_VERSION, the app's source files seed the tags
+        assert len(build_version()) == 16
+        from_sources = make_etag("feed", "user", 1)
+
+        monkeypatch.setattr(settings, "BUILD_VERSION", "build-1")
+        build_version.cache_clear()
+        first = make_etag("feed", "user", 1)
+        monkeypatch.setattr(settings, "BUILD_VERSION", "build-2")
+        build_version.cache_clear()
+        second = make_etag("feed", "user", 1)
+        build_version.cache_clear()
+
+        assert len({from_sources, first, second}) == 3
+
+    def test_etag_matches(self):
+        """If-None-Match lists, weak validators and * match; others do not."""
+        from app.http_cache import etag_matches
+
+        assert etag_matches('"a"', '"a"')
+        assert etag_matches('"b", W/"a"', '"a"')
+        assert etag_matches("*", '"a"')
+        assert not etag_matches('"b"', '"a"')
+        assert not etag_matches(None, '"a"')
+
+
+class TestPayloadCache:
+    """Tests for PayloadCache"""
+
+    def test_evicts_least_recently_used(self):
+        """Past max_bytes the entry used longest ago goes first."""
+        from app.http_cache import PayloadCache
+
+        cache = PayloadCache(max_bytes=10)
+        cache.put("a", b"xxxx")
+        cache.put("b", b"xxxx")
+        assert cache.get("a") == b"xxxx"
+        cache.put("c", b"xxxx")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == b"xxxx" and cache.get("c") == b"xxxx"
+        assert cache.size == 8
+
+    def test_skips_bodies_larger_than_the_cache(self):
+        """A body that can never fit is not stored (and evicts nothing)."""
+        from app.http_cache import PayloadCache
+
+        cache = PayloadCache(max_bytes=10)
+        cache.put("a", b"xxxx")
+        cache.put("big", b"x" * 11)
+
+        assert cache.get("big") is None
+        assert len(cache) == 1
+
+
+class TestConditionalResponse:
+    """Tests for conditional_response"""
+
+    @pytest.mark.asyncio
+    async def test_not_modified_skips_build(self):
+        """A matching If-None-Match answers 304 without building the payload."""
+        from app.http_cache import conditional_response
+
+        build = AsyncMock()
+        response = await conditional_response(_request(if_none_match='"v1"'), '"v1"', build, headers={"X-Feed-Epoch": "7"})
+
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == '"v1"'
+        assert response.headers["x-feed-epoch"] == "7"
+        build.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_large_payload_is_compressed_once(self, monkeypatch):
+        """Large payloads are gzipped and cached; repeats skip build and compression."""
+        from app.config import settings
+        from app.http_cache import conditional_response, payload_cache
+
+        monkeypatch.setattr(settings, "HTTP_CACHE_MIN_BYTES", 100)
+        payload = [{"title": f"Article {i}", "content": "text " * 20} for i in range(10)]
+        build = AsyncMock(return_value=payload)
+
+        first = await conditional_response(_request(accept_encoding="gzip, deflate"), '"v1"', build)
+        second = await conditional_response(_request(accept_encoding="gzip"), '"v1"', build)
+        plain = await conditional_response(_request(), '"v1"', build)
+
+        build.assert_awaited_once()
+        assert len(payload_cache) == 1
+        assert first.headers["content-encoding"] == "gzip"
+        assert second.body == first.body
+        assert json.loads(gzip.decompress(first.body)) == payload
+        assert "content-encoding" not in plain.headers
+        assert json.loads(plain.body) == payload
+        assert plain.headers["cache-control"] == "private, no-cache"
+
+    @pytest.mark.asyncio
+    async def test_small_payload_is_not_cached(self, monkeypatch):
+        """Payloads under HTTP_CACHE_MIN_BYTES are sent as they are and rebuilt next time."""
+        from app.config import settings
+        from app.http_cache import conditional_response, payload_cache
+
+        monkeypatch.setattr(settings, "HTTP_CACHE_MIN_BYTES", 100)
+        build = AsyncMock(return_value={"interests_vector": [0.5], "metadata": {}})
+
+        response = await conditional_response(_request(accept_encoding="gzip"), '"v1"', build)
+        await conditional_response(_request(accept_encoding="gzip"), '"v1"', build)
+
+        assert "content-encoding" not in response.headers
+        assert json.loads(response.body) == {"interests_vector": [0.5], "metadata": {}}
+        assert build.await_count == 2
+        assert len(payload_cache) == 0
+
+    def test_accepts_gzip(self):
+        """gzip is used when offered with a nonzero quality, directly or as *."""
+        from app.http_cache import accepts_gzip
+
+        assert accepts_gzip(_request(accept_encoding="br, gzip;q=0.5"))
+        assert accepts_gzip(_request(accept_encoding="*"))
+        assert not accepts_gzip(_request(accept_encoding="gzip;q=0"))
+        assert not accepts_gzip(_request(accept_encoding="br"))
+        assert not accepts_gzip(_request())
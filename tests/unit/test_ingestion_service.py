@@ -144,16 +144,17 @@ class TestExtractCategoryScores:
 class TestCallOllama:
     """Tests for IngestionService._call_ollama"""
 
-    def test_call_ollama_empty_text(self):
+    @pytest.mark.asyncio
+    async def test_call_ollama_empty_text(self):
         """Returns None for empty input."""
         from app.services.ingestion_service import IngestionService
 
         service = IngestionService()
 
-        result = service._call_ollama("")
+        result = await service._call_ollama("")
         assert result is None
 
-        result = service._call_ollama(None)
+        result = await service._call_ollama(None)
         assert result is None
 
 
@@ -199,3 +200,45 @@ class TestProcessArticle:
         # Should not raise
         await service.process_article(article_data)
 
+
+
+class TestEnqueuePendingClassifications:
+    """Tests for IngestionService.enqueue_pending_classifications"""
+
+    @pytest.mark.asyncio
+    async def test_requeues_articles_whose_job_failed(self, db_session, monkeypatch):
+        """Pending articles with attempts left get a new classify job once the old one failed for good."""
+        import uuid
+        from sqlalchemy import update
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.future import select
+        from sqlalchemy.orm import sessionmaker
+        from app.config import settings
+        from app.models.article import Article, ArticleStage
+        from app.models.job import Job, JobStatus
+        from app.services import ingestion_service, job_queue
+        from app.services.ingestion_service import IngestionService
+
+        monkeypatch.setattr(ingestion_service, "AsyncSessionLocal",
+                            sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False))
+        monkeypatch.setattr(settings, "STAGE_MAX_ATTEMPTS", 3)
+        failed = Article(id=uuid.uuid4(), title="a", content="c", source_url="http://example.com/a",
+                         stage=ArticleStage.CLASSIFY_FAILED, stage_attempts=1)
+        exhausted = Article(id=uuid.uuid4(), title="b", content="c", source_url="http://example.com/b",
+                            stage=ArticleStage.CLASSIFY_FAILED, stage_attempts=3)
+        classified = Article(id=uuid.uuid4(), title="c", content="c", source_url="http://example.com/c",
+                             stage=ArticleStage.CLASSIFIED)
+        db_session.add_all([failed, exhausted, classified])
+        await job_queue.enqueue(db_session, "classify", {"article_id": str(failed.id)}, dedupe_key=f"classify:{failed.id}")
+        await db_session.commit()
+
+        service = IngestionService()
+        # Its job is still queued
+        assert await service.enqueue_pending_classifications() == 0
+
+        await db_session.execute(update(Job).values(status=JobStatus.FAILED))
+        await db_session.commit()
+        assert await service.enqueue_pending_classifications() == 1
+
+        result = await db_session.execute(select(Job.payload).where(Job.status == JobStatus.QUEUED))
+        assert result.scalars().all() == [{"article_id": str(failed.id)}]
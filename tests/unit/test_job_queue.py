@@ -0,0 +1,188 @@
+"""Unit tests for the Postgres job queue and the job worker."""
+import asyncio
+import uuid
+import pytest
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+
+def _compiled(statement):
+    from sqlalchemy.dialects import postgresql
+
+    compiled = statement.compile(dialect=postgresql.dialect())
+    return str(compiled), compiled.params
+
+
+def _db():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(rowcount=1)
+    return db
+
+
+def _job(kind="classify", attempts=1, max_attempts=3):
+    return SimpleNamespace(id=uuid.uuid4(), kind=kind, payload={"n": 1}, attempts=attempts, max_attempts=max_attempts)
+
+
+class TestJobQueue:
+    """Tests for app.services.job_queue"""
+
+    @pytest.mark.asyncio
+    async def test_claim_skips_locked_rows(self):
+        """Claims lock candidate rows with SKIP LOCKED and count an attempt."""
+        from app.services.job_queue import claim
+
+        db = _db()
+        await claim(db, "worker-1", ["classify"], limit=4)
+
+        sql, params = _compiled(db.execute.call_args.args[0])
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        assert "attempts=(jobs.attempts +" in sql
+        assert params["locked_by"] == "worker-1"
+        assert params["status"] == "running"
+        db.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_enqueue_dedupes(self):
+        """Jobs with a dedupe key are inserted with ON CONFLICT DO NOTHING."""
+        from app.services.job_queue import enqueue
+
+        db = _db()
+        db.execute.return_value = MagicMock(rowcount=0)
+        assert await enqueue(db, "classify", {"article_id": "a"}, dedupe_key="classify:a") is False
+
+        sql, _ = _compiled(db.execute.call_args.args[0])
+        assert "ON CONFLICT (dedupe_key) WHERE status IN" in sql
+        assert "DO NOTHING" in sql
+
+    @pytest.mark.asyncio
+    async def test_failed_job_can_be_queued_again(self, db_session):
+        """A dedupe key blocks a second job only while the first is queued or running."""
+        from sqlalchemy import update
+        from app.models.job import Job, JobStatus
+        from app.services.job_queue import enqueue
+
+        assert await enqueue(db_session, "classify", {"article_id": "a"}, dedupe_key="classify:a") is True
+        assert await enqueue(db_session, "classify", {"article_id": "a"}, dedupe_key="classify:a") is False
+        await db_session.commit()
+
+        await db_session.execute(update(Job).values(status=JobStatus.FAILED))
+        await db_session.commit()
+        assert await enqueue(db_session, "classify", {"article_id": "a"}, dedupe_key="classify:a") is True
+        assert await enqueue(db_session, "classify", {"article_id": "a"}, dedupe_key="classify:a") is False
+
+    @pytest.mark.asyncio
+    async def test_fail_requeues_with_backoff_then_fails(self):
+        """Failed attempts go back to the queue until max_attempts is reached."""
+        from app.services.job_queue import fail, retry_delay
+
+        db = _db()
+        await fail(db, _job(attempts=1), "worker-1", "boom")
+        _, params = _compiled(db.execute.call_args.args[0])
+        assert params["status"] == "queued"
+        assert params["locked_by_1"] == "worker-1"
+
+        await fail(db, _job(attempts=3), "worker-1", "boom")
+        _, params = _compiled(db.execute.call_args.args[0])
+        assert params["status"] == "failed"
+
+        assert retry_delay(1) == timedelta(seconds=30)
+        assert retry_delay(3) == timedelta(seconds=120)
+        assert retry_delay(20) == timedelta(seconds=900)
+
+    @pytest.mark.asyncio
+    async def test_requeue_stale_only_touches_running_jobs(self):
+        """Jobs without a recent heartbeat are requeued or failed."""
+        from app.services.job_queue import requeue_stale
+
+        db = _db()
+        assert await requeue_stale(db, 90) == 1
+
+        requeue_sql, requeue_params = _compiled(db.execute.call_args_list[0].args[0])
+        assert "jobs.heartbeat_at <" in requeue_sql
+        assert requeue_params["status_1"] == "running"
+        assert requeue_params["status"] == "queued"
+        _, fail_params = _compiled(db.execute.call_args_list[1].args[0])
+        assert fail_params["status"] == "failed"
+
+
+class TestJobWorker:
+    """Tests for app.services.job_worker.JobWorker"""
+
+    def _worker(self, monkeypatch, jobs, handlers, **kwargs):
+        from app.services import job_queue
+        from app.services.job_worker import JobWorker
+
+        queue = list(jobs)
+        outcomes = {"done": [], "failed": []}
+
+        async def claim(db, worker_id, kinds, limit=1):
+            claimed = [j for j in queue if j.kind in kinds][:limit]
+            for job in claimed:
+                queue.remove(job)
+            return claimed
+
+        async def complete(db, job, worker_id):
+            outcomes["done"].append(job)
+
+        async def fail(db, job, worker_id, error):
+            outcomes["failed"].append((job, error))
+
+        monkeypatch.setattr(job_queue, "claim", claim)
+        monkeypatch.setattr(job_queue, "complete", complete)
+        monkeypatch.setattr(job_queue, "fail", fail)
+        monkeypatch.setattr(job_queue, "requeue_stale", AsyncMock(return_value=0))
+
+        session = MagicMock()
+        session.return_value.__aenter__ = AsyncMock(return_value=AsyncMock())
+        session.return_value.__aexit__ = AsyncMock(return_value=False)
+        worker = JobWorker(handlers, worker_id="w", poll_interval=0.01, session_factory=session, **kwargs)
+        return worker, outcomes
+
+    @pytest.mark.asyncio
+    async def test_drains_queue_and_records_outcomes(self, monkeypatch):
+        """Handlers that return complete the job; handlers that raise fail it."""
+        async def classify(payload):
+            if payload.get("bad"):
+                raise ValueError("invalid output")
+
+        good, bad = _job(), _job()
+        bad.payload = {"bad": True}
+        worker, outcomes = self._worker(monkeypatch, [good, bad], {"classify": classify})
+
+        await asyncio.wait_for(worker.run(drain=True), timeout=2)
+
+        assert outcomes["done"] == [good]
+        assert outcomes["failed"] == [(bad, "ValueError: invalid output")]
+        assert (worker.processed, worker.failed) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_runs_up_to_concurrency_jobs_at_once(self, monkeypatch):
+        """Jobs overlap up to the configured concurrency."""
+        running, peak = 0, 0
+
+        async def combine(payload):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        jobs = [_job(kind="combine") for _ in range(5)]
+        worker, outcomes = self._worker(monkeypatch, jobs, {"combine": combine}, concurrency=2)
+
+        await asyncio.wait_for(worker.run(drain=True), timeout=2)
+
+        assert peak == 2
+        assert len(outcomes["done"]) == 5
+
+    @pytest.mark.asyncio
+    async def test_only_claims_handled_kinds(self, monkeypatch):
+        """A worker leaves jobs of other kinds for the workers that handle them."""
+        handled = AsyncMock()
+        worker, outcomes = self._worker(monkeypatch, [_job(kind="combine")], {"classify": handled})
+
+        await asyncio.wait_for(worker.run(drain=True), timeout=2)
+
+        handled.assert_not_awaited()
+        assert outcomes["done"] == []
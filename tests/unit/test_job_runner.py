@@ -0,0 +1,143 @@
+"""Unit tests for the warm in-process job runner."""
+import asyncio
+import time
+import pytest
+
+
+def _test_worker(conn):
+    """Worker entry point with cheap jobs instead of ingestion and clustering."""
+    from app.services import job_runner
+
+    async def quick():
+        pass
+
+    async def slow():
+        await asyncio.sleep(30)
+
+    async def broken():
+        raise ValueError("bad feed")
+
+    async def stuck():
+        time.sleep(30)
+
+    job_runner.JOBS.update(quick=quick, slow=slow, broken=broken, stuck=stuck)
+    conn.send(("ready", 0.0))
+    asyncio.run(job_runner._serve(conn))
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    from app.services import job_runner
+
+    for name in ("quick", "slow", "broken", "stuck"):
+        monkeypatch.setitem(job_runner.JOBS, name, None)
+    return job_runner.WarmJobRunner(grace_seconds=1.0, worker_main=_test_worker)
+
+
+class TestWarmJobRunner:
+    """Tests for app.services.job_runner.WarmJobRunner"""
+
+    @pytest.mark.asyncio
+    async def test_runs_jobs_in_one_warm_process(self, runner):
+        """Consecutive jobs reuse the worker and start in milliseconds."""
+        try:
+            await runner.start()
+            pid = runner._process.pid
+
+            first = await runner.run("quick")
+            second = await runner.run("quick")
+
+            assert first["error"] is None and second["error"] is None
+            assert second["startup_ms"] < 500
+            assert runner._process.pid == pid
+            assert runner.stats()["jobs_run"] == 2
+        finally:
+            await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_run_during_warm_up_waits_for_it(self, runner):
+        """A job sent while the worker is still starting gets its own result, as do later jobs."""
+        try:
+            _, first = await asyncio.wait_for(asyncio.gather(runner.start(), runner.run("quick")), 30)
+            second = await asyncio.wait_for(runner.run("broken"), 30)
+
+            assert first["job"] == "quick" and first["error"] is None
+            assert second["job"] == "broken" and "bad feed" in second["error"]
+            assert runner.stats()["restarts"] == 0
+        finally:
+            await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_job_errors_and_timeouts_are_reported(self, runner):
+        """Exceptions and timeouts come back as errors without losing the worker."""
+        try:
+            assert (await runner.run("broken"))["error"] == "ValueError: bad feed"
+            assert (await runner.run("slow", timeout=0.2))["error"].startswith("timed out")
+            assert (await runner.run("quick"))["error"] is None
+            assert runner.restarts == 0
+        finally:
+            await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_blocked_worker_is_killed_and_replaced(self, runner):
+        """A job that blocks past timeout + grace kills the worker; the next run gets a new one."""
+        try:
+            result = await runner.run("stuck", timeout=0.2)
+            assert "worker killed" in result["error"]
+            assert not runner.running
+
+            assert (await runner.run("quick"))["error"] is None
+            assert runner.restarts == 1
+        finally:
+            await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_cancelling_the_caller_cancels_the_job(self, runner):
+        """Cancellation reaches the job inside the worker, which stays up."""
+        try:
+            await runner.start()
+            task = asyncio.create_task(runner.run("slow"))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            assert runner.running
+            assert (await runner.run("quick"))["error"] is None
+        finally:
+            await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_unknown_job(self, runner):
+        """Only registered jobs can be run."""
+        with pytest.raises(ValueError):
+            await runner.run("nope")
+
+
+class TestScheduledJobs:
+    """Tests for the scheduled jobs of app.services.job_runner.JOBS"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("job, service", [
+        ("daily_ingest", "app.services.ingestion_service.IngestionService.run_daily_ingestion"),
+        ("daily_cluster", "scripts.daily_cluster.ClusterService.run_daily_clustering"),
+    ])
+    async def test_runs_start_with_fresh_stats(self, job, service):
+        """Each run's summary counts only that run, not earlier runs of the same worker."""
+        from unittest.mock import patch
+        from app.services import job_runner
+        from app.services.llm_metrics import get_generation_stats, record_generation
+        from app.services.prompt_builder import get_prompt_stats, prepare_texts
+
+        seen = {}
+
+        async def run(self):
+            seen["generations"] = get_generation_stats()
+            seen["prompts"] = get_prompt_stats()
+
+        record_generation("news-combiner", attempts=3, success=True)
+        prepare_texts(["Earlier run."], "news-combiner")
+        with patch(service, run):
+            await job_runner.JOBS[job]()
+
+        assert seen == {"generations": {}, "prompts": {}}
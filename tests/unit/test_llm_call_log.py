@@ -0,0 +1,124 @@
+"""Unit tests for the per-call LLM log."""
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+
+def _response(prompt_tokens=100, output_tokens=50):
+    response = MagicMock()
+    response.prompt_eval_count = prompt_tokens
+    response.eval_count = output_tokens
+    response.total_duration = 3_000_000_000
+    response.load_duration = 500_000_000
+    response.prompt_eval_duration = 500_000_000
+    response.eval_duration = 2_000_000_000
+    return response
+
+
+class TestRecordCall:
+    """Tests for building and writing call records"""
+
+    def test_build_record_from_response(self):
+        """Converts Ollama's nanosecond durations to milliseconds."""
+        from app.services.llm_call_log import build_record
+
+        record = build_record("news-classifier", "classify", 2, 3100.0, _response())
+
+        assert record["stage"] == "classify"
+        assert record["attempt"] == 2
+        assert record["success"] is True
+        assert record["prompt_tokens"] == 100
+        assert record["output_tokens"] == 50
+        assert record["eval_ms"] == 2000.0
+        assert record["load_ms"] == 500.0
+
+    def test_build_record_from_error(self):
+        """Failed calls keep the error type and no token counts."""
+        from app.services.llm_call_log import build_record
+
+        record = build_record("news-classifier", "classify", 1, 10.0, error=TimeoutError())
+
+        assert record["success"] is False
+        assert record["error"] == "TimeoutError"
+        assert record["prompt_tokens"] is None
+
+    def test_record_call_appends_lines(self, llm_call_log):
+        """Each call is appended as one JSON line."""
+        from app.services.llm_call_log import build_record, record_call, read_calls, flush_calls
+
+        record_call(build_record("news-classifier", "classify", 1, 10.0, _response()))
+        record_call(build_record("news-classifier", "classify", 2, 10.0, _response()))
+        flush_calls()
+
+        records = list(read_calls(str(llm_call_log)))
+        assert [r["attempt"] for r in records] == [1, 2]
+
+    def test_record_call_does_not_wait_for_the_disk(self, llm_call_log, monkeypatch):
+        """The caller returns while the write is still blocked; flush_calls waits for it."""
+        import threading
+        from app.services import llm_call_log as call_log
+
+        disk = threading.Event()
+        write = call_log._write
+
+        def slow_write(path, records):
+            disk.wait(5)
+            write(path, records)
+
+        monkeypatch.setattr(call_log, "_write", slow_write)
+        call_log.record_call(call_log.build_record("news-classifier", "classify", 1, 10.0, _response()))
+
+        assert not llm_call_log.exists()
+        disk.set()
+        call_log.flush_calls()
+        assert [r["attempt"] for r in call_log.read_calls(str(llm_call_log))] == [1]
+
+    @pytest.mark.asyncio
+    @patch('app.services.llm_gateway.ollama.AsyncClient')
+    async def test_gateway_records_every_call(self, mock_client_class, llm_call_log):
+        """The gateway logs successful and failed calls with their stage."""
+        from app.services.llm_call_log import read_calls, flush_calls
+        from app.services.llm_gateway import LLMGateway
+
+        mock_client = MagicMock()
+        mock_client.chat = AsyncMock(side_effect=[_response(), ConnectionError("refused")])
+        mock_client_class.return_value = mock_client
+
+        gateway = LLMGateway(host="http://test")
+        await gateway.chat("news-combiner", [{"role": "user", "content": "a"}], stage="combine")
+        with pytest.raises(ConnectionError):
+            await gateway.chat("news-combiner", [{"role": "user", "content": "a"}], stage="combine", attempt=2)
+        flush_calls()
+
+        records = list(read_calls(str(llm_call_log)))
+        assert [(r["stage"], r["attempt"], r["success"]) for r in records] == [
+            ("combine", 1, True), ("combine", 2, False)
+        ]
+        assert "stage" not in mock_client.chat.call_args[1]
+
+
+class TestAggregateCalls:
+    """Tests for the per-day, per-stage report"""
+
+    def test_aggregate_calls(self):
+        """Computes throughput, retry cost and latency percentiles."""
+        from app.services.llm_call_log import aggregate_calls
+
+        base = {"ts": "2026-01-05T10:00:00+00:00", "stage": "combine", "success": True,
+                "prompt_tokens": 100, "output_tokens": 50, "prompt_eval_ms": 500.0, "eval_ms": 1000.0}
+        records = [
+            {**base, "attempt": 1, "latency_ms": 1000.0},
+            {**base, "attempt": 2, "latency_ms": 3000.0},
+            {**base, "attempt": 1, "latency_ms": 2000.0, "ts": "2026-01-06T10:00:00+00:00"},
+        ]
+
+        report = aggregate_calls(records)
+
+        day = report["2026-01-05"]["combine"]
+        assert day["calls"] == 2
+        assert day["retries"] == 1
+        assert day["prefill_tokens_per_sec"] == 200.0
+        assert day["decode_tokens_per_sec"] == 50.0
+        assert day["retry_token_share"] == 0.5
+        assert day["retry_time_share"] == 0.75
+        assert day["p95_latency_ms"] == 3000.0
+        assert report["2026-01-06"]["combine"]["retries"] == 0
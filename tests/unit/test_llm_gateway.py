@@ -0,0 +1,363 @@
+"""Unit tests for the LLM gateway."""
+import asyncio
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+
+class TestGatewayScheduling:
+    """Tests for LLMGateway concurrency limits and priorities"""
+
+    @pytest.mark.asyncio
+    async def test_global_concurrency_limit(self):
+        """Never runs more generations than max_concurrency."""
+        from app.services.llm_gateway import LLMGateway, Priority
+
+        gateway = LLMGateway(host="http://test", max_concurrency=2, reserved_interactive=0)
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            async with gateway.slot("news-classifier", Priority.BATCH):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*[job() for _ in range(6)])
+
+        assert peak == 2
+        assert gateway.stats()["admitted"]["batch"] == 6
+        assert gateway.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_per_model_limit(self):
+        """Per-model limit caps one model while others still run."""
+        from app.services.llm_gateway import LLMGateway, Priority
+
+        gateway = LLMGateway(
+            host="http://test", max_concurrency=3, reserved_interactive=0,
+            model_concurrency={"news-combiner": 1}
+        )
+
+        await gateway.acquire("news-combiner", Priority.BATCH)
+        blocked = asyncio.ensure_future(gateway.acquire("news-combiner", Priority.BATCH))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+
+        # A different model is not affected
+        await asyncio.wait_for(gateway.acquire("news-classifier", Priority.BATCH), timeout=1)
+
+        gateway._release("news-combiner")
+        await asyncio.wait_for(blocked, timeout=1)
+        assert gateway.stats()["in_flight_by_model"] == {"news-combiner": 1, "news-classifier": 1}
+
+    @pytest.mark.asyncio
+    async def test_interactive_served_before_batch(self):
+        """Queued interactive requests overtake queued batch requests."""
+        from app.services.llm_gateway import LLMGateway, Priority
+
+        gateway = LLMGateway(host="http://test", max_concurrency=1, reserved_interactive=0)
+        order = []
+
+        await gateway.acquire("news-classifier", Priority.BATCH)
+
+        async def waiter(model, priority, label):
+            async with gateway.slot(model, priority):
+                order.append(label)
+
+        batch = asyncio.ensure_future(waiter("news-classifier", Priority.BATCH, "batch"))
+        await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(waiter("news-summarizer", Priority.INTERACTIVE, "interactive"))
+        await asyncio.sleep(0)
+
+        gateway._release("news-classifier")
+        await asyncio.gather(batch, interactive)
+
+        assert order == ["interactive", "batch"]
+
+    @pytest.mark.asyncio
+    async def test_reserved_slot_not_used_by_batch(self):
+        """Batch work leaves the reserved slot free for interactive requests."""
+        from app.services.llm_gateway import LLMGateway, Priority
+
+        gateway = LLMGateway(host="http://test", max_concurrency=2, reserved_interactive=1)
+
+        await gateway.acquire("news-classifier", Priority.BATCH)
+        blocked = asyncio.ensure_future(gateway.acquire("news-classifier", Priority.BATCH))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+
+        await asyncio.wait_for(gateway.acquire("news-summarizer", Priority.INTERACTIVE), timeout=1)
+        blocked.cancel()
+
+    @pytest.mark.asyncio
+    async def test_admission_control_rejects_full_interactive_queue(self):
+        """Rejects interactive requests once the queue is full."""
+        from app.services.llm_gateway import LLMGateway, LLMGatewayOverloaded, Priority
+
+        gateway = LLMGateway(host="http://test", max_concurrency=1, reserved_interactive=0, max_interactive_queue=1)
+
+        await gateway.acquire("news-summarizer", Priority.INTERACTIVE)
+        queued = asyncio.ensure_future(gateway.acquire("news-summarizer", Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+
+        with pytest.raises(LLMGatewayOverloaded):
+            await gateway.acquire("news-summarizer", Priority.INTERACTIVE)
+
+        stats = gateway.stats()
+        assert stats["rejected"]["interactive"] == 1
+        assert stats["queue_depth"]["interactive"] == 1
+        queued.cancel()
+
+
+class TestGatewayClient:
+    """Tests for the pooled client"""
+
+    @pytest.mark.asyncio
+    @patch('app.services.llm_gateway.ollama.AsyncClient')
+    async def test_client_reused_within_loop(self, mock_client_class):
+        """One client per event loop is shared by all callers."""
+        from app.services.llm_gateway import LLMGateway
+
+        mock_client = MagicMock()
+        mock_client.chat = AsyncMock(return_value=MagicMock())
+        mock_client_class.return_value = mock_client
+
+        gateway = LLMGateway(host="http://test")
+        await gateway.chat("news-classifier", [{"role": "user", "content": "a"}])
+        await gateway.chat("news-classifier", [{"role": "user", "content": "b"}])
+
+        assert mock_client_class.call_count == 1
+        assert mock_client.chat.call_count == 2
+        assert mock_client.chat.call_args[1]["stream"] is False
+
+
+class TestKeepAliveAndWarmUp:
+    """Tests for keep_alive, warm-up and prefill accounting"""
+
+    @pytest.mark.asyncio
+    @patch('app.services.llm_gateway.ollama.AsyncClient')
+    async def test_chat_sets_keep_alive_and_records_prefill(self, mock_client_class):
+        """Passes keep_alive and credits the warm-up's prefix cost to calls that reused it."""
+        from app.config import settings
+        from app.services.llm_gateway import LLMGateway
+        from app.services.llm_metrics import get_generation_stats, reset_generation_stats
+
+        warm_up = MagicMock()
+        warm_up.prompt_eval_count = 120
+        cached = MagicMock()
+        cached.prompt_eval_count = 12
+        mock_client = MagicMock()
+        mock_client.chat = AsyncMock(side_effect=[warm_up, cached])
+        mock_client_class.return_value = mock_client
+
+        reset_generation_stats()
+        gateway = LLMGateway(host="http://test")
+        await gateway.warm_up("news-classifier", prefix="Classify this article.\n")
+        await gateway.chat("news-classifier", [{"role": "user", "content": "Classify this article.\nsix words of article text here"}])
+
+        assert mock_client.chat.call_args[1]["keep_alive"] == settings.OLLAMA_KEEP_ALIVE
+        stats = get_generation_stats()["news-classifier"]
+        assert stats["prefix_tokens"] == 120
+        assert stats["prompt_tokens_evaluated"] == 12
+        assert stats["prefix_cache_hits"] == 1
+        assert stats["prefill_saved_tokens"] == 120
+
+    @pytest.mark.asyncio
+    @patch('app.services.llm_gateway.ollama.AsyncClient')
+    async def test_uncached_call_saves_nothing(self, mock_client_class):
+        """A call that evaluated the whole prefix again is not credited, whatever its length."""
+        from app.services.llm_gateway import LLMGateway
+        from app.services.llm_metrics import get_generation_stats, reset_generation_stats
+
+        warm_up = MagicMock()
+        warm_up.prompt_eval_count = 120
+        uncached = MagicMock()
+        uncached.prompt_eval_count = 127
+        mock_client = MagicMock()
+        mock_client.chat = AsyncMock(side_effect=[warm_up, uncached, uncached])
+        mock_client_class.return_value = mock_client
+
+        reset_generation_stats()
+        gateway = LLMGateway(host="http://test")
+        await gateway.warm_up("news-combiner", prefix="Combine these articles.\n")
+        # Long in characters but few tokens: a chars/4 estimate would report savings
+        await gateway.chat("news-combiner", [{"role": "user", "content": "Combine these articles.\n" + "x" * 4000}])
+        # No warm-up measured for this prefix: nothing can be credited
+        await gateway.chat("news-combiner", [{"role": "user", "content": "Other instructions. text"}])
+
+        stats = get_generation_stats()["news-combiner"]
+        assert stats["prompt_tokens_evaluated"] == 254
+        assert stats["prefix_cache_hits"] == 0
+        assert stats["prefill_saved_tokens"] == 0
+
+    @pytest.mark.asyncio
+    @patch('app.services.llm_gateway.ollama.AsyncClient')
+    async def test_warm_up_prefills_prefix(self, mock_client_class):
+        """Warm-up sends the shared prefix with a one-token generation."""
+        from app.services.llm_gateway import LLMGateway
+
+        mock_client = MagicMock()
+        mock_client.chat = AsyncMock(return_value=MagicMock())
+        mock_client.generate = AsyncMock(return_value=MagicMock())
+        mock_client_class.return_value = mock_client
+
+        gateway = LLMGateway(host="http://test")
+        await gateway.warm_up("news-combiner", prefix="INSTRUCTIONS")
+        await gateway.warm_up("news-summarizer")
+
+        chat_kwargs = mock_client.chat.call_args[1]
+        assert chat_kwargs["messages"][0]["content"] == "INSTRUCTIONS"
+        assert chat_kwargs["options"] == {"num_predict": 1}
+        assert mock_client.generate.call_args[1]["model"] == "news-summarizer"
+
+    @pytest.mark.asyncio
+    @patch('app.services.llm_gateway.ollama.AsyncClient')
+    async def test_warm_up_failure_is_ignored(self, mock_client_class):
+        """A failed warm-up does not raise."""
+        from app.services.llm_gateway import LLMGateway
+
+        mock_client = MagicMock()
+        mock_client.generate = AsyncMock(side_effect=Exception("connection refused"))
+        mock_client_class.return_value = mock_client
+
+        gateway = LLMGateway(host="http://test")
+        await gateway.warm_up("news-classifier")
+
+        assert gateway.stats()["in_flight"] == 0
+
+
+class TestGatewayCircuitBreaker:
+    """Tests for fail-fast behaviour of the gateway"""
+
+    @pytest.mark.asyncio
+    @patch('app.services.llm_gateway.ollama.AsyncClient')
+    async def test_connection_failures_open_circuit(self, mock_client_class):
+        """Once open, calls fail fast without reaching Ollama."""
+        from app.services.circuit_breaker import CircuitBreaker
+        from app.services.llm_gateway import LLMGateway, LLMCircuitOpen, LLMUnavailableError
+
+        mock_client = MagicMock()
+        mock_client.chat = AsyncMock(side_effect=ConnectionError("Failed to connect to Ollama"))
+        mock_client_class.return_value = mock_client
+
+        gateway = LLMGateway(host="http://test", breaker=CircuitBreaker("test", failure_threshold=2))
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await gateway.chat("news-classifier", [{"role": "user", "content": "a"}])
+
+        with pytest.raises(LLMCircuitOpen) as exc_info:
+            await gateway.chat("news-classifier", [{"role": "user", "content": "a"}])
+
+        assert isinstance(exc_info.value, LLMUnavailableError)
+        assert exc_info.value.retry_after > 0
+        assert mock_client.chat.call_count == 2
+        assert gateway.stats()["circuit"]["state"] == "open"
+        assert gateway.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    @patch('app.services.llm_gateway.ollama.AsyncClient')
+    async def test_generic_errors_do_not_open_circuit(self, mock_client_class):
+        """Only connection and timeout errors count as backend failures."""
+        from app.services.circuit_breaker import CircuitBreaker
+        from app.services.llm_gateway import LLMGateway
+
+        mock_client = MagicMock()
+        mock_client.chat = AsyncMock(side_effect=ValueError("bad request"))
+        mock_client_class.return_value = mock_client
+
+        gateway = LLMGateway(host="http://test", breaker=CircuitBreaker("test", failure_threshold=1))
+        with pytest.raises(ValueError):
+            await gateway.chat("news-classifier", [{"role": "user", "content": "a"}])
+
+        assert gateway.stats()["circuit"]["state"] == "closed"
+
+    @pytest.mark.asyncio
+    @patch('app.services.llm_gateway.ollama.AsyncClient')
+    async def test_deadline_exceeded(self, mock_client_class):
+        """A generation past its deadline raises and counts as a failure."""
+        from app.services.llm_gateway import LLMGateway, LLMDeadlineExceeded
+
+        async def slow_chat(**kwargs):
+            await asyncio.sleep(1)
+
+        mock_client = MagicMock()
+        mock_client.chat = slow_chat
+        mock_client_class.return_value = mock_client
+
+        gateway = LLMGateway(host="http://test")
+        with pytest.raises(LLMDeadlineExceeded):
+            await gateway.chat("news-summarizer", [{"role": "user", "content": "a"}], deadline=0.01)
+
+        assert gateway.stats()["circuit"]["consecutive_failures"] == 1
+        assert gateway.stats()["in_flight"] == 0
+
+
+class TestHostSlots:
+    """Tests for HostSlots, the generation slots shared by all processes"""
+
+    @pytest.mark.asyncio
+    async def test_batch_work_of_another_process_leaves_the_reserved_slot(self, db_session):
+        """Batch work in one process cannot take the host's last slots from interactive requests in another."""
+        from app.services.llm_slots import HostSlots
+
+        # Two processes' view of the same host (separate connections, so separate lock owners)
+        api = HostSlots("http://ollama", slots=2, reserved_interactive=1, poll_interval=0.01, bind=db_session.bind)
+        worker = HostSlots("http://ollama", slots=2, reserved_interactive=1, poll_interval=0.01, bind=db_session.bind)
+
+        batch = await worker.acquire(interactive=False)
+        blocked = asyncio.ensure_future(api.acquire(interactive=False))
+        await asyncio.sleep(0.1)
+        assert not blocked.done()
+
+        interactive = await asyncio.wait_for(api.acquire(interactive=True), 1)
+        assert interactive[1] == api.keys[0]
+
+        await worker.release(batch)
+        second_batch = await asyncio.wait_for(blocked, 1)
+        assert second_batch[1] == api.keys[1]
+        await api.release(interactive)
+        await api.release(second_batch)
+        assert api.stats()["held"] == worker.stats()["held"] == 0
+
+    @pytest.mark.asyncio
+    async def test_gateways_share_the_host_limit(self, db_session):
+        """Gateways of different processes together run no more generations than the host's slots."""
+        from app.services.llm_gateway import LLMGateway, Priority
+        from app.services.llm_slots import HostSlots
+
+        gateways = [
+            LLMGateway(host="http://ollama", max_concurrency=2, reserved_interactive=0,
+                       host_slots=HostSlots("http://ollama", slots=2, poll_interval=0.01, bind=db_session.bind))
+            for _ in range(2)
+        ]
+        running = 0
+        peak = 0
+
+        async def job(gateway):
+            nonlocal running, peak
+            async with gateway.slot("news-classifier", Priority.BATCH):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.05)
+                running -= 1
+
+        await asyncio.wait_for(asyncio.gather(*[job(gateways[i % 2]) for i in range(6)]), 10)
+
+        assert peak == 2
+        assert all(gateway.stats()["host_slots"]["held"] == 0 for gateway in gateways)
+
+    @pytest.mark.asyncio
+    async def test_runs_uncoordinated_without_database(self):
+        """If the database cannot be reached, generations still run under the process's limits."""
+        from app.services.llm_gateway import LLMGateway, Priority
+        from app.services.llm_slots import HostSlots
+
+        bind = MagicMock(connect=AsyncMock(side_effect=ConnectionError("db down")))
+        gateway = LLMGateway(host="http://ollama", host_slots=HostSlots("http://ollama", slots=2, bind=bind))
+
+        async with gateway.slot("news-classifier", Priority.BATCH):
+            pass
+
+        assert gateway.stats()["host_slots"]["uncoordinated"] == 1
@@ -0,0 +1,34 @@
+"""Unit tests for the per-model LLM generation metrics."""
+import pytest
+
+
+class TestGenerationStats:
+    """Tests for llm_metrics retry and source accounting"""
+
+    def test_retry_rate(self):
+        """Counts attempts beyond the first as retries."""
+        from app.services.llm_metrics import record_generation, get_generation_stats, reset_generation_stats
+
+        reset_generation_stats()
+        record_generation("news-classifier", 1, success=True)
+        record_generation("news-classifier", 3, success=False)
+
+        stats = get_generation_stats()["news-classifier"]
+        assert stats["generations"] == 2
+        assert stats["retries"] == 2
+        assert stats["failures"] == 1
+        assert stats["retry_rate"] == 1.0
+
+    def test_dropped_sources(self):
+        """Counts the source articles the combiner left out of each cluster."""
+        from app.services.llm_metrics import record_sources, get_generation_stats, reset_generation_stats
+
+        reset_generation_stats()
+        record_sources("news-combiner", 5, 5)
+        record_sources("news-combiner", 4, 1)
+
+        stats = get_generation_stats()["news-combiner"]
+        assert stats["sources_sent"] == 9
+        assert stats["sources_dropped"] == 3
+        assert stats["clusters_with_drops"] == 1
+        assert stats["dropped_per_cluster"] == 1.5
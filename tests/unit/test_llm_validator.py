@@ -0,0 +1,154 @@
+"""Unit tests for LLM output schemas, repair and validation."""
+import pytest
+
+
+def _classification(**overrides):
+    from app.services.llm_validator import CATEGORIES
+
+    result = {cat: 0.5 for cat in CATEGORIES}
+    result.update({
+        "Length": 0.4,
+        "Complexity": 0.6,
+        "Tone": {"Neutral": 0.8, "Informative": 0.9, "Emotional": 0.1},
+        "Content_type": "News",
+        "Named Entities": ["NASA"],
+    })
+    result.update(overrides)
+    return result
+
+
+class TestSchemas:
+    """Tests for the JSON schemas passed to Ollama's `format`"""
+
+    def test_classification_schema_matches_validator_keys(self):
+        """Schema requires exactly the keys the validator expects."""
+        from app.services.llm_validator import CLASSIFICATION_SCHEMA, CATEGORIES, METADATA_KEYS, ALLOWED_CONTENT_TYPES
+
+        assert set(CLASSIFICATION_SCHEMA["required"]) == set(CATEGORIES) | set(METADATA_KEYS)
+        assert CLASSIFICATION_SCHEMA["properties"]["Content_type"]["enum"] == ALLOWED_CONTENT_TYPES
+        assert CLASSIFICATION_SCHEMA["additionalProperties"] is False
+
+    def test_combiner_schema_embeds_classification(self):
+        """Combiner analysis uses the classification schema."""
+        from app.services.llm_validator import COMBINER_SCHEMA, CLASSIFICATION_SCHEMA
+
+        assert COMBINER_SCHEMA["properties"]["analysis"] == CLASSIFICATION_SCHEMA
+
+
+class TestRepairOutput:
+    """Tests for llm_validator.repair_output"""
+
+    def test_repair_named_entities_key(self):
+        """Renames Named_Entities and passes validation."""
+        from app.services.llm_validator import repair_output, validate_output
+
+        result = _classification()
+        result["Named_Entities"] = result.pop("Named Entities")
+
+        repaired = repair_output(result)
+
+        assert "Named_Entities" not in repaired
+        assert validate_output(repaired) == (True, None)
+
+    def test_repair_flat_tone_and_casing(self):
+        """Nests flat tone keys and fixes Content_type casing."""
+        from app.services.llm_validator import repair_output, validate_output
+
+        result = _classification(Content_type="analysis")
+        tone = result.pop("Tone")
+        result.update({"neutral": tone["Neutral"], "Informative": "0.9", "Emotional": 1.3})
+
+        repaired = repair_output(result)
+
+        assert repaired["Content_type"] == "Analysis"
+        assert repaired["Tone"] == {"Neutral": 0.8, "Informative": 0.9, "Emotional": 1.0}
+        assert validate_output(repaired) == (True, None)
+
+    def test_repair_then_validate_normalizes_sum(self):
+        """Category sums that are not 5.0 are normalized."""
+        from app.services.llm_validator import repair_output, validate_output, CATEGORIES
+
+        result = _classification(**{cat: "1" for cat in CATEGORIES})
+
+        repaired = repair_output(result)
+        is_valid, _ = validate_output(repaired)
+
+        assert is_valid
+        assert sum(repaired[cat] for cat in CATEGORIES) == pytest.approx(5.0)
+
+    def test_repair_leaves_error_output_alone(self):
+        """Model-reported errors are not repaired."""
+        from app.services.llm_validator import repair_output
+
+        result = {"error": "cannot classify"}
+        assert repair_output(result) == {"error": "cannot classify"}
+
+
+class TestSummaryRepair:
+    """Tests for llm_validator.repair_summary_output"""
+
+    def test_repair_key_points_string(self):
+        """Splits a key_points string into a list."""
+        from app.services.llm_validator import repair_summary_output, validate_summary_output
+
+        result = {
+            "greeting": " Hello! ",
+            "summary": "A" * 60,
+            "key_points": "- First point\n- Second point\n"
+        }
+
+        repaired = repair_summary_output(result)
+
+        assert repaired["key_points"] == ["First point", "Second point"]
+        assert repaired["greeting"] == "Hello!"
+        assert validate_summary_output(repaired) == (True, None)
+
+
+class TestValidateCombinerOutput:
+    """Tests for llm_validator.validate_combiner_output"""
+
+    def test_valid_combiner_output(self):
+        """Accepts a well-formed combiner result."""
+        from app.services.llm_validator import validate_combiner_output
+
+        result = {
+            "articles_combined": 2,
+            "combined_indices": [1, 2],
+            "title": "Title",
+            "generated_article": "Body",
+            "analysis": _classification(),
+        }
+        assert validate_combiner_output(result, 3) == (True, None)
+
+    def test_combiner_indices_out_of_range(self):
+        """Rejects indices outside the input set."""
+        from app.services.llm_validator import validate_combiner_output
+
+        result = {
+            "articles_combined": 1,
+            "combined_indices": [4],
+            "title": "Title",
+            "generated_article": "Body",
+            "analysis": _classification(),
+        }
+        is_valid, error = validate_combiner_output(result, 3)
+        assert not is_valid
+        assert "combined_indices" in error
+
+    def test_combiner_invalid_analysis(self):
+        """Rejects an analysis that fails classification validation."""
+        from app.services.llm_validator import validate_combiner_output
+
+        analysis = _classification()
+        del analysis["Tone"]
+        result = {
+            "articles_combined": 1,
+            "combined_indices": [1],
+            "title": "Title",
+            "generated_article": "Body",
+            "analysis": analysis,
+        }
+        is_valid, error = validate_combiner_output(result, 1)
+        assert not is_valid
+        assert error.startswith("Invalid analysis")
+
@@ -0,0 +1,137 @@
+"""Unit tests for schema migrations and the article lifecycle columns."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+
+def _conn(applied):
+    conn = AsyncMock()
+    executed = []
+
+    async def execute(statement, params=None):
+        sql = str(statement)
+        executed.append(sql)
+        result = MagicMock()
+        if sql.startswith("SELECT name FROM schema_migrations"):
+            result.scalars.return_value.all.return_value = list(applied)
+        return result
+
+    conn.execute.side_effect = execute
+    return conn, executed
+
+
+class TestRunMigrations:
+    """Tests for app.migrations.run_migrations"""
+
+    @pytest.mark.asyncio
+    async def test_applies_pending_in_order_under_lock(self):
+        """A fresh database gets every migration, after taking the advisory lock."""
+        from app.migrations import MIGRATIONS, run_migrations
+
+        conn, executed = _conn(applied=[])
+        ran = await run_migrations(conn)
+
+        assert ran == [name for name, _ in MIGRATIONS]
+        assert executed[0].startswith("SELECT pg_advisory_xact_lock")
+        assert any("ix_articles_pending_synthesis" in sql for sql in executed)
+        assert executed[-1].startswith("INSERT INTO schema_migrations")
+
+    @pytest.mark.asyncio
+    async def test_skips_applied(self):
+        """Recorded migrations are not run again."""
+        from app.migrations import MIGRATIONS, run_migrations
+
+        conn, executed = _conn(applied=[name for name, _ in MIGRATIONS])
+        assert await run_migrations(conn) == []
+        assert not any(sql.startswith("ALTER TABLE") for sql in executed)
+
+    def test_model_indexes_match_migration(self):
+        """New databases (create_all) get the same partial indexes as migrated ones."""
+        from app.migrations import MIGRATIONS
+        from app.models.article import Article
+
+        migration_sql = " ".join(sql for _, statements in MIGRATIONS for sql in statements)
+        for index in Article.__table__.indexes:
+            if index.dialect_options["postgresql"]["where"] is None:
+                # Plain indexes come with the partitioned table (app.partitions.partition_tables)
+                continue
+            assert index.name in migration_sql
+            where = str(index.dialect_options["postgresql"]["where"])
+            assert where.split("IN ")[1] in migration_sql
+
+
+class TestArticleStage:
+    """Tests for Article.set_stage"""
+
+    def test_failures_count_attempts(self):
+        """Repeated failures in a stage count up; moving on resets the count."""
+        from app.models.article import Article, ArticleStage
+
+        article = Article(stage=ArticleStage.SCRAPED, stage_attempts=0)
+        article.set_stage(ArticleStage.CLASSIFY_FAILED, error="timeout")
+        article.set_stage(ArticleStage.CLASSIFY_FAILED, error="invalid output")
+        assert article.stage_attempts == 2
+        assert article.stage_error == "invalid output"
+
+        article.set_stage(ArticleStage.CLASSIFIED)
+        assert article.stage == ArticleStage.CLASSIFIED
+        assert article.stage_attempts == 0
+        assert article.stage_error is None
+
+
+def _vector_conn(types, indexes):
+    conn = AsyncMock()
+    executed = []
+
+    async def execute(statement, params=None):
+        sql = str(statement)
+        executed.append(sql)
+        result = MagicMock()
+        if "information_schema.columns" in sql:
+            result.scalar.return_value = types.get((params["table"], params["column"]))
+        elif "FROM pg_indexes" in sql:
+            result.all.return_value = indexes.get(params["table"], [])
+        return result
+
+    conn.execute.side_effect = execute
+    return conn, executed
+
+
+class TestSyncVectorStorage:
+    """Tests for app.migrations.sync_vector_storage"""
+
+    @pytest.mark.asyncio
+    async def test_converts_columns_and_rebuilds_indexes(self):
+        """Mismatched columns are altered and their pgvector indexes rebuilt with the new opclass."""
+        from app.migrations import sync_vector_storage
+
+        conn, executed = _vector_conn(
+            types={("articles", "category_scores"): "vector", ("users", "preferences"): "halfvec"},
+            indexes={"articles": [
+                ("ix_articles_published_at", "CREATE INDEX ix_articles_published_at ON public.articles USING btree (published_at)"),
+                ("ix_articles_category_hnsw",
+                 "CREATE INDEX ix_articles_category_hnsw ON public.articles USING hnsw (category_scores vector_cosine_ops)"),
+            ]},
+        )
+        converted = await sync_vector_storage(conn, "halfvec")
+
+        assert converted == ["articles.category_scores"]
+        assert executed[0].startswith("SELECT pg_advisory_xact_lock")
+        assert 'DROP INDEX "ix_articles_category_hnsw"' in executed
+        assert not any("ix_articles_published_at" in sql and sql.startswith("DROP") for sql in executed)
+        alter = executed.index(
+            "ALTER TABLE articles ALTER COLUMN category_scores TYPE halfvec(10) USING category_scores::halfvec(10)"
+        )
+        assert executed[alter + 1].endswith("USING hnsw (category_scores halfvec_cosine_ops)")
+        assert not any("ALTER TABLE users" in sql for sql in executed)
+
+    @pytest.mark.asyncio
+    async def test_matching_storage_is_untouched(self):
+        """Nothing is altered when columns already match, or before the tables exist."""
+        from app.migrations import sync_vector_storage
+
+        conn, executed = _vector_conn(types={("articles", "category_scores"): "vector"}, indexes={})
+        assert await sync_vector_storage(conn, "vector") == []
+        assert not any(sql.startswith(("ALTER", "DROP")) for sql in executed)
+
+        with pytest.raises(ValueError):
+            await sync_vector_storage(conn, "float16")
@@ -0,0 +1,119 @@
+"""Unit tests for SimHash near-duplicate detection."""
+import uuid
+import pytest
+from unittest.mock import MagicMock
+
+STORY = (
+    "The central bank raised interest rates by a quarter point on Wednesday, its third increase this year, "
+    "citing persistent inflation in services and a tight labour market. Officials signalled that further "
+    "increases were possible if price pressures did not ease over the coming months, while several members "
+    "of the committee argued for a pause to assess the effect of earlier moves on lending and household spending.\n\n"
+    "Mortgage lenders said they expected to pass the increase on to borrowers within days, adding roughly forty "
+    "pounds a month to a typical variable-rate loan. Consumer groups warned that families already stretched by "
+    "higher energy and food bills would struggle, and urged the government to extend support for the poorest "
+    "households through the winter.\n\n"
+    "Markets had largely priced in the move, and the currency was little changed after the announcement. "
+    "Government bond yields edged higher as traders pared back bets on cuts next year. Economists said the "
+    "statement struck a more cautious tone than in the spring, with the governor stressing that the committee "
+    "would be guided by incoming data rather than committing to a fixed path.\n\n"
+    "The decision was welcomed by business groups worried about the persistence of wage growth, although "
+    "manufacturers said higher borrowing costs were weighing on investment plans and export orders."
+)
+OTHER_STORY = (
+    "The home side came from two goals down to win the cup final in extra time, with the substitute striker "
+    "scoring twice in the last ten minutes. Fans invaded the pitch after the final whistle as the club lifted "
+    "its first trophy in more than twenty years, and the manager dedicated the victory to the supporters who "
+    "had stayed loyal through three relegation battles."
+)
+
+
+class TestSimHash:
+    """Tests for simhash fingerprints"""
+
+    def test_republished_copy_is_close(self):
+        """Different footers and a changed word keep fingerprints within the threshold."""
+        from app.services.near_duplicate import simhash, hamming_distance, DEFAULT_MAX_DISTANCE
+
+        copy = "Advertisement\n\n" + STORY.replace("Wednesday", "Wed") + "\n\nShare this article\n\nSign up for our morning newsletter"
+
+        assert hamming_distance(simhash(STORY), simhash(copy)) <= DEFAULT_MAX_DISTANCE
+
+    def test_different_stories_are_far(self):
+        """Unrelated stories are not near-duplicates."""
+        from app.services.near_duplicate import simhash, hamming_distance, DEFAULT_MAX_DISTANCE
+
+        assert hamming_distance(simhash(STORY), simhash(OTHER_STORY)) > DEFAULT_MAX_DISTANCE
+
+    def test_short_text_has_no_fingerprint(self):
+        """Texts too short to fingerprint return None."""
+        from app.services.near_duplicate import simhash
+
+        assert simhash("Breaking news: rates rise.") is None
+        assert simhash(None) is None
+
+
+class TestSimHashIndex:
+    """Tests for SimHashIndex"""
+
+    def test_query_finds_keys_within_distance(self):
+        """Finds fingerprints within max_distance bits, closest first."""
+        from app.services.near_duplicate import SimHashIndex
+
+        index = SimHashIndex(max_distance=3)
+        index.add("exact", 0b1010)
+        index.add("two_bits", 0b1010 ^ (1 << 40) ^ (1 << 63))
+        index.add("far", 0b1010 ^ 0xFF)
+
+        assert index.query(0b1010) == [("exact", 0), ("two_bits", 2)]
+        assert index.nearest(0b1010 ^ (1 << 20)) == "exact"
+        assert index.nearest(None) is None
+        assert len(index) == 3
+
+    def test_group_near_duplicates(self):
+        """The first copy represents its set."""
+        from app.services.near_duplicate import group_near_duplicates
+
+        groups = group_near_duplicates([
+            ("bbc", STORY),
+            ("sky", STORY + "\n\nCopyright 2026 Sky UK. All rights reserved."),
+            ("fox", OTHER_STORY),
+        ])
+
+        assert groups == {"bbc": ["sky"], "fox": []}
+
+
+class TestNearDuplicateReuse:
+    """Tests for near-duplicate handling in ingestion and clustering"""
+
+    def test_ingestion_reuses_twin_classification(self):
+        """A near-twin's classification is copied instead of calling the LLM."""
+        from app.services.ingestion_service import IngestionService
+        from app.services.near_duplicate import simhash
+
+        service = IngestionService()
+        classification = {"Sports": 5.0, "Named Entities": ["Bank"]}
+        service._remember_classification("https://bbc/story", simhash(STORY), classification)
+
+        reused = service._reuse_near_duplicate("https://sky/story", simhash(STORY + "\n\nShare this"))
+        assert reused == classification
+        assert reused is not classification
+        assert service._reuse_near_duplicate("https://fox/story", simhash(OTHER_STORY)) is None
+        assert service.reused_classifications == 1
+
+    def test_cluster_drops_twins_but_keeps_them_as_sources(self):
+        """Clustering keeps the longest copy and remembers the others."""
+        from scripts.daily_cluster import ClusterService
+
+        def article(content):
+            a = MagicMock()
+            a.id = uuid.uuid4()
+            a.content = content
+            return a
+
+        short_copy, full_copy, other = article(STORY), article(STORY + " Markets rose."), article(OTHER_STORY)
+
+        service = ClusterService()
+        kept = service.drop_near_duplicates([short_copy, full_copy, other])
+
+        assert kept == [full_copy, other]
+        assert service.twins == {full_copy.id: [short_copy]}
@@ -165,6 +165,66 @@ class TestSummarizeArticles:
         prompt = call_args[1]["messages"][0]["content"]
         assert "preferences" in prompt.lower() or "0.8" in prompt
 
+        # Static instructions come first so the prompt prefix can be cached
+        from app.services.nlp_service import SUMMARY_INSTRUCTIONS
+        assert prompt.startswith(SUMMARY_INSTRUCTIONS)
+
+
+VALID_SUMMARY = (
+    '{"greeting": "Good morning!", '
+    '"summary": "Today brings several developments in politics, technology and sports across the world.", '
+    '"key_points": ["Point 1", "Point 2"]}'
+)
+
+
+def _stream_parts(chunks):
+    """Builds an async iterator of Ollama chat parts."""
+    async def gen():
+        for chunk in chunks:
+            part = MagicMock()
+            part.message.content = chunk
+            yield part
+    return gen()
+
+
+class TestStreamSummary:
+    """Tests for NLPService.stream_summary and parse_summary"""
+
+    @pytest.mark.asyncio
+    @patch('app.services.nlp_service.ollama.AsyncClient')
+    async def test_stream_summary_yields_chunks(self, mock_client_class):
+        """Yields model output as it is generated."""
+        from app.services.nlp_service import NLPService
+
+        chunks = [VALID_SUMMARY[:20], VALID_SUMMARY[20:60], VALID_SUMMARY[60:]]
+        mock_client = MagicMock()
+        mock_client.chat = AsyncMock(return_value=_stream_parts(chunks))
+        mock_client_class.return_value = mock_client
+
+        service = NLPService()
+        received = [c async for c in service.stream_summary(["Article"], {"Length": 0.5})]
+
+        assert received == chunks
+        assert mock_client.chat.call_args[1]["stream"] is True
+
+        result, error = service.parse_summary("".join(received))
+        assert error is None
+        assert result["greeting"] == "Good morning!"
+
+    def test_parse_summary_invalid(self):
+        """Rejects documents that fail validation."""
+        from app.services.nlp_service import NLPService
+
+        service = NLPService()
+
+        result, error = service.parse_summary('{"greeting": "Hi", "summary": "Short"}')
+        assert result is None
+        assert error
+
+        result, error = service.parse_summary('not json')
+        assert result is None
+        assert "JSON" in error
+
 
 class TestNLPServiceInit:
     """Tests for NLPService initialization"""
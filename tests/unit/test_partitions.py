@@ -0,0 +1,173 @@
+"""Unit tests for monthly partitions and retention of the history tables."""
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+
+def _conn(relkinds=None, existing=(), stray=False, partitions=None, expired=False):
+    """Fake connection answering the catalog queries app.partitions makes."""
+    conn = AsyncMock()
+    executed = []
+
+    async def execute(statement, params=None):
+        sql = str(statement)
+        executed.append(sql)
+        params = params or {}
+        result = MagicMock()
+        result.rowcount = 3
+        if sql.startswith("SELECT relkind"):
+            result.scalar.return_value = (relkinds or {}).get(params["table"])
+        elif sql.startswith("SELECT to_regclass(quote_ident"):
+            result.scalar.return_value = params["name"] if params["name"] in existing else None
+        elif sql.startswith("SELECT EXISTS"):
+            # Rows of a month in the default partition, or expired ones
+            result.scalar.return_value = stray if " >= " in sql else expired
+        elif "FROM pg_inherits" in sql:
+            result.scalars.return_value.all.return_value = (partitions or {}).get(params["table"], [])
+        return result
+
+    conn.execute.side_effect = execute
+    return conn, executed
+
+
+class TestPartitionNames:
+    """Tests for the month helpers"""
+
+    def test_months(self):
+        """Months roll over years in both directions; partitions are named by month."""
+        from app.partitions import add_months, month_start, partition_name
+
+        assert month_start(date(2026, 10, 19)) == date(2026, 10, 1)
+        assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+        assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+        assert partition_name("articles", date(2026, 3, 1)) == "articles_p202603"
+
+
+class TestCreatePartition:
+    """Tests for app.partitions.create_partition"""
+
+    @pytest.mark.asyncio
+    async def test_creates_month_in_utc(self):
+        """A new month is created as a partition bounded by UTC month starts."""
+        from app.partitions import create_partition
+
+        conn, executed = _conn()
+        assert await create_partition(conn, "articles", date(2026, 12, 1)) is True
+        assert executed[-1] == (
+            "CREATE TABLE articles_p202612 PARTITION OF articles "
+            "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+        )
+
+    @pytest.mark.asyncio
+    async def test_moves_rows_out_of_default(self):
+        """Rows of the month already in the default partition move into the new one."""
+        from app.partitions import create_partition
+
+        conn, executed = _conn(stray=True)
+        await create_partition(conn, "daily_summaries", date(2026, 5, 1))
+        assert executed[-3].startswith("CREATE TABLE daily_summaries_p202605 (LIKE daily_summaries")
+        assert executed[-2].startswith("WITH moved AS (DELETE FROM daily_summaries_default")
+        assert "\"date\" >= '2026-05-01' AND \"date\" < '2026-06-01'" in executed[-2]
+        assert executed[-1].endswith("ATTACH PARTITION daily_summaries_p202605 FOR VALUES FROM ('2026-05-01') TO ('2026-06-01')")
+
+    @pytest.mark.asyncio
+    async def test_existing_partition_is_left_alone(self):
+        """Creating a partition twice is a no-op."""
+        from app.partitions import create_partition
+
+        conn, executed = _conn(existing={"articles_p202612"})
+        assert await create_partition(conn, "articles", date(2026, 12, 1)) is False
+        assert not any(sql.startswith("CREATE") for sql in executed)
+
+
+class TestEnsurePartitions:
+    """Tests for app.partitions.ensure_partitions"""
+
+    @pytest.mark.asyncio
+    async def test_premakes_upcoming_months(self, monkeypatch):
+        """The current and PARTITION_PREMAKE_MONTHS next months exist afterwards, for partitioned tables only."""
+        from app.config import settings
+        from app.partitions import ensure_partitions
+
+        monkeypatch.setattr(settings, "PARTITION_PREMAKE_MONTHS", 2)
+        conn, executed = _conn(relkinds={"articles": "p", "user_interactions": "r"}, existing={"articles_p202610"})
+        created = await ensure_partitions(conn, today=date(2026, 10, 19))
+
+        assert executed[0].startswith("SELECT pg_advisory_xact_lock")
+        assert created == ["articles_p202611", "articles_p202612"]
+
+
+class TestApplyRetention:
+    """Tests for app.partitions.apply_retention"""
+
+    @pytest.mark.asyncio
+    async def test_drop_old_partitions(self):
+        """Partitions before the cutoff are dropped after their source links; newer ones stay."""
+        from app.partitions import apply_retention
+
+        conn, executed = _conn(
+            relkinds={"articles": "p"},
+            partitions={"articles": ["articles_default", "articles_p202609", "articles_p202610", "articles_p202611"]},
+        )
+        retired = await apply_retention(conn, today=date(2026, 11, 5), policies={"articles": ("drop", 1)})
+
+        assert retired == ["articles_p202609"]
+        cleanup = executed.index("DELETE FROM synthesized_sources WHERE article_id IN (SELECT id FROM articles_p202609)")
+        assert executed[cleanup + 1] == "DELETE FROM article_urls WHERE article_id IN (SELECT id FROM articles_p202609)"
+        assert executed[cleanup + 2] == "DROP TABLE articles_p202609"
+        assert not any("articles_p202610" in sql for sql in executed)
+        # Nothing expired in the default partition
+        assert not any(sql.startswith("DELETE FROM articles_default") for sql in executed)
+
+    @pytest.mark.asyncio
+    async def test_drop_stories_deletes_their_interactions(self):
+        """Dropping a stories partition deletes the interactions with its stories, from any month."""
+        from app.partitions import apply_retention
+
+        conn, executed = _conn(
+            relkinds={"synthesized_articles": "p"},
+            partitions={"synthesized_articles": ["synthesized_articles_p202609"]},
+        )
+        await apply_retention(conn, today=date(2026, 11, 5), policies={"synthesized_articles": ("drop", 1)})
+
+        ids = "(SELECT id FROM synthesized_articles_p202609)"
+        drop = executed.index("DROP TABLE synthesized_articles_p202609")
+        assert executed[drop - 3:drop] == [
+            f"DELETE FROM synthesized_sources WHERE synthesized_id IN {ids}",
+            f"DELETE FROM user_interaction_keys WHERE synthesized_article_id IN {ids}",
+            f"DELETE FROM user_interactions WHERE synthesized_article_id IN {ids}",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_archive_detaches_into_schema(self, monkeypatch):
+        """Archived partitions are detached and moved, as are expired rows of the default partition."""
+        from app.config import settings
+        from app.partitions import apply_retention
+
+        monkeypatch.setattr(settings, "RETENTION_ARCHIVE_SCHEMA", "history")
+        conn, executed = _conn(
+            relkinds={"user_interactions": "p"},
+            partitions={"user_interactions": ["user_interactions_p202501"]},
+            expired=True,
+        )
+        await apply_retention(conn, today=date(2026, 10, 1), policies={"user_interactions": ("archive", 12)})
+
+        assert "ALTER TABLE user_interactions DETACH PARTITION user_interactions_p202501" in executed
+        assert "ALTER TABLE user_interactions_p202501 SET SCHEMA history" in executed
+        assert any(sql.startswith("WITH moved AS (DELETE FROM user_interactions_default WHERE \"created_at\" < '2025-10-01")
+                   and "INSERT INTO history.user_interactions_default" in sql for sql in executed)
+        assert not any(sql.startswith("DROP") for sql in executed)
+
+    @pytest.mark.asyncio
+    async def test_keep_and_invalid_policies(self):
+        """The keep policy touches nothing; unknown actions or periods are rejected."""
+        from app.partitions import apply_retention
+
+        conn, executed = _conn(relkinds={"articles": "p"})
+        assert await apply_retention(conn, policies={"articles": ("keep", 0)}) == []
+        assert len(executed) == 1  # the lock
+
+        with pytest.raises(ValueError):
+            await apply_retention(conn, policies={"articles": ("drop", 0)})
+        with pytest.raises(ValueError):
+            await apply_retention(conn, policies={"articles": ("truncate", 6)})
@@ -0,0 +1,133 @@
+"""Unit tests for the local pre-classifier."""
+import pytest
+
+
+def _label(top, content_type, entities):
+    from app.services.llm_validator import CATEGORIES
+
+    label = {cat: 0.0 for cat in CATEGORIES}
+    label[top] = 4.0
+    label["Opinion & General News"] = label.get("Opinion & General News", 0.0) + 1.0
+    label.update({
+        "Length": 0.5,
+        "Complexity": 0.4,
+        "Tone": {"Neutral": 0.7, "Informative": 0.8, "Emotional": 0.1},
+        "Content_type": content_type,
+        "Named Entities": entities,
+    })
+    return label
+
+
+def _dataset(n=20):
+    texts, labels = [], []
+    for i in range(n):
+        texts.append(f"Manchester United won the football match {i} after a late goal in the league game.")
+        labels.append(_label("Sports", "Recap", ["Manchester United"]))
+        texts.append(f"The parliament passed the election bill {i} after a long debate among ministers.")
+        labels.append(_label("Politics & Law", "News", ["Parliament"]))
+    return texts, labels
+
+
+class TestPreClassifier:
+    """Tests for PreClassifier training and prediction"""
+
+    def test_predict_returns_valid_llm_shaped_output(self):
+        """Predictions pass the same validation as LLM output."""
+        from app.services.preclassifier import PreClassifier
+        from app.services.llm_validator import validate_output, CATEGORIES
+
+        model = PreClassifier.train(*_dataset())
+        [(result, confidence)] = model.predict(["Manchester United lost the football match in the league."])
+
+        is_valid, error = validate_output(result)
+        assert is_valid, error
+        assert max(CATEGORIES, key=lambda c: result[c]) == "Sports"
+        assert result["Content_type"] == "Recap"
+        assert result["Named Entities"] == ["Manchester United"]
+        assert 0.5 < confidence <= 1.0
+
+    def test_unknown_vocabulary_has_zero_confidence(self):
+        """Texts with no known terms always go to the LLM."""
+        from app.services.preclassifier import PreClassifier
+
+        model = PreClassifier.train(*_dataset())
+        [(_, confidence)] = model.predict(["zzz qqq xyzzy"])
+
+        assert confidence == 0.0
+
+    def test_train_skips_invalid_and_local_labels(self):
+        """Only valid LLM labels are used for training."""
+        from app.services.preclassifier import PreClassifier, SOURCE_KEY, SOURCE_VALUE
+
+        texts, labels = _dataset()
+        texts += ["Broken label.", "Self-labelled article."]
+        labels += [{"Sports": 5}, {**labels[0], SOURCE_KEY: SOURCE_VALUE}]
+
+        model = PreClassifier.train(texts, labels)
+
+        assert model.n_samples == 40
+
+    def test_train_rejects_thin_data(self):
+        """Refuses to train on too few labels."""
+        from app.services.preclassifier import PreClassifier
+
+        texts, labels = _dataset(2)
+        with pytest.raises(ValueError):
+            PreClassifier.train(texts, labels)
+
+    def test_save_and_load(self, tmp_path):
+        """The model round-trips through joblib."""
+        from app.services.preclassifier import PreClassifier
+
+        model = PreClassifier.train(*_dataset())
+        path = str(tmp_path / "model.joblib")
+        model.save(path)
+        loaded = PreClassifier.load(path)
+
+        text = ["The parliament debated the election bill."]
+        assert loaded.predict(text) == model.predict(text)
+
+    def test_evaluate_reports_agreement(self):
+        """The agreement report compares predictions with LLM labels."""
+        from app.services.preclassifier import PreClassifier, evaluate
+
+        model = PreClassifier.train(*_dataset())
+        report = evaluate(model, *_dataset(5), min_confidence=0.5)
+
+        assert report["articles"] == 10
+        assert report["all"]["top_category_agreement"] == 1.0
+        assert report["all"]["content_type_agreement"] == 1.0
+        assert 0 <= report["coverage"] <= 1
+
+
+class TestIngestionPreclassify:
+    """Tests for IngestionService._preclassify"""
+
+    def test_preclassify_accepts_confident_predictions(self, tmp_path, monkeypatch):
+        """Confident predictions skip the LLM; the rest are left out."""
+        from app.config import settings
+        from app.services.preclassifier import PreClassifier
+        from app.services.ingestion_service import IngestionService
+
+        path = str(tmp_path / "model.joblib")
+        PreClassifier.train(*_dataset()).save(path)
+        monkeypatch.setattr(settings, "PRECLASSIFIER_MODEL_PATH", path)
+        monkeypatch.setattr(settings, "PRECLASSIFIER_MIN_CONFIDENCE", 0.5)
+
+        service = IngestionService()
+        accepted = service._preclassify([
+            {"url": "a", "content": "Manchester United won the football match in the league."},
+            {"url": "b", "content": "zzz qqq xyzzy"},
+        ])
+
+        assert list(accepted) == ["a"]
+
+    def test_preclassify_without_model(self, tmp_path, monkeypatch):
+        """Without a trained model everything goes to the LLM."""
+        from app.config import settings
+        from app.services.ingestion_service import IngestionService
+
+        monkeypatch.setattr(settings, "PRECLASSIFIER_MODEL_PATH", str(tmp_path / "missing.joblib"))
+
+        service = IngestionService()
+        assert service._preclassify([{"url": "a", "content": "text"}]) == {}
@@ -0,0 +1,115 @@
+"""Unit tests for the shared prompt builder."""
+import pytest
+
+
+class TestCleanText:
+    """Tests for prompt_builder.clean_text"""
+
+    def test_clean_text_strips_boilerplate(self):
+        """Removes page chrome lines."""
+        from app.services.prompt_builder import clean_text
+
+        text = "Advertisement\n\nThe minister resigned on Monday.\n\nShare this article\n\nSign up for our morning newsletter"
+        result = clean_text(text)
+
+        assert result == "The minister resigned on Monday."
+
+    def test_clean_text_strips_credit_lines(self):
+        """Removes link labels and copyright lines."""
+        from app.services.prompt_builder import clean_text
+
+        text = "The vote passed.\n\nRelated:\n\nWatch\n\nRead more\n\n© 2026 BBC\n\nCopyright Example News Ltd\n\nExample Media Ltd. All rights reserved."
+        result = clean_text(text)
+
+        assert result == "The vote passed."
+
+    def test_clean_text_keeps_sentences_starting_like_boilerplate(self):
+        """Story paragraphs that merely start with those words are kept."""
+        from app.services.prompt_builder import clean_text
+
+        text = (
+            "Watchdog groups said the rules were too weak.\n\n"
+            "Listening to critics, the minister promised changes.\n\n"
+            "Related charges were filed against two other officials on Tuesday.\n\n"
+            "Copyright law reform passed the upper house by a narrow margin.\n\n"
+            "Watch makers warned that the tariffs would raise prices, and publishers said the bill left "
+            "their existing licences and all rights reserved."
+        )
+
+        assert clean_text(text) == text
+
+    def test_clean_text_drops_duplicate_paragraphs(self):
+        """Keeps only the first copy of a repeated paragraph."""
+        from app.services.prompt_builder import clean_text
+
+        text = "First paragraph.\n\nSecond paragraph.\n\nfirst   paragraph!\n\nThird paragraph."
+        result = clean_text(text)
+
+        assert result == "First paragraph.\n\nSecond paragraph.\n\nThird paragraph."
+
+    def test_clean_text_empty(self):
+        """Handles empty input."""
+        from app.services.prompt_builder import clean_text
+
+        assert clean_text("") == ""
+        assert clean_text(None) == ""
+
+
+class TestFitToBudget:
+    """Tests for prompt_builder.fit_to_budget"""
+
+    def test_fit_to_budget_short_text_unchanged(self):
+        """Text within budget is returned as-is."""
+        from app.services.prompt_builder import fit_to_budget
+
+        assert fit_to_budget("Short text.", 100) == "Short text."
+
+    def test_fit_to_budget_keeps_lead_and_tail(self):
+        """Truncated text keeps the start and the end of the story."""
+        from app.services.prompt_builder import fit_to_budget, estimate_tokens, TRUNCATION_MARKER
+
+        text = "LEAD " + " ".join(f"word{i}" for i in range(2000)) + " TAIL"
+        result = fit_to_budget(text, 200)
+
+        assert result.startswith("LEAD")
+        assert result.endswith("TAIL")
+        assert TRUNCATION_MARKER in result
+        assert estimate_tokens(result) <= 200
+
+
+class TestPrepareTexts:
+    """Tests for prompt_builder.prepare_texts"""
+
+    def test_prepare_texts_shares_budget(self):
+        """Short texts stay whole, long texts absorb the truncation."""
+        from app.services.prompt_builder import prepare_texts, estimate_tokens
+
+        short = "A short story."
+        long = " ".join(["sentence"] * 4000)
+        result = prepare_texts([short, long], "test-model", budget=500)
+
+        assert result[0] == short
+        assert sum(estimate_tokens(t) for t in result) <= 500
+
+    def test_prepare_texts_records_tokens_saved(self):
+        """Tracks tokens saved per model."""
+        from app.services.prompt_builder import prepare_texts, get_prompt_stats, reset_prompt_stats
+
+        reset_prompt_stats()
+        long = " ".join(["sentence"] * 4000)
+        prepare_texts([long], "test-model", budget=500)
+
+        stats = get_prompt_stats()["test-model"]
+        assert stats["calls"] == 1
+        assert stats["final_tokens"] <= 500
+        assert stats["tokens_saved"] == stats["original_tokens"] - stats["final_tokens"]
+        assert stats["tokens_saved"] > 0
+
+    def test_prepare_texts_uses_model_budget(self):
+        """Falls back to the per-model budget."""
+        from app.services.prompt_builder import prepare_text, estimate_tokens, MODEL_TOKEN_BUDGETS
+
+        long = " ".join(["sentence"] * 40000)
+        result = prepare_text(long, "news-classifier")
+
+        assert estimate_tokens(result) <= MODEL_TOKEN_BUDGETS["news-classifier"]
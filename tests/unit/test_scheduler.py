@@ -0,0 +1,136 @@
+"""Unit tests for scheduler leader election and the job run ledger."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.exc import IntegrityError
+
+
+def _session_factory(db):
+    session = MagicMock()
+    session.return_value.__aenter__ = AsyncMock(return_value=db)
+    session.return_value.__aexit__ = AsyncMock(return_value=False)
+    return session
+
+
+def _lock_conn(acquired):
+    conn = AsyncMock()
+    conn.execute.return_value = MagicMock(scalar=MagicMock(return_value=acquired))
+    return conn
+
+
+class TestJobLedger:
+    """Tests for app.services.job_ledger.ledger_run"""
+
+    @pytest.mark.asyncio
+    async def test_records_outcome_and_duration(self, monkeypatch):
+        """A run is inserted as running and closed with its outcome and duration."""
+        from app.services import job_ledger
+
+        db = AsyncMock()
+        db.add = MagicMock()
+        monkeypatch.setattr(job_ledger, "AsyncSessionLocal", _session_factory(db))
+
+        async with job_ledger.ledger_run("daily_ingest") as run:
+            assert run is not None
+            run.fail("daily_ingest.py exited with return code 1")
+
+        inserted = db.add.call_args.args[0]
+        assert (inserted.name, inserted.status) == ("daily_ingest", "running")
+        finish = db.execute.call_args.args[0].compile().params
+        assert finish["status"] == "failed"
+        assert finish["error"] == "daily_ingest.py exited with return code 1"
+        assert finish["duration_seconds"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_overlapping_run_is_skipped(self, monkeypatch):
+        """When a run of the same job is in progress, the body is not entered."""
+        from app.services import job_ledger
+
+        db = AsyncMock()
+        db.add = MagicMock()
+        db.commit.side_effect = [IntegrityError("insert", {}, Exception("ux_job_runs_running")), None]
+        monkeypatch.setattr(job_ledger, "AsyncSessionLocal", _session_factory(db))
+
+        async with job_ledger.ledger_run("daily_cluster") as run:
+            assert run is None
+
+        db.rollback.assert_awaited_once()
+        assert db.add.call_args.args[0].status == "skipped"
+
+    @pytest.mark.asyncio
+    async def test_exception_marks_run_failed(self, monkeypatch):
+        """Errors escaping the job body are recorded and re-raised."""
+        from app.services import job_ledger
+
+        db = AsyncMock()
+        db.add = MagicMock()
+        monkeypatch.setattr(job_ledger, "AsyncSessionLocal", _session_factory(db))
+
+        with pytest.raises(RuntimeError):
+            async with job_ledger.ledger_run("daily_ingest"):
+                raise RuntimeError("boom")
+
+        assert db.execute.call_args.args[0].compile().params["error"] == "RuntimeError: boom"
+
+
+class TestLeaderElection:
+    """Tests for app.services.leader.LeaderElection"""
+
+    @pytest.mark.asyncio
+    async def test_only_lock_holder_is_elected(self):
+        """A process that does not get the advisory lock stays a standby."""
+        from app.services.leader import LeaderElection
+
+        leader_conn, standby_conn = _lock_conn(True), _lock_conn(False)
+        elected = AsyncMock()
+        leader = LeaderElection(1, elected, AsyncMock(), bind=MagicMock(connect=AsyncMock(return_value=leader_conn)))
+        standby = LeaderElection(1, elected, AsyncMock(), bind=MagicMock(connect=AsyncMock(return_value=standby_conn)))
+
+        assert await leader._try_acquire() is True
+        assert await standby._try_acquire() is False
+        standby_conn.close.assert_awaited_once()
+        leader_conn.close.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_steps_down_when_lock_connection_is_lost(self):
+        """A dead lock connection demotes the leader so a standby can take over."""
+        from app.services.leader import LeaderElection
+
+        conn = _lock_conn(True)
+        elected, demoted = AsyncMock(), AsyncMock()
+        election = LeaderElection(
+            1, elected, demoted, check_interval=0.01, bind=MagicMock(connect=AsyncMock(return_value=conn))
+        )
+
+        task = asyncio.create_task(election.run())
+        await asyncio.sleep(0.02)
+        assert election.is_leader
+        elected.assert_awaited_once()
+
+        conn.execute.side_effect = ConnectionError("connection lost")
+        await asyncio.sleep(0.02)
+        await election.stop()
+        await asyncio.wait_for(task, timeout=1)
+
+        demoted.assert_awaited()
+        conn.invalidate.assert_awaited()
+        assert not election.is_leader
+
+
+class TestScheduledJobs:
+    """Tests for app.services.scheduler job execution"""
+
+    @pytest.mark.asyncio
+    async def test_run_job_records_startup_and_error(self, monkeypatch):
+        """The runner's startup time and error end up on the ledger entry."""
+        from app.services import scheduler
+        from app.services.job_ledger import RunHandle
+
+        result = {"job": "daily_cluster", "error": "cancelled", "startup_ms": 1.2, "duration_seconds": 3.0}
+        monkeypatch.setattr(scheduler.runner, "run", AsyncMock(return_value=result))
+
+        run = RunHandle("id", "daily_cluster")
+        await scheduler._run_job(run, "daily_cluster")
+
+        assert scheduler.runner.run.call_args.kwargs["timeout"] == scheduler.settings.JOB_TIMEOUTS["daily_cluster"]
+        assert (run.startup_ms, run.error) == (1.2, "cancelled")
@@ -0,0 +1,67 @@
+"""Unit tests for password hashing off the event loop."""
+import threading
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+
+class TestPasswordHashing:
+    """Tests for app.utils.security password helpers"""
+
+    def test_work_factor_is_configurable(self, monkeypatch):
+        """New hashes use BCRYPT_ROUNDS; hashes with another cost need a rehash."""
+        from app.utils import security
+
+        monkeypatch.setattr(security.settings, "BCRYPT_ROUNDS", 4)
+        hashed = security.get_password_hash("secret")
+
+        assert hashed.startswith("$2b$04$")
+        assert security.verify_password("secret", hashed)
+        assert not security.password_needs_rehash(hashed)
+
+        monkeypatch.setattr(security.settings, "BCRYPT_ROUNDS", 5)
+        assert security.password_needs_rehash(hashed)
+        assert not security.password_needs_rehash("not-a-bcrypt-hash")
+
+    @pytest.mark.asyncio
+    async def test_async_helpers_run_on_hash_pool(self, monkeypatch):
+        """Hashing and verification run on the bcrypt threads, not the event loop thread."""
+        from app.utils import security
+
+        monkeypatch.setattr(security.settings, "BCRYPT_ROUNDS", 4)
+        threads = []
+        original = security.bcrypt.checkpw
+
+        def checkpw(*args):
+            threads.append(threading.current_thread().name)
+            return original(*args)
+
+        monkeypatch.setattr(security.bcrypt, "checkpw", checkpw)
+
+        hashed = await security.get_password_hash_async("secret")
+        assert await security.verify_password_async("secret", hashed) is True
+        assert await security.verify_password_async("wrong", hashed) is False
+        assert all(name.startswith("bcrypt") for name in threads)
+
+
+class TestAuthenticateRehash:
+    """Tests for AuthService.authenticate_user work factor upgrades"""
+
+    @pytest.mark.asyncio
+    async def test_login_upgrades_old_hash(self, monkeypatch):
+        """A successful login rehashes a password stored with an old work factor."""
+        from app.schemas.user import UserLogin
+        from app.services.auth_service import AuthService
+        from app.utils import security
+
+        monkeypatch.setattr(security.settings, "BCRYPT_ROUNDS", 4)
+        user = MagicMock()
+        user.hashed_password = security.get_password_hash("secret")
+        monkeypatch.setattr(security.settings, "BCRYPT_ROUNDS", 5)
+
+        db = AsyncMock()
+        db.execute.return_value = MagicMock(scalar_one_or_none=MagicMock(return_value=user))
+        result = await AuthService(db).authenticate_user(UserLogin(email="a@example.com", password="secret"))
+
+        assert result is user
+        assert user.hashed_password.startswith("$2b$05$")
+        db.commit.assert_awaited_once()
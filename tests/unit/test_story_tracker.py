@@ -0,0 +1,216 @@
+"""Unit tests for cross-day story tracking."""
+import json
+import uuid
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+SPORTS = [0, 0, 0, 0, 0, 0, 0, 5, 0, 0]
+POLITICS = [5, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+
+
+def _combiner_result(indices, entities=("Lakers", "Celtics")):
+    from app.services.llm_validator import CATEGORIES
+
+    analysis = {cat: 0.0 for cat in CATEGORIES}
+    analysis["Sports"] = 5.0
+    analysis.update({
+        "Length": 0.5,
+        "Complexity": 0.4,
+        "Tone": {"Neutral": 0.8, "Informative": 0.9, "Emotional": 0.2},
+        "Content_type": "News",
+        "Named Entities": list(entities),
+    })
+    return {
+        "articles_combined": len(indices),
+        "combined_indices": indices,
+        "title": "Lakers edge Celtics in overtime",
+        "generated_article": "The Lakers beat the Celtics after overtime, with a late comeback.",
+        "analysis": analysis,
+    }
+
+
+def _article(content="New report", entities=("Lakers", "Celtics")):
+    article = MagicMock()
+    article.id = uuid.uuid4()
+    article.title = "Report"
+    article.content = content
+    article.category_scores = SPORTS
+    article.metadata_ = {"Named Entities": list(entities)}
+    return article
+
+
+def _story():
+    story = MagicMock()
+    story.id = uuid.uuid4()
+    story.title = "Lakers beat Celtics"
+    story.content = "The Lakers beat the Celtics."
+    story.notes = None
+    story.sources = []
+    return story
+
+
+class TestEntityOverlap:
+    """Tests for entity normalization and overlap"""
+
+    def test_entity_set_normalizes(self):
+        """Case and whitespace differences do not split entities."""
+        from app.services.story_tracker import entity_set
+
+        assert entity_set(["Los  Angeles ", "los angeles", "X", None, 3]) == {"los angeles"}
+
+    def test_overlap_coefficient(self):
+        """Overlap is relative to the smaller set and needs two shared entities."""
+        from app.services.story_tracker import entity_overlap
+
+        story = {"lakers", "celtics", "lebron james", "boston"}
+        assert entity_overlap({"lakers", "celtics"}, story) == 1.0
+        assert entity_overlap({"lakers", "nba", "denver"}, story) == 0.0
+        assert entity_overlap({"lakers"}, story) == 1.0
+        assert entity_overlap(set(), story) == 0.0
+
+
+class TestStoryIndex:
+    """Tests for StoryIndex matching"""
+
+    def test_match_needs_vector_and_entities(self):
+        """Same topic with other entities, or same entities in another topic, do not match."""
+        from app.services.story_tracker import StoryIndex
+
+        index = StoryIndex(min_similarity=0.85, min_entity_overlap=0.5)
+        index.add("game", SPORTS, {"lakers", "celtics"})
+
+        assert index.match(SPORTS, {"lakers", "celtics", "boston"})[0] == "game"
+        assert index.match(SPORTS, {"yankees", "red sox"}) is None
+        assert index.match(POLITICS, {"lakers", "celtics"}) is None
+
+    def test_best_match_wins_and_entities_accumulate(self):
+        """The highest scoring story is returned; updates extend its entities."""
+        from app.services.story_tracker import StoryIndex
+
+        index = StoryIndex(min_similarity=0.85, min_entity_overlap=0.5)
+        index.add("game", SPORTS, {"lakers", "celtics", "boston", "los angeles"})
+        index.add("trade", SPORTS, {"lakers", "celtics"})
+
+        assert index.match(SPORTS, {"lakers", "celtics", "trade deadline"})[0] == "trade"
+
+        index.add("game", SPORTS, {"overtime"})
+        assert index.match(SPORTS, {"overtime", "boston"})[0] == "game"
+        assert len(index) == 2
+
+
+class TestUpdateStory:
+    """Tests for ClusterService delta updates of synthesized articles"""
+
+    @pytest.mark.asyncio
+    async def test_update_appends_new_sources(self):
+        """The story is rewritten in place from itself plus the new sources only."""
+        from app.services.story_tracker import StoryIndex
+        from scripts.daily_cluster import ClusterService
+
+        service = ClusterService()
+        response = MagicMock()
+        response.message.content = json.dumps(_combiner_result([1, 2]))
+        service.gateway = MagicMock()
+        service.gateway.chat = AsyncMock(return_value=response)
+        db = AsyncMock()
+        db.add = MagicMock()
+
+        story, new_article = _story(), _article()
+        stories = StoryIndex()
+        assert await service.update_story(db, stories, story, [new_article]) is True
+
+        kwargs = service.gateway.chat.call_args.kwargs
+        prompt = kwargs["messages"][0]["content"]
+        assert kwargs["stage"] == "combine_update"
+        assert prompt.startswith(ClusterService.UPDATE_PROMPT_PREFIX)
+        assert "ARTICLE 1:\nTitle: Lakers beat Celtics" in prompt
+        assert "ARTICLE 2:\nTitle: Report" in prompt
+
+        assert story.title == "Lakers edge Celtics in overtime"
+        assert story.category_scores[7] == 5.0
+        assert [s.article_id for s in story.sources] == [new_article.id]
+        assert "1 new sources" in story.notes
+        assert service.story_stats["updated"] == 1
+        assert story.id in stories
+        db.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_unrelated_reports_are_not_merged(self):
+        """If the combiner leaves the story out, the group is synthesized separately."""
+        from app.services.story_tracker import StoryIndex
+        from scripts.daily_cluster import ClusterService
+
+        service = ClusterService()
+        response = MagicMock()
+        response.message.content = json.dumps(_combiner_result([2]))
+        service.gateway = MagicMock()
+        service.gateway.chat = AsyncMock(return_value=response)
+        db = AsyncMock()
+
+        story = _story()
+        assert await service.update_story(db, StoryIndex(), story, [_article()]) is False
+        assert story.sources == []
+        db.commit.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_leftovers_attach_to_matching_story(self):
+        """Ungrouped articles that match a running story are sent to it as an update."""
+        from app.services.story_tracker import StoryIndex
+        from scripts.daily_cluster import ClusterService
+
+        service = ClusterService()
+        story = _story()
+        service.story_articles = {story.id: story}
+        stories = StoryIndex()
+        stories.add(story.id, SPORTS, {"lakers", "celtics"})
+
+        related, unrelated = _article(), _article(entities=("Yankees", "Red Sox"))
+        service.leftovers = [related, unrelated]
+
+        async def fake_update(db, index, target, articles):
+            service.story_stats["updated"] += 1
+            return True
+
+        service.update_story = AsyncMock(side_effect=fake_update)
+        await service.attach_leftovers(AsyncMock(), stories)
+
+        service.update_story.assert_awaited_once()
+        assert service.update_story.call_args.args[3] == [related]
+        assert service.story_stats["leftovers_attached"] == 1
+
+    @pytest.mark.asyncio
+    async def test_update_moves_story_out_of_older_partition(self, db_session):
+        """An updated story leaves its month's partition for the current one, keeping its id and sources."""
+        from datetime import date, datetime, timezone
+        from sqlalchemy import text
+        from sqlalchemy.future import select
+        from app.models.article import Article
+        from app.models.synthesized_article import SynthesizedArticle, SynthesizedSource
+        from app.partitions import create_partition, month_start, partition_name
+        from scripts.daily_cluster import ClusterService
+
+        now = datetime.now(timezone.utc)
+        conn = await db_session.connection()
+        for month in (date(2026, 1, 1), month_start(now)):
+            await create_partition(conn, "synthesized_articles", month)
+
+        old, new = (Article(id=uuid.uuid4(), title=t, content=t, source_url=f"http://example.com/{t}") for t in ("old", "new"))
+        story = SynthesizedArticle(id=uuid.uuid4(), title="Lakers beat Celtics", content="c",
+                                   generated_at=datetime(2026, 1, 15, tzinfo=timezone.utc))
+        story.sources.append(SynthesizedSource(article_id=old.id))
+        db_session.add_all([old, new, story])
+        await db_session.commit()
+
+        service = ClusterService()
+        assert await service.save_story_update(db_session, story, _combiner_result([1, 2]), [new], "prompt") is True
+
+        rows = await db_session.execute(text(
+            "SELECT tableoid::regclass::text FROM synthesized_articles WHERE id = :id"
+        ), {"id": story.id})
+        assert rows.scalars().all() == [partition_name("synthesized_articles", month_start(now))]
+
+        db_session.expunge_all()
+        result = await db_session.execute(select(SynthesizedArticle).where(SynthesizedArticle.id == story.id))
+        updated = result.scalar_one()
+        assert updated.title == "Lakers edge Celtics in overtime"
+        assert {s.article_id for s in updated.sources} == {old.id, new.id}
@@ -65,6 +65,36 @@ class TestGetDailySummary:
 
         assert result is None
 
+    @pytest.mark.asyncio
+    async def test_get_daily_summary_version(self, db_session):
+        """The version is today's summary id, status and generation time."""
+        from app.models.user import User
+        from app.models.summary import DailySummary
+        from app.services.summary_service import SummaryService
+
+        user_id = uuid4()
+        db_session.add(User(id=user_id, email=f"test_{user_id}@example.com", hashed_password="hashed"))
+        await db_session.commit()
+
+        service = SummaryService(db_session)
+        assert await service.get_daily_summary_version(str(user_id)) is None
+
+        summary = DailySummary(
+            id=uuid4(),
+            user_id=user_id,
+            article_ids=[],
+            summary_text={"status": "generating"},
+            date=date.today(),
+            status="pending"
+        )
+        db_session.add(summary)
+        await db_session.commit()
+
+        version = await service.get_daily_summary_version(str(user_id))
+        assert version == (summary.id, "pending", summary.summary_generated_at)
+        assert (await service.get_daily_summary(str(user_id), summary_id=summary.id)).id == summary.id
+        assert await service.get_daily_summary(str(user_id), summary_id=uuid4()) is None
+
 
 class TestGenerateDailySummary:
     """Tests for SummaryService.generate_daily_summary"""
@@ -216,3 +246,55 @@ class TestGenerateDailySummary:
         assert result is not None
         # Should have error field
         assert "error" in result.summary_text or "raw" in result.summary_text
+
+
+class TestStreamDailySummary:
+    """Tests for SummaryService.stream_daily_summary"""
+
+    @pytest.mark.asyncio
+    @patch('app.services.summary_service.NLPService')
+    async def test_stream_daily_summary_persists_valid_document(self, mock_nlp_class, db_session):
+        """Streams tokens, then stores the validated summary."""
+        from app.models.user import User
+        from app.models.article import Article
+        from app.services.summary_service import SummaryService
+
+        summary = {"greeting": "Hello!", "summary": "A" * 60, "key_points": ["Point 1"]}
+
+        async def fake_stream(*args, **kwargs):
+            yield '{"greeting": "Hello!", '
+            yield '"summary": "' + "A" * 60 + '", "key_points": ["Point 1"]}'
+
+        mock_nlp = MagicMock()
+        mock_nlp.stream_summary = fake_stream
+        mock_nlp.complete_stream = MagicMock(return_value=(summary, None))
+        mock_nlp_class.return_value = mock_nlp
+
+        user_id = uuid4()
+        db_session.add(User(
+            id=user_id,
+            email=f"test_{user_id}@example.com",
+            hashed_password="hashed",
+            name="Test User",
+            preferences=[0.5] * 10
+        ))
+        db_session.add(Article(
+            id=uuid4(),
+            title="Today's News",
+            content="News content here",
+            source_url="http://example.com/stream",
+            publisher="Test Publisher",
+            published_at=datetime.now(),
+            category_scores=[0.5] * 10
+        ))
+        await db_session.commit()
+
+        service = SummaryService(db_session)
+        events = [event async for event in service.stream_daily_summary(str(user_id))]
+
+        assert [e for e, _ in events] == ["token", "token", "done"]
+        assert events[-1][1]["summary_text"]["greeting"] == "Hello!"
+
+        stored = await service.get_daily_summary(str(user_id))
+        assert stored is not None
+        assert stored.status == "completed"
@@ -110,6 +110,60 @@ class TestUpdateUserPreferences:
 
         assert result is None
 
+    @pytest.mark.asyncio
+    async def test_update_user_preferences_bumps_version(self, db_session):
+        """Every update (and explicit bump) moves the preferences version on."""
+        from app.models.user import User
+
+        user_id = uuid4()
+        db_session.add(User(id=user_id, email=f"test_{user_id}@example.com", hashed_password="hashed"))
+        await db_session.commit()
+
+        service = UserService(db_session)
+        assert await service.get_preferences_version(user_id) == 0
+
+        await service.update_user_preferences(user_id, [0.3] * 10)
+        await service.update_user_preferences(user_id, [0.3] * 10)
+        assert await service.get_preferences_version(user_id) == 2
+
+        await service.bump_preferences_version(user_id)
+        assert await service.get_preferences_version(user_id) == 3
+        assert await service.get_preferences_version(uuid4()) is None
+
+
+class TestGetFeedPreferences:
+    """Tests for UserService.get_feed_preferences"""
+
+    @pytest.mark.asyncio
+    async def test_copy_is_kept_for_the_epoch(self, db_session):
+        """Preferences are copied at the epoch's first request and kept until the next epoch."""
+        from app.models.user import User
+
+        user_id = uuid4()
+        db_session.add(User(id=user_id, email=f"test_{user_id}@example.com", hashed_password="hashed",
+                            preferences=[0.5] * 10))
+        await db_session.commit()
+
+        service = UserService(db_session)
+        assert await service.get_feed_preferences(user_id, 7) == pytest.approx([0.5] * 10)
+
+        await service.update_user_preferences(user_id, [0.9] * 10)
+        assert await service.get_feed_preferences(user_id, 7) == pytest.approx([0.5] * 10)
+        assert await service.get_feed_preferences(user_id, 8) == pytest.approx([0.9] * 10)
+
+    @pytest.mark.asyncio
+    async def test_no_preferences(self, db_session):
+        """Users without preferences (and unknown users) get an empty vector."""
+        from app.models.user import User
+
+        user_id = uuid4()
+        db_session.add(User(id=user_id, email=f"test_{user_id}@example.com", hashed_password="hashed"))
+        await db_session.commit()
+
+        service = UserService(db_session)
+        assert await service.get_feed_preferences(user_id, 7) == []
+        assert await service.get_feed_preferences(uuid4(), 7) == []
+
 
 class TestInitializeUserVector:
     """Tests for UserService.initialize_user_vector"""
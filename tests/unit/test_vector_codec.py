@@ -0,0 +1,93 @@
+"""Unit tests for the binary pgvector codec."""
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock
+
+
+class TestVectorCodec:
+    """Tests for app.vector_codec"""
+
+    def test_binary_round_trip(self):
+        """Vectors encode to pgvector's binary format and decode to float32 arrays."""
+        from app.vector_codec import decode_vector, encode_vector
+
+        data = encode_vector([0.5, 1.0, 2.25])
+        assert data[:4] == b"\x00\x03\x00\x00"
+        assert len(data) == 4 + 3 * 4
+
+        decoded = decode_vector(data)
+        assert decoded.dtype == np.float32
+        assert decoded.flags.writeable
+        assert decoded.tolist() == [0.5, 1.0, 2.25]
+        assert decode_vector(encode_vector("[0.5,1,2.25]")).tolist() == [0.5, 1.0, 2.25]
+
+    def test_column_type_binds_arrays(self):
+        """The column type binds float32 arrays and checks dimensions."""
+        from app.vector_codec import NumpyVector
+
+        bind = NumpyVector(3).bind_processor(None)
+        bound = bind([1, 2, 3])
+        assert isinstance(bound, np.ndarray) and bound.dtype == np.float32
+        assert bind(None) is None
+        with pytest.raises(ValueError):
+            bind([1, 2])
+
+    def test_column_type_results(self):
+        """Arrays from the codec pass through; text (no codec) is still parsed."""
+        from app.vector_codec import NumpyVector
+
+        result = NumpyVector(3).result_processor(None, None)
+        array = np.array([1, 2, 3], dtype=np.float32)
+        assert result(array) is array
+        assert result("[1,2,3]").tolist() == [1.0, 2.0, 3.0]
+        assert result(None) is None
+
+    @pytest.mark.asyncio
+    async def test_register_tolerates_missing_extension(self):
+        """Connections to a database without pgvector still open."""
+        from app.vector_codec import register_vector_codecs
+
+        conn = AsyncMock()
+        await register_vector_codecs(conn)
+        assert conn.set_type_codec.call_args.kwargs["format"] == "binary"
+
+        conn.set_type_codec.side_effect = ValueError("unknown type: public.vector")
+        await register_vector_codecs(conn)
+
+    def test_halfvec_round_trip(self):
+        """halfvec values use two bytes per dimension and decode to float32."""
+        from app.vector_codec import decode_halfvec, encode_halfvec
+
+        data = encode_halfvec([0.5, 1.0, 2.25])
+        assert data[:4] == b"\x00\x03\x00\x00"
+        assert len(data) == 4 + 3 * 2
+
+        decoded = decode_halfvec(data)
+        assert decoded.dtype == np.float32
+        assert decoded.tolist() == [0.5, 1.0, 2.25]
+        # Rounded to the nearest float16
+        assert abs(decode_halfvec(encode_halfvec([0.1]))[0] - 0.1) < 1e-4
+
+    def test_storage_setting_selects_type_and_ops(self, monkeypatch):
+        """VECTOR_STORAGE picks the column type and index operator class."""
+        from app.config import settings
+        from app.vector_codec import NumpyHalfVector, NumpyVector, category_vector, index_ops
+
+        monkeypatch.setattr(settings, "VECTOR_STORAGE", "vector")
+        assert isinstance(category_vector(10), NumpyVector)
+        assert index_ops() == "vector_cosine_ops"
+
+        monkeypatch.setattr(settings, "VECTOR_STORAGE", "halfvec")
+        column_type = category_vector(10)
+        assert isinstance(column_type, NumpyHalfVector)
+        assert column_type.get_col_spec() == "HALFVEC(10)"
+        assert index_ops("l2") == "halfvec_l2_ops"
+
+    def test_halfvec_column_text_results(self):
+        """Without the codec, halfvec text still comes back as a float32 array."""
+        from app.vector_codec import NumpyHalfVector
+
+        result = NumpyHalfVector(3).result_processor(None, None)
+        decoded = result("[1,2,3]")
+        assert decoded.dtype == np.float32
+        assert decoded.tolist() == [1.0, 2.0, 3.0]